@@ -4,30 +4,464 @@ Handles communication with Frappe API for check-ins and leave applications.
 """
 
 import json
+import sys
 import requests
-import pytz
+import pandas as pd
 import logging
-from datetime import datetime, timedelta
-from typing import List, Dict, Any
-
-from config import API_URL, LEAVE_API_URL, EMPLOYEE_API_URL, get_api_headers
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from typing import List, Dict, Any, Optional, Tuple, Union
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    from zoneinfo import ZoneInfo
+except ImportError:  # Python 3.8: fall back to pytz
+    import pytz
+
+    ZoneInfo = pytz.timezone
+
+try:
+    import ciso8601
+except ImportError:  # Optional C parser; fall back to datetime.fromisoformat
+    ciso8601 = None
+
+try:
+    import orjson
+except ImportError:  # Optional fast JSON decoder; fall back to the stdlib json
+    orjson = None
+
+from config import API_URL, LEAVE_API_URL, EMPLOYEE_API_URL, COUNT_API_URL, PAGE_LENGTH, get_api_headers
 from utils import normalize_leave_type
 
 logger = logging.getLogger(__name__)
 
+# Timezone used to localize check-in times (resolved once at import)
+MEXICO_TZ = ZoneInfo("America/Mexico_City")
+
+# datetime.fromisoformat accepts the "Z" suffix natively from Python 3.11
+_FROMISOFORMAT_PARSES_Z = sys.version_info >= (3, 11)
+
+# Field lists requested from each resource, serialized once at import
+CHECKIN_FIELDS_JSON = json.dumps(["employee", "employee_name", "time"])
+LEAVE_FIELDS_JSON = json.dumps(
+    ["employee", "employee_name", "leave_type", "from_date", "to_date", "status", "half_day"]
+)
+EMPLOYEE_FIELDS_JSON = json.dumps(["employee", "date_of_joining"])
+
+# Connections kept per host by the pooled session; it also bounds the number of
+# concurrent requests so none is made without a pooled connection
+HTTP_POOL_MAXSIZE = 16
+
+
+def _parse_iso_datetime(value: str) -> datetime:
+    """
+    Parses an ISO 8601 timestamp as returned by Frappe.
+    Uses ciso8601 when available, which handles the "Z" suffix natively.
+    """
+    if ciso8601 is not None:
+        return ciso8601.parse_datetime(value)
+    if _FROMISOFORMAT_PARSES_Z:
+        return datetime.fromisoformat(value)
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def _split_date_range(start_date: str, end_date: str, days: int) -> List[Tuple[str, str]]:
+    """
+    Splits an inclusive YYYY-MM-DD range into contiguous windows of at most ``days`` days.
+
+    Windows do not overlap, so a "Between" filter on each one returns disjoint
+    sets of records. A range that cannot be parsed is returned as a single window.
+    """
+    try:
+        start = date.fromisoformat(start_date)
+        end = date.fromisoformat(end_date)
+    except (TypeError, ValueError):
+        return [(start_date, end_date)]
+
+    windows = []
+    window_start = start
+    while window_start <= end:
+        window_end = min(window_start + timedelta(days=days - 1), end)
+        windows.append((window_start.isoformat(), window_end.isoformat()))
+        window_start = window_end + timedelta(days=1)
+    return windows or [(start_date, end_date)]
+
+
+def _decode_json(response: requests.Response) -> Dict[str, Any]:
+    """
+    Decodes a JSON response body straight from the raw bytes, using orjson when
+    available. Skips requests' text decoding (and its charset detection) step.
+    """
+    if orjson is not None:
+        return orjson.loads(response.content)
+    return json.loads(response.content)
+
+
+def _normalize_checkin_times(records: List[Dict[str, Any]], as_string: bool = False) -> None:
+    """
+    Converts the "time" field of every record to America/Mexico_City in place.
+
+    Aware timestamps are parsed and converted in a single vectorized pandas
+    call. Naive timestamps (or values pandas cannot parse) go through the
+    per-record path, which interprets naive values in the local system timezone.
+
+    Args:
+        records: Check-in records as returned by the API
+        as_string: Store ISO 8601 strings instead of timezone-aware datetimes
+    """
+    if not records:
+        return
+
+    if _parse_iso_datetime(records[0]["time"]).tzinfo is not None:
+        try:
+            parsed = pd.to_datetime(
+                [record["time"] for record in records], utc=True, format="ISO8601"
+            ).tz_convert(MEXICO_TZ)
+        except (ValueError, TypeError):
+            parsed = None
+
+        if parsed is not None:
+            for record, timestamp in zip(records, parsed):
+                record["time"] = timestamp.isoformat() if as_string else timestamp
+            return
+
+    for record in records:
+        time_mexico = _parse_iso_datetime(record["time"]).astimezone(MEXICO_TZ)
+        record["time"] = time_mexico.isoformat() if as_string else time_mexico
+
 
 class APIClient:
     """Client for handling API requests to Frappe/ERPNext."""
     
-    def __init__(self):
-        """Initialize API client with default configuration."""
+    def __init__(self, page_length: Optional[int] = None):
+        """
+        Initialize API client with default configuration.
+
+        Args:
+            page_length: Records requested per page (defaults to config.PAGE_LENGTH)
+        """
         self.checkin_url = API_URL
         self.leave_url = LEAVE_API_URL
         self.employee_url = EMPLOYEE_API_URL
-        self.page_length = 100
+        self.page_length = page_length or PAGE_LENGTH
         self.timeout = 30
+        self.max_workers = 8
+        self.checkin_shard_days = 7
+        self.session = self._create_session()
+        self._headers = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def _create_session(self) -> requests.Session:
+        """
+        Creates a pooled HTTP session so paginated requests reuse the same
+        TCP/TLS connection instead of opening a new one per page.
+        """
+        session = requests.Session()
+        # Connection errors, read timeouts and gateway errors are retried here
+        # with exponential backoff, so callers never need their own retry loop
+        retries = Retry(
+            total=3,
+            backoff_factor=0.5,
+            status_forcelist=[502, 503, 504],
+            allowed_methods=["GET"],
+        )
+        adapter = HTTPAdapter(
+            pool_connections=4, pool_maxsize=HTTP_POOL_MAXSIZE, max_retries=retries
+        )
+        session.mount("https://", adapter)
+        return session
+
+    def _get_headers(self) -> Dict[str, str]:
+        """
+        Returns the API authentication headers, built once per client.
+
+        Raises:
+            ValueError: If the API credentials are not configured
+        """
+        if self._headers is None:
+            self._headers = get_api_headers()
+        return self._headers
+
+    def close(self) -> None:
+        """Closes the underlying HTTP session and releases pooled connections."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        self.session.close()
+
+    def __enter__(self):
+        """Context manager entry."""
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Context manager exit."""
+        self.close()
     
-    def fetch_checkins(self, start_date: str, end_date: str, device_filter: str) -> List[Dict[str, Any]]:
+    def _fetch_page(
+        self, url: str, params: Dict[str, Any], limit_start: int, headers: Dict[str, str]
+    ) -> List[Dict[str, Any]]:
+        """
+        Fetches a single page of results starting at ``limit_start``.
+
+        Args:
+            url: Resource URL
+            params: Base query parameters (not modified)
+            limit_start: Offset of the first record of the page
+            headers: Authentication headers
+
+        Returns:
+            List of records contained in the page
+        """
+        page_params = {
+            **params,
+            "limit_start": limit_start,
+            "limit_page_length": self.page_length,
+        }
+        response = self.session.get(
+            url,
+            headers=headers,
+            params=page_params,
+            timeout=self.timeout
+        )
+        response.raise_for_status()
+        return _decode_json(response).get("data", [])
+
+    def _get_total(
+        self, url: str, params: Dict[str, Any], headers: Dict[str, str]
+    ) -> Optional[int]:
+        """
+        Asks the server how many records match ``params`` via frappe.client.get_count.
+
+        Args:
+            url: Resource URL (its last path segment is the doctype)
+            params: Base query parameters; only "filters" is used
+            headers: Authentication headers
+
+        Returns:
+            Number of matching records, or None if the count is unavailable
+        """
+        count_params = {"doctype": url.rsplit("/", 1)[-1]}
+        if "filters" in params:
+            count_params["filters"] = params["filters"]
+
+        try:
+            response = self.session.get(
+                COUNT_API_URL,
+                headers=headers,
+                params=count_params,
+                timeout=self.timeout
+            )
+            response.raise_for_status()
+            total = _decode_json(response).get("message")
+        except (requests.exceptions.RequestException, ValueError, AttributeError) as e:
+            logger.debug(f"No se pudo obtener el total de registros: {e}")
+            return None
+
+        return total if isinstance(total, int) else None
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """
+        Returns the client-wide executor used for every HTTP request.
+
+        It is sized to the session's connection pool, so no matter how many
+        resources or date windows are fetched at once, at most
+        HTTP_POOL_MAXSIZE requests are in flight on the shared session.
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=HTTP_POOL_MAXSIZE, thread_name_prefix="api-request"
+            )
+        return self._executor
+
+    def _fetch_remaining_in_waves(
+        self, url: str, params: Dict[str, Any], headers: Dict[str, str]
+    ) -> List[Dict[str, Any]]:
+        """
+        Fetches the pages after the first one when the total is unknown, in
+        waves of ``max_workers`` pages until a short page is found.
+        """
+        executor = self._get_executor()
+        records: List[Dict[str, Any]] = []
+        limit_start = self.page_length
+        while True:
+            offsets = [
+                limit_start + i * self.page_length for i in range(self.max_workers)
+            ]
+            futures = [
+                executor.submit(self._fetch_page, url, params, offset, headers)
+                for offset in offsets
+            ]
+            for future in futures:
+                data = future.result()
+                records.extend(data)
+                if len(data) < self.page_length:
+                    return records
+            limit_start = offsets[-1] + self.page_length
+
+    def _fetch_all_pages_many(
+        self, targets: List[Tuple[str, Dict[str, Any]]], headers: Dict[str, str]
+    ) -> List[Union[List[Dict[str, Any]], requests.exceptions.RequestException]]:
+        """
+        Fetches every page of several resources at once.
+
+        The first page of every target is requested together. Targets whose
+        first page comes back full ask the server for their total and then
+        request exactly the remaining pages; if the total is unavailable, pages
+        are requested in waves of ``max_workers`` until a short page is found.
+        All requests go through the client-wide executor, and the calling thread
+        only waits on them, so executors are never nested.
+
+        Args:
+            targets: (url, params) pairs to fetch
+            headers: Authentication headers
+
+        Returns:
+            One entry per target: its records in page order, or the
+            RequestException that made it fail (other targets are unaffected)
+        """
+        executor = self._get_executor()
+        results: List[Any] = [None] * len(targets)
+
+        first_pages = [
+            executor.submit(self._fetch_page, url, params, 0, headers)
+            for url, params in targets
+        ]
+        full = []
+        for index, future in enumerate(first_pages):
+            try:
+                page = future.result()
+            except requests.exceptions.RequestException as e:
+                results[index] = e
+                continue
+            results[index] = list(page)
+            if len(page) >= self.page_length:
+                full.append(index)
+
+        totals = {
+            index: executor.submit(self._get_total, *targets[index], headers)
+            for index in full
+        }
+        remaining = {}
+        unknown_total = []
+        for index, future in totals.items():
+            total = future.result()
+            if total is None:
+                unknown_total.append(index)
+                continue
+            url, params = targets[index]
+            remaining[index] = [
+                executor.submit(self._fetch_page, url, params, offset, headers)
+                for offset in range(self.page_length, total, self.page_length)
+            ]
+
+        for index, futures in remaining.items():
+            try:
+                for future in futures:
+                    results[index].extend(future.result())
+            except requests.exceptions.RequestException as e:
+                results[index] = e
+
+        for index in unknown_total:
+            try:
+                results[index].extend(self._fetch_remaining_in_waves(*targets[index], headers))
+            except requests.exceptions.RequestException as e:
+                results[index] = e
+
+        return results
+
+    def _fetch_all_pages(
+        self, url: str, params: Dict[str, Any], headers: Dict[str, str]
+    ) -> List[Dict[str, Any]]:
+        """
+        Fetches every page of a single resource (see _fetch_all_pages_many).
+
+        Raises:
+            requests.exceptions.RequestException: If any page request fails
+        """
+        result = self._fetch_all_pages_many([(url, params)], headers)[0]
+        if isinstance(result, requests.exceptions.RequestException):
+            raise result
+        return result
+
+    def _checkin_targets(
+        self, start_date: str, end_date: str, device_filter: str
+    ) -> List[Tuple[str, Dict[str, Any]]]:
+        """Builds one check-in request per week-sized window of the date range."""
+        targets = []
+        for window in _split_date_range(start_date, end_date, self.checkin_shard_days):
+            filters = json.dumps([
+                ["Employee Checkin", "time", "Between", list(window)],
+                ["Employee Checkin", "device_id", "like", device_filter],
+            ])
+            targets.append((self.checkin_url, {"fields": CHECKIN_FIELDS_JSON, "filters": filters}))
+        return targets
+
+    def _leave_target(self, start_date: str, end_date: str) -> Tuple[str, Dict[str, Any]]:
+        """Builds the request for approved leave applications within a date range."""
+        params = {
+            "fields": LEAVE_FIELDS_JSON,
+            "filters": json.dumps([
+                ["status", "=", "Approved"],
+                ["from_date", ">=", start_date],
+                ["to_date", "<=", end_date],
+            ]),
+        }
+        return self.leave_url, params
+
+    def _employee_target(self) -> Tuple[str, Dict[str, Any]]:
+        """Builds the request for every employee's joining date."""
+        return self.employee_url, {"fields": EMPLOYEE_FIELDS_JSON}
+
+    def _collect_checkins(
+        self, window_results: List[Any], as_string: bool = False
+    ) -> List[Dict[str, Any]]:
+        """Joins the check-in windows in order and normalizes their times."""
+        all_records = []
+        for result in window_results:
+            if isinstance(result, requests.exceptions.RequestException):
+                logger.error(f"Error llamando API: {result}")
+                return []
+            all_records.extend(result)
+
+        # Normalize timezone from UTC to America/Mexico_City
+        _normalize_checkin_times(all_records, as_string=as_string)
+
+        logger.info(f"Se obtuvieron {len(all_records)} registros de la API.")
+        return all_records
+
+    def _collect_leaves(self, result: Any) -> List[Dict[str, Any]]:
+        """Logs the fetched leave applications, or the error that prevented it."""
+        if isinstance(result, requests.exceptions.RequestException):
+            logger.error(f"Error obteniendo solicitudes de permisos de API: {result}")
+            return []
+
+        logger.info(f"Se obtuvieron {len(result)} solicitudes de permiso aprobadas de API.")
+
+        if result and logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Ejemplo de solicitudes de permiso recuperadas:")
+            for leave in result[:3]:
+                half_day_info = " (medio día)" if leave.get("half_day") == 1 else ""
+                logger.debug(
+                    "   - %s: %s%s (%s - %s)",
+                    leave['employee_name'], leave['leave_type'], half_day_info,
+                    leave['from_date'], leave['to_date'],
+                )
+
+        return result
+
+    def _collect_employees(self, result: Any) -> List[Dict[str, Any]]:
+        """Logs the fetched employee records, or the error that prevented it."""
+        if isinstance(result, requests.exceptions.RequestException):
+            logger.error(f"Error llamando API de Empleados: {result}")
+            return []
+
+        logger.info(f"Se obtuvieron {len(result)} registros de empleados de API.")
+        return result
+
+    def fetch_checkins(
+        self, start_date: str, end_date: str, device_filter: str, as_string: bool = False
+    ) -> List[Dict[str, Any]]:
         """
         Fetches all check-in records from the API for a date range.
         
@@ -35,67 +469,24 @@ class APIClient:
             start_date: Start date in YYYY-MM-DD format
             end_date: End date in YYYY-MM-DD format  
             device_filter: Device filter pattern (e.g., "%villas%")
+            as_string: Return "time" as ISO 8601 strings instead of datetimes
             
         Returns:
-            List of check-in records with normalized timezone
+            List of check-in records with "time" as a timezone-aware
+            America/Mexico_City datetime (or ISO string if as_string)
         """
         logger.debug(f"Obteniendo check-ins desde API para dispositivo '{device_filter}'...")
         
         try:
-            headers = get_api_headers()
+            headers = self._get_headers()
         except ValueError as e:
             logger.error(f"Error validando credenciales API: {e}")
             return []
-        
-        filters = json.dumps([
-            ["Employee Checkin", "time", "Between", [start_date, end_date]],
-            ["Employee Checkin", "device_id", "like", device_filter],
-        ])
-        params = {
-            "fields": json.dumps(["employee", "employee_name", "time"]),
-            "filters": filters,
-        }
 
-        all_records = []
-        limit_start = 0
-
-        while True:
-            params["limit_start"] = limit_start
-            params["limit_page_length"] = self.page_length
-            
-            try:
-                response = requests.get(
-                    self.checkin_url, 
-                    headers=headers, 
-                    params=params,
-                    timeout=self.timeout
-                )
-                response.raise_for_status()
-                data = response.json().get("data", [])
-                
-                if not data:
-                    break
-
-                # Normalize timezone from UTC to America/Mexico_City
-                for record in data:
-                    time_utc = datetime.fromisoformat(record["time"].replace("Z", "+00:00"))
-                    mexico_tz = pytz.timezone("America/Mexico_City")
-                    time_mexico = time_utc.astimezone(mexico_tz)
-                    record["time"] = time_mexico.isoformat()
-
-                all_records.extend(data)
-                
-                if len(data) < self.page_length:
-                    break
-                    
-                limit_start += self.page_length
-                
-            except requests.exceptions.RequestException as e:
-                logger.error(f"Error llamando API: {e}")
-                return []
-
-        logger.info(f"Se obtuvieron {len(all_records)} registros de la API.")
-        return all_records
+        # Wide ranges are split into week-sized windows fetched concurrently
+        targets = self._checkin_targets(start_date, end_date, device_filter)
+        results = self._fetch_all_pages_many(targets, headers)
+        return self._collect_checkins(results, as_string=as_string)
 
     def fetch_leave_applications(self, start_date: str, end_date: str) -> List[Dict[str, Any]]:
         """
@@ -111,57 +502,13 @@ class APIClient:
         logger.debug(f"Obteniendo solicitudes de permisos aprobadas de API para período {start_date} - {end_date}...")
         
         try:
-            headers = get_api_headers()
+            headers = self._get_headers()
         except ValueError as e:
             logger.error(f"Error validando credenciales API: {e}")
             return []
-        url = f'https://erp.asiatech.com.mx/api/resource/Leave Application?fields=["employee","employee_name","leave_type","from_date","to_date","status","half_day"]&filters=[["status","=","Approved"],["from_date",">=","{start_date}"],["to_date","<=","{end_date}"]]'
-
-        all_leave_records = []
-        limit_start = 0
-
-        while True:
-            params = {
-                "limit_start": limit_start,
-                "limit_page_length": self.page_length,
-            }
 
-            try:
-                response = requests.get(
-                    url, 
-                    headers=headers, 
-                    params=params, 
-                    timeout=self.timeout
-                )
-                response.raise_for_status()
-                data = response.json().get("data", [])
-
-                if not data:
-                    break
-
-                all_leave_records.extend(data)
-
-                if len(data) < self.page_length:
-                    break
-
-                limit_start += self.page_length
-
-            except requests.exceptions.Timeout:
-                logger.warning("Timeout obteniendo solicitudes de permisos. Reintentando...")
-                continue
-            except requests.exceptions.RequestException as e:
-                logger.error(f"Error obteniendo solicitudes de permisos de API: {e}")
-                return []
-
-        logger.info(f"Se obtuvieron {len(all_leave_records)} solicitudes de permiso aprobadas de API.")
-
-        if all_leave_records:
-            logger.debug("Ejemplo de solicitudes de permiso recuperadas:")
-            for i, leave in enumerate(all_leave_records[:3]):
-                half_day_info = f" (medio día)" if leave.get("half_day") == 1 else ""
-                logger.debug(f"   - {leave['employee_name']}: {leave['leave_type']}{half_day_info} ({leave['from_date']} - {leave['to_date']})")
-
-        return all_leave_records
+        result = self._fetch_all_pages_many([self._leave_target(start_date, end_date)], headers)[0]
+        return self._collect_leaves(result)
 
     def fetch_employee_joining_dates(self) -> List[Dict[str, Any]]:
         """
@@ -173,48 +520,50 @@ class APIClient:
         logger.debug("Obteniendo todas las fechas de contratación de empleados de API...")
 
         try:
-            headers = get_api_headers()
+            headers = self._get_headers()
         except ValueError as e:
             logger.error(f"Error validando credenciales API: {e}")
             return []
 
-        params = {
-            "fields": json.dumps(["employee", "date_of_joining"]),
-        }
-
-        all_records = []
-        limit_start = 0
-
-        while True:
-            params["limit_start"] = limit_start
-            params["limit_page_length"] = self.page_length
+        result = self._fetch_all_pages_many([self._employee_target()], headers)[0]
+        return self._collect_employees(result)
 
-            try:
-                response = requests.get(
-                    self.employee_url,
-                    headers=headers,
-                    params=params,
-                    timeout=self.timeout
-                )
-                response.raise_for_status()
-                data = response.json().get("data", [])
-
-                if not data:
-                    break
-
-                all_records.extend(data)
+    def fetch_all(
+        self, start_date: str, end_date: str, device_filter: str
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Fetches check-ins, approved leave applications and employee joining dates
+        concurrently. Every page of the three resources goes through the
+        client-wide executor, so the total number of requests in flight never
+        exceeds the session's connection pool.
 
-                if len(data) < self.page_length:
-                    break
+        Args:
+            start_date: Start date in YYYY-MM-DD format
+            end_date: End date in YYYY-MM-DD format
+            device_filter: Device filter pattern (e.g., "%villas%")
 
-                limit_start += self.page_length
+        Returns:
+            Tuple of (checkins, leave_applications, employee_joining_dates)
+        """
+        try:
+            headers = self._get_headers()
+        except ValueError as e:
+            logger.error(f"Error validando credenciales API: {e}")
+            return [], [], []
 
-            except requests.exceptions.RequestException as e:
-                logger.error(f"Error llamando API de Empleados: {e}")
-                return []
+        checkin_targets = self._checkin_targets(start_date, end_date, device_filter)
+        targets = checkin_targets + [
+            self._leave_target(start_date, end_date),
+            self._employee_target(),
+        ]
+        results = self._fetch_all_pages_many(targets, headers)
 
-        logger.info(f"Se obtuvieron {len(all_records)} registros de empleados de API.")
-        return all_records
+        n_windows = len(checkin_targets)
+        return (
+            self._collect_checkins(results[:n_windows]),
+            self._collect_leaves(results[n_windows]),
+            self._collect_employees(results[n_windows + 1]),
+        )
 
 
 def procesar_permisos_empleados(leave_data: List[Dict[str, Any]]) -> Dict[str, Dict]:
@@ -226,7 +575,9 @@ def procesar_permisos_empleados(leave_data: List[Dict[str, Any]]) -> Dict[str, D
         leave_data: List of leave application records from API
         
     Returns:
-        Dictionary organized by employee code and date with leave information
+        Dictionary organized by employee code and date with leave information.
+        All dates of a full-day leave reference the same info dict, so treat the
+        values as read-only (copy one before modifying it).
     """
     if not leave_data:
         return {}
@@ -239,18 +590,16 @@ def procesar_permisos_empleados(leave_data: List[Dict[str, Any]]) -> Dict[str, D
 
     for permiso in leave_data:
         employee_code = permiso["employee"]
-        from_date = datetime.strptime(permiso["from_date"], "%Y-%m-%d").date()
-        to_date = datetime.strptime(permiso["to_date"], "%Y-%m-%d").date()
+        from_date = date.fromisoformat(permiso["from_date"])
+        to_date = date.fromisoformat(permiso["to_date"])
         is_half_day = permiso.get("half_day") == 1
 
-        if employee_code not in permisos_por_empleado:
-            permisos_por_empleado[employee_code] = {}
+        empleado_permisos = permisos_por_empleado.setdefault(employee_code, {})
+        leave_type_normalized = normalize_leave_type(permiso["leave_type"])
 
         # If it's a half-day leave, only process the specific date
         if is_half_day:
-            leave_type_normalized = normalize_leave_type(permiso["leave_type"])
-
-            permisos_por_empleado[employee_code][from_date] = {
+            empleado_permisos[from_date] = {
                 "leave_type": permiso["leave_type"],
                 "leave_type_normalized": leave_type_normalized,
                 "employee_name": permiso["employee_name"],
@@ -263,25 +612,24 @@ def procesar_permisos_empleados(leave_data: List[Dict[str, Any]]) -> Dict[str, D
             total_dias_permiso += 0.5
             permisos_medio_dia += 1
         else:
-            # Full day leave - process the entire date range
-            current_date = from_date
-            while current_date <= to_date:
-                leave_type_normalized = normalize_leave_type(permiso["leave_type"])
-
-                permisos_por_empleado[employee_code][current_date] = {
-                    "leave_type": permiso["leave_type"],
-                    "leave_type_normalized": leave_type_normalized,
-                    "employee_name": permiso["employee_name"],
-                    "from_date": from_date,
-                    "to_date": to_date,
-                    "status": permiso["status"],
-                    "is_half_day": False,
-                    "dias_permiso": 1.0,  # Full day
-                }
-                current_date += timedelta(days=1)
-                total_dias_permiso += 1.0
+            # Full day leave - every day of the range shares the same (read-only) entry
+            entry = {
+                "leave_type": permiso["leave_type"],
+                "leave_type_normalized": leave_type_normalized,
+                "employee_name": permiso["employee_name"],
+                "from_date": from_date,
+                "to_date": to_date,
+                "status": permiso["status"],
+                "is_half_day": False,
+                "dias_permiso": 1.0,  # Full day
+            }
+            num_days = (to_date - from_date).days + 1
+            base_ordinal = from_date.toordinal()
+            for offset in range(num_days):
+                empleado_permisos[date.fromordinal(base_ordinal + offset)] = entry
+            total_dias_permiso += max(num_days, 0)
 
     logger.info(f"Se procesaron solicitudes de permiso para {len(permisos_por_empleado)} empleados, "
           f"{total_dias_permiso:.1f} días totales de permiso ({permisos_medio_dia} de medio día).")
 
-    return permisos_por_empleado
\ No newline at end of file
+    return permisos_por_empleado
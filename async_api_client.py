@@ -4,20 +4,39 @@ Handles communication with Frappe API for check-ins and leave applications using
 Provides significant performance improvements over the synchronous version.
 """
 
+import atexit
 import json
 import aiohttp
 import asyncio
-import pytz
+import random
+import pandas as pd
 import logging
-from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional, Tuple
+from collections import deque
+from itertools import count
+from typing import List, Dict, Any, Optional, Tuple, AsyncIterator, Deque, Iterator
 from dataclasses import dataclass
 
-from config import API_URL, LEAVE_API_URL, EMPLOYEE_API_URL, get_api_headers
+try:
+    import orjson
+except ImportError:  # Optional fast JSON decoder; fall back to the stdlib json
+    orjson = None
+
+try:
+    import aiodns  # noqa: F401  Enables aiohttp's c-ares based AsyncResolver
+except ImportError:  # Optional; aiohttp falls back to its threaded resolver
+    aiodns = None
+
+from config import API_URL, LEAVE_API_URL, EMPLOYEE_API_URL, COUNT_API_URL, get_api_headers
+from api_client import (
+    CHECKIN_FIELDS_JSON, LEAVE_FIELDS_JSON, EMPLOYEE_FIELDS_JSON, MEXICO_TZ, _parse_iso_datetime
+)
 from utils import normalize_leave_type
 
 logger = logging.getLogger(__name__)
 
+# Decoder used for response bodies
+_json_loads = orjson.loads if orjson is not None else json.loads
+
 
 @dataclass
 class AsyncAPIClientConfig:
@@ -28,6 +47,9 @@ class AsyncAPIClientConfig:
     page_length: int = 100
     max_retries: int = 3
     retry_delay: float = 1.0
+    max_inflight: Optional[int] = None  # Defaults to max_connections
+    limit_per_host: int = 0  # 0 means same as max_connections
+    keepalive_timeout: float = 75.0
 
 
 class AsyncAPIClient:
@@ -39,8 +61,16 @@ class AsyncAPIClient:
         self.checkin_url = API_URL
         self.leave_url = LEAVE_API_URL
         self.employee_url = EMPLOYEE_API_URL
+        self.count_url = COUNT_API_URL
         self.session: Optional[aiohttp.ClientSession] = None
         self.headers: Optional[Dict[str, str]] = None
+        self._resolver: Optional[aiohttp.abc.AbstractResolver] = None
+        self._request_semaphore: Optional[asyncio.Semaphore] = None
+        # Exponential backoff schedule, one entry per retry attempt
+        self._backoff = [
+            self.config.retry_delay * (2 ** attempt)
+            for attempt in range(self.config.max_retries + 1)
+        ]
 
     async def __aenter__(self):
         """Async context manager entry."""
@@ -59,10 +89,17 @@ class AsyncAPIClient:
             logger.error(f"Error validando credenciales API: {e}")
             raise
 
-        # Create optimized connector with connection pooling
+        # Every request goes to the same host: resolve it asynchronously with
+        # c-ares when aiodns is installed, and keep the answer in the DNS cache
+        self._resolver = aiohttp.AsyncResolver() if aiodns is not None else None
+
+        # Create optimized connector with connection pooling. All three
+        # endpoints live on the same host, so by default it gets the whole pool
         connector = aiohttp.TCPConnector(
+            resolver=self._resolver,
             limit=self.config.max_connections,
-            limit_per_host=self.config.max_connections // 2,
+            limit_per_host=self.config.limit_per_host or self.config.max_connections,
+            keepalive_timeout=self.config.keepalive_timeout,
             ttl_dns_cache=300,  # Cache DNS for 5 minutes
             use_dns_cache=True,
             enable_cleanup_closed=True,
@@ -82,6 +119,11 @@ class AsyncAPIClient:
             headers=self.headers
         )
 
+        # Caps requests in flight across all concurrent fetches of this client
+        self._request_semaphore = asyncio.Semaphore(
+            self.config.max_inflight or self.config.max_connections
+        )
+
         logger.debug(f"Async API client initialized with max_connections={self.config.max_connections}")
 
     async def close(self) -> None:
@@ -90,6 +132,9 @@ class AsyncAPIClient:
             await self.session.close()
             self.session = None
             logger.debug("Async API client session closed")
+        if self._resolver:
+            await self._resolver.close()
+            self._resolver = None
 
     async def _make_request_with_retry(
         self,
@@ -118,17 +163,22 @@ class AsyncAPIClient:
 
         for attempt in range(self.config.max_retries + 1):
             try:
-                async with self.session.request(method, url, params=params) as response:
-                    response.raise_for_status()
-                    data = await response.json()
-                    logger.debug(f"Request successful on attempt {attempt + 1}")
-                    return data
+                async with self._request_semaphore:
+                    async with self.session.request(method, url, params=params) as response:
+                        response.raise_for_status()
+                        # Decode straight from the body bytes: skips the intermediate
+                        # str copy that response.json() makes of every page
+                        data = _json_loads(await response.read())
+                logger.debug("Request successful on attempt %d", attempt + 1)
+                return data
 
             except (aiohttp.ClientError, asyncio.TimeoutError) as e:
                 last_exception = e
                 if attempt < self.config.max_retries:
-                    delay = self.config.retry_delay * (2 ** attempt)  # Exponential backoff
-                    logger.warning(f"Request failed (attempt {attempt + 1}), retrying in {delay}s: {e}")
+                    # Exponential backoff plus up to 50% jitter, so pages that fail
+                    # together do not retry in lockstep
+                    delay = self._backoff[attempt] * (1 + random.random() * 0.5)
+                    logger.warning("Request failed (attempt %d), retrying in %.2fs: %s", attempt + 1, delay, e)
                     await asyncio.sleep(delay)
                 else:
                     logger.error(f"Request failed after {self.config.max_retries + 1} attempts: {e}")
@@ -139,7 +189,8 @@ class AsyncAPIClient:
         self,
         start_date: str,
         end_date: str,
-        device_filter: str
+        device_filter: str,
+        as_string: bool = False
     ) -> List[Dict[str, Any]]:
         """
         Fetch all check-in records with optimized concurrent pagination.
@@ -148,9 +199,11 @@ class AsyncAPIClient:
             start_date: Start date in YYYY-MM-DD format
             end_date: End date in YYYY-MM-DD format
             device_filter: Device filter pattern (e.g., "%villas%")
+            as_string: Return "time" as ISO 8601 strings instead of datetimes
 
         Returns:
-            List of check-in records with normalized timezone
+            List of check-in records whose "time" is a timezone-aware
+            America/Mexico_City datetime (or ISO string if as_string)
         """
         logger.debug(f"Obteniendo check-ins asíncronos para dispositivo '{device_filter}'...")
 
@@ -159,56 +212,16 @@ class AsyncAPIClient:
             ["Employee Checkin", "device_id", "like", device_filter],
         ])
 
-        # First, get total count to optimize pagination strategy
-        initial_params = {
-            "fields": json.dumps(["employee", "employee_name", "time"]),
+        params = {
+            "fields": CHECKIN_FIELDS_JSON,
             "filters": filters,
-            "limit_start": 0,
-            "limit_page_length": 1,
         }
 
         try:
-            initial_data = await self._make_request_with_retry(self.checkin_url, initial_params)
-            total_records = len(initial_data.get("data", []))
-
-            if total_records == 0:
-                logger.info("No se encontraron registros de check-in")
-                return []
-
-            # Calculate optimal page size based on total records
-            optimal_page_size = min(self.config.page_length, max(50, total_records // 10))
-            total_pages = (total_records + optimal_page_size - 1) // optimal_page_size
-
-            logger.info(f"Se esperan {total_records} registros, usando {total_pages} páginas de {optimal_page_size} registros")
-
-            # Create tasks for concurrent page fetching
-            tasks = []
-            for page in range(total_pages):
-                limit_start = page * optimal_page_size
-                params = {
-                    "fields": json.dumps(["employee", "employee_name", "time"]),
-                    "filters": filters,
-                    "limit_start": limit_start,
-                    "limit_page_length": optimal_page_size,
-                }
-                task = self._fetch_and_process_page(self.checkin_url, params)
-                tasks.append(task)
-
-            # Execute all pages concurrently
-            page_results = await asyncio.gather(*tasks, return_exceptions=True)
-
-            # Process results and handle any exceptions
             all_records = []
-            for i, result in enumerate(page_results):
-                if isinstance(result, Exception):
-                    logger.error(f"Error fetching page {i + 1}: {result}")
-                    continue
-
-                page_data = result.get("data", [])
-                if page_data:
-                    # Normalize timezone for records
-                    normalized_records = self._normalize_timezones(page_data)
-                    all_records.extend(normalized_records)
+            async for page_data in self._paginate(self.checkin_url, params):
+                # Normalize timezone for records
+                all_records.extend(self._normalize_timezones(page_data, as_string=as_string))
 
             logger.info(f"Se obtuvieron {len(all_records)} registros de la API asíncrona.")
             return all_records
@@ -222,22 +235,141 @@ class AsyncAPIClient:
         data = await self._make_request_with_retry(url, params)
         return data
 
-    def _normalize_timezones(self, records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Normalize timezone from UTC to America/Mexico_City for a list of records."""
-        mexico_tz = pytz.timezone("America/Mexico_City")
-        normalized_records = []
+    async def _fetch_page(
+        self, url: str, params: Dict[str, Any], limit_start: int
+    ) -> List[Dict[str, Any]]:
+        """Fetch the page starting at limit_start and return its records."""
+        page_params = {
+            **params,
+            "limit_start": limit_start,
+            "limit_page_length": self.config.page_length,
+        }
+        result = await self._fetch_and_process_page(url, page_params)
+        return result.get("data", [])
+
+    async def _get_total(self, url: str, params: Dict[str, Any]) -> Optional[int]:
+        """
+        Ask the server how many records match params via frappe.client.get_count.
+
+        Makes a single attempt, like the sync client: a count that is forbidden or
+        fails only costs one request before falling back to open-ended pagination.
+
+        Args:
+            url: Resource URL (its last path segment is the doctype)
+            params: Base query parameters; only "filters" is used
 
-        for record in records:
+        Returns:
+            Number of matching records, or None if the count is unavailable
+        """
+        count_params = {"doctype": url.rsplit("/", 1)[-1]}
+        if "filters" in params:
+            count_params["filters"] = params["filters"]
+
+        try:
+            async with self._request_semaphore:
+                async with self.session.get(self.count_url, params=count_params) as response:
+                    response.raise_for_status()
+                    total = _json_loads(await response.read()).get("message")
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError, AttributeError) as e:
+            logger.debug(f"Could not get the record count: {e}")
+            return None
+
+        return total if isinstance(total, int) else None
+
+    async def _paginate(
+        self, url: str, params: Dict[str, Any]
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Yield every page of a resource in order.
+
+        The first page is requested alone; if it is full, the total is asked for
+        with frappe.client.get_count and exactly the remaining offsets are fetched
+        through a sliding window of up to max_connections requests. Each completed
+        page is yielded (so the caller can process it while the next ones
+        download) and replaced by the next offset. If the total is unavailable
+        the offsets run on until a short page is returned, and requests still
+        pending at that point are cancelled.
+
+        Raises:
+            aiohttp.ClientError: If a page cannot be fetched after all retries
+        """
+        page_length = self.config.page_length
+
+        first_page = await self._fetch_page(url, params, 0)
+        if first_page:
+            yield first_page
+        if len(first_page) < page_length:
+            return
+
+        total = await self._get_total(url, params)
+        offsets: Iterator[int] = (
+            iter(range(page_length, total, page_length))
+            if total is not None
+            else count(page_length, page_length)
+        )
+
+        pending: Deque[asyncio.Task] = deque()
+        try:
+            while True:
+                while len(pending) < self.config.max_connections:
+                    offset = next(offsets, None)
+                    if offset is None:
+                        break
+                    pending.append(
+                        asyncio.ensure_future(self._fetch_page(url, params, offset))
+                    )
+                if not pending:
+                    return
+
+                page_data = await pending.popleft()
+                if page_data:
+                    yield page_data
+                if len(page_data) < page_length:
+                    return
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def _normalize_timezones(
+        self, records: List[Dict[str, Any]], as_string: bool = False
+    ) -> List[Dict[str, Any]]:
+        """
+        Normalize timezone from UTC to America/Mexico_City for a list of records.
+
+        Aware timestamps are parsed and converted in one vectorized pandas call;
+        naive timestamps and values pandas cannot parse go through the
+        per-record path, which keeps the original value if it fails too.
+
+        Args:
+            records: Check-in records as returned by the API
+            as_string: Store ISO 8601 strings instead of timezone-aware datetimes,
+                as the sync api_client does
+        """
+        if not records:
+            return records
+
+        converted = None
+        try:
+            if _parse_iso_datetime(records[0]["time"]).tzinfo is not None:
+                converted = pd.to_datetime(
+                    pd.Series([record["time"] for record in records]),
+                    utc=True, errors="coerce", format="ISO8601"
+                ).dt.tz_convert(MEXICO_TZ)
+        except (ValueError, TypeError, AttributeError, KeyError):
+            converted = None
+
+        for index, record in enumerate(records):
+            if converted is not None and not pd.isna(converted.iat[index]):
+                timestamp = converted.iat[index]
+                record["time"] = timestamp.isoformat() if as_string else timestamp
+                continue
             try:
-                time_utc = datetime.fromisoformat(record["time"].replace("Z", "+00:00"))
-                time_mexico = time_utc.astimezone(mexico_tz)
-                record["time"] = time_mexico.isoformat()
-                normalized_records.append(record)
-            except (ValueError, TypeError) as e:
-                logger.warning(f"Error normalizando timezone para registro {record}: {e}")
-                normalized_records.append(record)  # Keep original if normalization fails
+                time_mexico = _parse_iso_datetime(record["time"]).astimezone(MEXICO_TZ)
+                record["time"] = time_mexico.isoformat() if as_string else time_mexico
+            except (ValueError, TypeError, AttributeError, KeyError) as e:
+                logger.warning("Error normalizando timezone para registro %r: %s", record, e)
 
-        return normalized_records
+        return records
 
     async def fetch_leave_applications_async(
         self,
@@ -256,60 +388,31 @@ class AsyncAPIClient:
         """
         logger.debug(f"Obteniendo solicitudes de permisos asíncronas para período {start_date} - {end_date}...")
 
-        # Construct the optimized URL
-        url = f'https://erp.asiatech.com.mx/api/resource/Leave Application?fields=["employee","employee_name","leave_type","from_date","to_date","status","half_day"]&filters=[["status","=","Approved"],["from_date",">=","{start_date}"],["to_date","<=","{end_date}"]]'
+        params = {
+            "fields": LEAVE_FIELDS_JSON,
+            "filters": json.dumps([
+                ["status", "=", "Approved"],
+                ["from_date", ">=", start_date],
+                ["to_date", "<=", end_date],
+            ]),
+        }
 
         try:
-            # First request to get total count
-            initial_params = {
-                "limit_start": 0,
-                "limit_page_length": 1,
-            }
-
-            initial_data = await self._make_request_with_retry(url, initial_params)
-            total_records = len(initial_data.get("data", []))
-
-            if total_records == 0:
-                logger.info("No se encontraron solicitudes de permiso")
-                return []
-
-            # For leave applications, use smaller page size as records are typically fewer
-            optimal_page_size = min(200, max(50, total_records // 5))
-            total_pages = (total_records + optimal_page_size - 1) // optimal_page_size
-
-            logger.info(f"Se esperan {total_records} solicitudes de permiso, usando {total_pages} páginas")
-
-            # Create tasks for concurrent page fetching
-            tasks = []
-            for page in range(total_pages):
-                limit_start = page * optimal_page_size
-                params = {
-                    "limit_start": limit_start,
-                    "limit_page_length": optimal_page_size,
-                }
-                task = self._fetch_and_process_page(url, params)
-                tasks.append(task)
-
-            # Execute all pages concurrently
-            page_results = await asyncio.gather(*tasks, return_exceptions=True)
-
-            # Process results
             all_leave_records = []
-            for i, result in enumerate(page_results):
-                if isinstance(result, Exception):
-                    logger.error(f"Error fetching leave applications page {i + 1}: {result}")
-                    continue
-
-                page_data = result.get("data", [])
+            async for page_data in self._paginate(self.leave_url, params):
                 all_leave_records.extend(page_data)
 
             logger.info(f"Se obtuvieron {len(all_leave_records)} solicitudes de permiso aprobadas de API asíncrona.")
 
-            if all_leave_records:
+            if all_leave_records and logger.isEnabledFor(logging.DEBUG):
                 logger.debug("Ejemplo de solicitudes de permiso recuperadas:")
-                for i, leave in enumerate(all_leave_records[:3]):
-                    half_day_info = f" (medio día)" if leave.get("half_day") == 1 else ""
-                    logger.debug(f"   - {leave['employee_name']}: {leave['leave_type']}{half_day_info} ({leave['from_date']} - {leave['to_date']})")
+                for leave in all_leave_records[:3]:
+                    half_day_info = " (medio día)" if leave.get("half_day") == 1 else ""
+                    logger.debug(
+                        "   - %s: %s%s (%s - %s)",
+                        leave['employee_name'], leave['leave_type'], half_day_info,
+                        leave['from_date'], leave['to_date'],
+                    )
 
             return all_leave_records
 
@@ -327,49 +430,12 @@ class AsyncAPIClient:
         logger.debug("Obteniendo fechas de contratación de empleados asíncronamente...")
 
         params = {
-            "fields": json.dumps(["employee", "date_of_joining"]),
-            "limit_start": 0,
-            "limit_page_length": 1,
+            "fields": EMPLOYEE_FIELDS_JSON,
         }
 
         try:
-            # First request to get total count
-            initial_data = await self._make_request_with_retry(self.employee_url, params)
-            total_records = len(initial_data.get("data", []))
-
-            if total_records == 0:
-                logger.info("No se encontraron registros de empleados")
-                return []
-
-            # Optimize page size for employee data
-            optimal_page_size = min(500, max(100, total_records // 5))
-            total_pages = (total_records + optimal_page_size - 1) // optimal_page_size
-
-            logger.info(f"Se esperan {total_records} registros de empleados, usando {total_pages} páginas")
-
-            # Create tasks for concurrent page fetching
-            tasks = []
-            for page in range(total_pages):
-                limit_start = page * optimal_page_size
-                params = {
-                    "fields": json.dumps(["employee", "date_of_joining"]),
-                    "limit_start": limit_start,
-                    "limit_page_length": optimal_page_size,
-                }
-                task = self._fetch_and_process_page(self.employee_url, params)
-                tasks.append(task)
-
-            # Execute all pages concurrently
-            page_results = await asyncio.gather(*tasks, return_exceptions=True)
-
-            # Process results
             all_records = []
-            for i, result in enumerate(page_results):
-                if isinstance(result, Exception):
-                    logger.error(f"Error fetching employee page {i + 1}: {result}")
-                    continue
-
-                page_data = result.get("data", [])
+            async for page_data in self._paginate(self.employee_url, params):
                 all_records.extend(page_data)
 
             logger.info(f"Se obtuvieron {len(all_records)} registros de empleados de API asíncrona.")
@@ -380,41 +446,133 @@ class AsyncAPIClient:
             return []
 
 
+# Client shared by every fetch running on the same event loop, so repeated
+# calls reuse its keep-alive connections instead of paying a new handshake
+_shared_client: Optional[AsyncAPIClient] = None
+_shared_client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+async def get_shared_client(config: Optional[AsyncAPIClientConfig] = None) -> AsyncAPIClient:
+    """
+    Return the process-wide AsyncAPIClient, creating it on first use.
+
+    The aiohttp session is bound to the event loop that created it, so the
+    client is rebuilt when called from a different loop or after it was closed.
+    ``config`` only applies when a new client is created.
+
+    Args:
+        config: Optional configuration for the async client
+
+    Returns:
+        Initialized AsyncAPIClient
+    """
+    global _shared_client, _shared_client_loop
+
+    loop = asyncio.get_running_loop()
+    if (
+        _shared_client is None
+        or _shared_client.session is None
+        or _shared_client.session.closed
+        or _shared_client_loop is not loop
+    ):
+        client = AsyncAPIClient(config)
+        await client._initialize_session()
+        _shared_client, _shared_client_loop = client, loop
+
+    return _shared_client
+
+
+async def close_shared_client() -> None:
+    """Close the process-wide AsyncAPIClient, if one is open."""
+    global _shared_client, _shared_client_loop
+
+    client, _shared_client, _shared_client_loop = _shared_client, None, None
+    if client is not None:
+        await client.close()
+
+
+def _close_shared_client_at_exit() -> None:
+    """Close the shared client on interpreter exit if its loop is still usable."""
+    loop = _shared_client_loop
+    if _shared_client is None or loop is None or loop.is_closed() or loop.is_running():
+        return
+    loop.run_until_complete(close_shared_client())
+
+
+atexit.register(_close_shared_client_at_exit)
+
+
 # Convenience function for simple usage
 async def fetch_all_data_async(
     start_date: str,
     end_date: str,
     device_filter: str,
-    config: Optional[AsyncAPIClientConfig] = None
+    config: Optional[AsyncAPIClientConfig] = None,
+    as_string: bool = False
 ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], List[Dict[str, Any]]]:
     """
     Convenience function to fetch all required data asynchronously.
 
+    Uses the shared client from get_shared_client(), so consecutive calls on
+    the same event loop keep their pooled connections.
+
     Args:
         start_date: Start date in YYYY-MM-DD format
         end_date: End date in YYYY-MM-DD format
         device_filter: Device filter pattern
-        config: Optional configuration for the async client
+        config: Optional configuration used if the shared client must be created
+        as_string: Return check-in times as ISO 8601 strings instead of datetimes
 
     Returns:
         Tuple of (checkins, leave_applications, employee_joining_dates)
     """
-    async with AsyncAPIClient(config) as client:
-        # Execute all three requests concurrently
-        tasks = [
-            client.fetch_checkins_paginated(start_date, end_date, device_filter),
-            client.fetch_leave_applications_async(start_date, end_date),
-            client.fetch_employee_joining_dates_async()
-        ]
+    client = await get_shared_client(config)
+
+    # Execute all three requests concurrently
+    tasks = [
+        client.fetch_checkins_paginated(start_date, end_date, device_filter, as_string),
+        client.fetch_leave_applications_async(start_date, end_date),
+        client.fetch_employee_joining_dates_async()
+    ]
+
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+
+    # Handle exceptions and return results
+    checkins = results[0] if not isinstance(results[0], Exception) else []
+    leave_applications = results[1] if not isinstance(results[1], Exception) else []
+    employee_joining_dates = results[2] if not isinstance(results[2], Exception) else []
+
+    if any(isinstance(result, Exception) for result in results):
+        logger.error("Some async requests failed, returning partial results")
 
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+    return checkins, leave_applications, employee_joining_dates
+
+
+def fetch_all_data(
+    start_date: str,
+    end_date: str,
+    device_filter: str,
+    config: Optional[AsyncAPIClientConfig] = None,
+    as_string: bool = False
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Synchronous wrapper around fetch_all_data_async for non-async call sites.
 
-        # Handle exceptions and return results
-        checkins = results[0] if not isinstance(results[0], Exception) else []
-        leave_applications = results[1] if not isinstance(results[1], Exception) else []
-        employee_joining_dates = results[2] if not isinstance(results[2], Exception) else []
+    Args:
+        start_date: Start date in YYYY-MM-DD format
+        end_date: End date in YYYY-MM-DD format
+        device_filter: Device filter pattern
+        config: Optional configuration for the async client
+        as_string: Return check-in times as ISO 8601 strings instead of datetimes
 
-        if any(isinstance(result, Exception) for result in results):
-            logger.error("Some async requests failed, returning partial results")
+    Returns:
+        Tuple of (checkins, leave_applications, employee_joining_dates)
+    """
+    async def _run() -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], List[Dict[str, Any]]]:
+        # asyncio.run closes its loop on return, which would orphan the shared session
+        try:
+            return await fetch_all_data_async(start_date, end_date, device_filter, config, as_string)
+        finally:
+            await close_shared_client()
 
-        return checkins, leave_applications, employee_joining_dates
\ No newline at end of file
+    return asyncio.run(_run())
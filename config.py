@@ -4,7 +4,25 @@ Contains all constants, settings, and configuration variables.
 """
 
 import os
+import io
+import atexit
+import signal
 import logging
+import threading
+import faulthandler
+import multiprocessing
+from contextlib import contextmanager
+from datetime import timedelta
+from functools import lru_cache
+from types import MappingProxyType
+from logging.handlers import (
+    MemoryHandler,
+    QueueHandler,
+    QueueListener,
+    RotatingFileHandler,
+    SocketHandler,
+)
+from queue import SimpleQueue
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -18,37 +36,204 @@ load_dotenv()
 LOG_FILE = "attendance_report.log"
 LOG_LEVEL_CONSOLE = logging.INFO
 LOG_LEVEL_FILE = logging.DEBUG
+# Records buffered before the log file is written; ERROR and above flush at once
+LOG_FILE_BUFFER_CAPACITY = 1024
+# Size at which the log file is rotated, and how many old files are kept
+LOG_FILE_MAX_BYTES = 10 * 1024 * 1024
+LOG_FILE_BACKUP_COUNT = 5
+# Where detailed records go: "file" (LOG_FILE) or "socket", which sends pickled
+# records to a collector listening on the Unix socket LOG_SOCKET_PATH
+LOG_SINK = os.getenv("LOG_SINK", "file").strip().lower()
+LOG_SOCKET_PATH = os.getenv("LOG_SOCKET_PATH", "/var/run/attendance.sock")
+
+class _ConsoleHandler(logging.StreamHandler):
+    """
+    Console handler that writes "LEVEL - message" without a Formatter.
+
+    Records arrive through the QueueHandler, which has already merged args and
+    any traceback into the message, so the console line needs no formatting pass.
+    """
+
+    def emit(self, record):
+        try:
+            self.stream.write(f"{record.levelname} - {record.getMessage()}{self.terminator}")
+            self.flush()
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+
+
+# Background listener that owns the console and file handlers
+_log_listener = None
+_setup_lock = threading.Lock()
+
+
+def _stop_log_listener():
+    """Stop the background log listener, flushing queued records and closing its handlers."""
+    global _log_listener
+    if _log_listener is not None:
+        _log_listener.stop()
+        for handler in _log_listener.handlers:
+            target = getattr(handler, "target", None)
+            handler.close()
+            if target is not None:
+                target.close()
+        _log_listener = None
+
+
+atexit.register(_stop_log_listener)
+
+# SIGTERM handler that was installed before ours, chained after flushing
+_previous_sigterm_handler = None
+_sigterm_handler_installed = False
+
+
+def _flush_logs_on_sigterm(signum, frame):
+    """Flush buffered log records, then defer to the previous SIGTERM behaviour."""
+    _stop_log_listener()
+    if callable(_previous_sigterm_handler):
+        _previous_sigterm_handler(signum, frame)
+    elif _previous_sigterm_handler != signal.SIG_IGN:
+        raise SystemExit(128 + signum)
+
+
+def install_crash_flush_hooks():
+    """
+    Make buffered logging safe against termination.
+
+    atexit already stops the listener on a normal exit; this covers SIGTERM
+    (which would otherwise kill the process without running atexit) and
+    enables faulthandler so hard crashes still print a traceback.
+
+    Both are process-wide, so setup_logging leaves them alone: only the
+    application entry points (main.py, gui_pyqt6.py) call this.
+    """
+    global _previous_sigterm_handler, _sigterm_handler_installed
+
+    if not faulthandler.is_enabled():
+        try:
+            faulthandler.enable()
+        except (AttributeError, ValueError, io.UnsupportedOperation):
+            # stderr has no usable file descriptor (e.g. a windowed GUI build)
+            pass
+
+    # Signal handlers can only be installed from the main thread
+    if _sigterm_handler_installed or threading.current_thread() is not threading.main_thread():
+        return
+    _previous_sigterm_handler = signal.getsignal(signal.SIGTERM)
+    signal.signal(signal.SIGTERM, _flush_logs_on_sigterm)
+    _sigterm_handler_installed = True
+
 
 # Configure logging
-def setup_logging():
-    """Configure the logging system for the attendance reporting application."""
+def setup_logging(force=False):
+    """
+    Configure the logging system for the attendance reporting application.
+
+    The root logger only enqueues records; a QueueListener thread writes them
+    to the console and the log file, so callers (including code on the asyncio
+    event loop) never block on log I/O. The message itself is still merged with
+    its args in the caller when the record is enqueued. File records are buffered
+    and written LOG_FILE_BUFFER_CAPACITY at a time, or as soon as an ERROR
+    arrives; the buffer is flushed when the listener stops.
+
+    Calling it again is a no-op while logging is configured, so every entry
+    point can call it safely; pass force=True to rebuild the handlers.
+    """
+    with _setup_lock:
+        if _log_listener is not None and not force:
+            return logging.getLogger()
+        return _configure_logging()
+
+
+def _configure_logging():
+    """Build the root logger's queue handler and the listener behind it."""
+    global _log_listener
+
     # Create logger
     logger = logging.getLogger()
     logger.setLevel(logging.DEBUG)
 
     # Clear any existing handlers
+    _stop_log_listener()
     logger.handlers.clear()
 
     # Create formatters
-    console_formatter = logging.Formatter('%(levelname)s - %(message)s')
     file_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 
     # Console handler
-    console_handler = logging.StreamHandler()
+    console_handler = _ConsoleHandler()
     console_handler.setLevel(LOG_LEVEL_CONSOLE)
-    console_handler.setFormatter(console_formatter)
 
-    # File handler
-    file_handler = logging.FileHandler(LOG_FILE, encoding='utf-8')
-    file_handler.setLevel(LOG_LEVEL_FILE)
-    file_handler.setFormatter(file_formatter)
+    if LOG_SINK == "socket":
+        # The collector formats and stores the records; nothing touches local disk
+        detail_handler = SocketHandler(LOG_SOCKET_PATH, None)
+    else:
+        # Rotating file handler, opened on first write and fed in batches by a memory buffer
+        file_handler = RotatingFileHandler(
+            LOG_FILE,
+            maxBytes=LOG_FILE_MAX_BYTES,
+            backupCount=LOG_FILE_BACKUP_COUNT,
+            encoding='utf-8',
+            delay=True,
+        )
+        file_handler.setLevel(LOG_LEVEL_FILE)
+        file_handler.setFormatter(file_formatter)
+        detail_handler = MemoryHandler(
+            LOG_FILE_BUFFER_CAPACITY, flushLevel=logging.ERROR, target=file_handler
+        )
+    detail_handler.setLevel(LOG_LEVEL_FILE)
 
-    # Add handlers to logger
-    logger.addHandler(console_handler)
-    logger.addHandler(file_handler)
+    # Route records through a queue to the handlers
+    log_queue = SimpleQueue()
+    logger.addHandler(QueueHandler(log_queue))
+    _log_listener = QueueListener(
+        log_queue, console_handler, detail_handler, respect_handler_level=True
+    )
+    _log_listener.start()
 
     return logger
 
+
+class _ForwardToLoggers(logging.Handler):
+    """Re-emits records received from worker processes through this process's loggers."""
+
+    def emit(self, record):
+        logging.getLogger(record.name).handle(record)
+
+
+def _init_worker_logging(log_queue, level):
+    """
+    Process pool initializer: send every record to the parent through log_queue.
+
+    Under fork the worker inherits the parent's QueueHandler, but not the
+    listener thread that drains it, so its records would be lost.
+    """
+    root = logging.getLogger()
+    root.handlers.clear()
+    root.addHandler(QueueHandler(log_queue))
+    root.setLevel(level)
+
+
+@contextmanager
+def worker_logging():
+    """
+    Forward the log records of worker processes to this process's handlers.
+
+    Yields the (initializer, initargs) pair to pass to ProcessPoolExecutor. Shut
+    the executor down before leaving the block so no worker record is dropped.
+    """
+    log_queue = multiprocessing.Queue()
+    listener = QueueListener(log_queue, _ForwardToLoggers())
+    listener.start()
+    try:
+        yield _init_worker_logging, (log_queue, logging.getLogger().getEffectiveLevel())
+    finally:
+        listener.stop()
+        log_queue.close()
+        log_queue.join_thread()
+
 # ==============================================================================
 # API CONFIGURATION
 # ==============================================================================
@@ -59,6 +244,21 @@ API_SECRET = os.getenv("ASIATECH_API_SECRET")
 API_URL = "https://erp.asiatech.com.mx/api/resource/Employee Checkin"
 LEAVE_API_URL = "https://erp.asiatech.com.mx/api/resource/Leave Application"
 EMPLOYEE_API_URL = "https://erp.asiatech.com.mx/api/resource/Employee"
+COUNT_API_URL = "https://erp.asiatech.com.mx/api/method/frappe.client.get_count"
+
+# Records requested per page from the Frappe list API. Pagination stops at the
+# first short page, so this must not exceed the server's own page cap; if the
+# server enforces a lower limit, set PAGE_LENGTH to that value (or narrow the
+# date range per request) instead of raising it.
+PAGE_LENGTH = int(os.getenv("PAGE_LENGTH", "500"))
+
+# ==============================================================================
+# PROCESSING CONFIGURATION
+# ==============================================================================
+
+# Worker processes for the per-employee midnight and tardiness steps. Employees
+# are split into this many chunks; 1 keeps everything in the current process.
+PROCESS_WORKERS = int(os.getenv("PROCESS_WORKERS", "1"))
 
 # ==============================================================================
 # LEAVE POLICY CONFIGURATION
@@ -75,25 +275,13 @@ POLITICA_PERMISOS = {
     # "permiso médico": "prorratear",
 }
 
+# Actions a leave policy can take on expected hours
+ACCIONES_PERMISO = frozenset({"no_ajustar", "ajustar_a_cero", "prorratear"})
+
 # ==============================================================================
 # BUSINESS RULES CONFIGURATION
 # ==============================================================================
 
-# Tardiness forgiveness rule configuration
-PERDONAR_TAMBIEN_FALTA_INJUSTIFICADA = False
-
-# Early departure detection configuration
-TOLERANCIA_SALIDA_ANTICIPADA_MINUTOS = 15
-
-# Tardiness and absence thresholds (in minutes)
-TOLERANCIA_RETARDO_MINUTOS = 15
-UMBRAL_FALTA_INJUSTIFICADA_MINUTOS = 60
-
-# Midnight crossing shift grace period (in minutes)
-# For shifts that cross midnight (e.g., 18:00 → 02:00), any check-in within this
-# grace period after the scheduled exit time will be assigned to the previous day's shift
-# instead of the next calendar day. Default: 59 minutes (covers the entire hour)
-GRACE_MINUTES = 59
 class BusinessRules:
     """Centralized business rules configuration for attendance processing."""
     
@@ -125,6 +313,44 @@ class BusinessRules:
     MAX_CLOCK_IN_DIFFERENCE_MINUTES = 12 * 60  # Maximum reasonable time between consecutive check-ins
     MIN_CLOCK_IN_INTERVAL_MINUTES = 1  # Minimum time between consecutive check-ins
     
+    # Expected type and minimum value of each rule, checked before the
+    # cross-field validations below
+    _SCHEMA = {
+        "PERDONAR_TAMBIEN_FALTA_INJUSTIFICADA": (bool, None),
+        "TOLERANCIA_SALIDA_ANTICIPADA_MINUTOS": (int, 0),
+        "TOLERANCIA_RETARDO_MINUTOS": (int, 0),
+        "UMBRAL_FALTA_INJUSTIFICADA_MINUTOS": (int, 0),
+        "GRACE_MINUTES": (int, 0),
+        "MIN_CHECKINS_FOR_BREAK": (int, 0),
+        "DEFAULT_BREAK_DEDUCTION": ((int, float), 0),
+        "MIN_WORK_HOURS_FOR_FORGIVENESS": ((int, float), 0),
+        "MAX_WORKED_HOURS_PER_DAY": ((int, float), 0),
+        "MAX_CLOCK_IN_DIFFERENCE_MINUTES": (int, 0),
+        "MIN_CLOCK_IN_INTERVAL_MINUTES": (int, 0),
+    }
+
+    @classmethod
+    def validate_schema(cls) -> None:
+        """Validate the type and lower bound of every rule in _SCHEMA."""
+        for name, (expected_type, minimum) in cls._SCHEMA.items():
+            value = getattr(cls, name)
+            # bool is a subclass of int; only accept it where a bool is expected
+            if not isinstance(value, expected_type) or (
+                isinstance(value, bool) and expected_type is not bool
+            ):
+                raise ValueError(f"{name} has invalid type {type(value).__name__}")
+            if minimum is not None and value < minimum:
+                raise ValueError(f"{name} must be >= {minimum}")
+
+    @classmethod
+    def validate_leave_policies(cls) -> None:
+        """Validate that every leave policy maps a normalized name to a known action."""
+        for leave_type, accion in POLITICA_PERMISOS.items():
+            if leave_type != leave_type.strip().lower():
+                raise ValueError(f"Leave type '{leave_type}' must be lowercase and stripped")
+            if accion not in ACCIONES_PERMISO:
+                raise ValueError(f"Unknown action '{accion}' for leave type '{leave_type}'")
+
     @classmethod
     def validate_tardiness_thresholds(cls) -> None:
         """Validate that tardiness thresholds are logically consistent."""
@@ -146,9 +372,27 @@ class BusinessRules:
     @classmethod
     def validate_all(cls) -> None:
         """Validate all business rule configurations."""
+        cls.validate_schema()
+        cls.validate_leave_policies()
         cls.validate_tardiness_thresholds()
         cls.validate_grace_period()
 
+
+# Fail fast on inconsistent thresholds: validate once when the module is imported
+# instead of leaving it to callers mid-batch
+BusinessRules.validate_all()
+
+# Module-level names for the rules read by the processing code. They are taken
+# from BusinessRules so both spellings always hold the same validated values.
+PERDONAR_TAMBIEN_FALTA_INJUSTIFICADA = BusinessRules.PERDONAR_TAMBIEN_FALTA_INJUSTIFICADA
+TOLERANCIA_SALIDA_ANTICIPADA_MINUTOS = BusinessRules.TOLERANCIA_SALIDA_ANTICIPADA_MINUTOS
+TOLERANCIA_RETARDO_MINUTOS = BusinessRules.TOLERANCIA_RETARDO_MINUTOS
+UMBRAL_FALTA_INJUSTIFICADA_MINUTOS = BusinessRules.UMBRAL_FALTA_INJUSTIFICADA_MINUTOS
+GRACE_MINUTES = BusinessRules.GRACE_MINUTES
+
+# Same grace period as a timedelta, built once for the per-row comparisons
+GRACE_DELTA = timedelta(minutes=GRACE_MINUTES)
+
 # ==============================================================================
 # REPORT CONFIGURATION
 # ==============================================================================
@@ -172,19 +416,33 @@ DIAS_ESPANOL = {
     "Sunday": "Domingo",
 }
 
+# Same names indexed by datetime.weekday() (Monday=0), for lookups without
+# formatting the English day name first
+DIAS_ESPANOL_BY_IDX = tuple(
+    DIAS_ESPANOL[day]
+    for day in ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday")
+)
+
 # ==============================================================================
 # VALIDATION FUNCTIONS
 # ==============================================================================
 
 def validate_api_credentials():
     """Validate that required API credentials are present."""
-    if not all([API_KEY, API_SECRET]):
+    if not (API_KEY and API_SECRET):
         raise ValueError(
             "Missing API credentials (ASIATECH_API_KEY, ASIATECH_API_SECRET) in .env file"
         )
     return True
 
+@lru_cache(maxsize=1)
 def get_api_headers():
-    """Get API headers with authentication."""
+    """
+    Get API headers with authentication.
+
+    The headers are built once and shared by every caller, so they are returned
+    as a read-only mapping. Call get_api_headers.cache_clear() after changing
+    the credentials.
+    """
     validate_api_credentials()
-    return {"Authorization": f"token {API_KEY}:{API_SECRET}"}
\ No newline at end of file
+    return MappingProxyType({"Authorization": f"token {API_KEY}:{API_SECRET}"})
@@ -6,6 +6,7 @@ Contains all core business logic for processing check-ins, schedules, and genera
 import pandas as pd
 import numpy as np
 import logging
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta, time, date
 from itertools import product
 from typing import Dict, List, Any, Optional, Union, Tuple
@@ -15,16 +16,201 @@ from config import (
     POLITICA_PERMISOS,
     PERDONAR_TAMBIEN_FALTA_INJUSTIFICADA,
     TOLERANCIA_SALIDA_ANTICIPADA_MINUTOS,
-    TOLERANCIA_RETARDO_MINUTOS,
-    UMBRAL_FALTA_INJUSTIFICADA_MINUTOS,
-    DIAS_ESPANOL,
-    GRACE_MINUTES,
+    DIAS_ESPANOL_BY_IDX,
+    GRACE_DELTA,
+    PROCESS_WORKERS,
+    worker_logging,
+)
+from utils import (
+    td_to_str,
+    safe_timedelta_series,
+    classify_tardiness,
+    TIPOS_RETARDO,
+    seconds_of_day,
+    seconds_to_hms,
 )
-from utils import td_to_str, safe_timedelta
 from db_postgres_connection import obtener_horario_empleado
 
 logger = logging.getLogger(__name__)
 
+# Check-in values the vectorized paths parse directly; anything else goes
+# through the per-row helpers
+_PATRON_HMS = r"^(\d{2}):(\d{2}):(\d{2})$"
+# Night-shift schedules are only honoured in "HH:MM" form
+_PATRON_HM = r"^(\d{1,2}):(\d{1,2})$"
+# Scheduled times come from the database as "HH:MM" or "HH:MM:SS"
+_PATRON_HORA_PROGRAMADA = r"^(\d{1,2}):(\d{1,2})(?::(\d{1,2}))?$"
+# Value of a missing or unparsable check-in in the int32 check-in matrix
+_SIN_CHECADA = -1
+
+
+def _es_primera_quincena(dias: pd.Series) -> np.ndarray:
+    """Returns True for days 1-15 of the month; missing days count as False."""
+    return (pd.to_datetime(dias).dt.day <= 15).to_numpy()
+
+
+def _columnas_checado(columns) -> List[str]:
+    """Returns the checado_N columns ordered by N."""
+    return sorted(
+        (col for col in columns if str(col).startswith("checado_") and str(col)[8:].isdigit()),
+        key=lambda col: int(col[8:]),
+    )
+
+
+def _horas_a_segundos(serie: pd.Series, patron: str = _PATRON_HMS) -> np.ndarray:
+    """
+    Parses a column of clock times into seconds since midnight.
+
+    Args:
+        serie: Column with time strings
+        patron: Regex with hour, minute and optional second groups
+
+    Returns:
+        Float array with NaN for missing or unparsable values
+    """
+    partes = serie.astype("string").str.extract(patron).astype(float).to_numpy()
+    horas, minutos = partes[:, 0], partes[:, 1]
+    segs = partes[:, 2] if partes.shape[1] > 2 else np.zeros(len(partes))
+    segs = np.where(np.isnan(segs) & ~np.isnan(horas), 0, segs)
+    valido = (horas <= 23) & (minutos <= 59) & (segs <= 59)
+    return np.where(valido, horas * 3600 + minutos * 60 + segs, np.nan)
+
+
+def _checados_a_segundos(checados: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Parses "HH:MM:SS" check-in columns into a 2-D array of seconds since midnight.
+
+    Args:
+        checados: DataFrame with only the checado_N columns, in order
+
+    Returns:
+        Tuple of (float array with NaN for missing/"---" values, boolean mask of
+        rows holding a value in any other format, which need the per-row path)
+    """
+    segundos = np.full(checados.shape, np.nan)
+    irregular = np.zeros(len(checados), dtype=bool)
+
+    for j, columna in enumerate(checados.columns):
+        serie = checados[columna]
+        ausente = (serie.isna() | serie.eq("---")).to_numpy()
+        segundos[:, j] = _horas_a_segundos(serie)
+        irregular |= ~ausente & np.isnan(segundos[:, j])
+
+    return segundos, irregular
+
+
+def _matriz_checados(df: pd.DataFrame) -> Tuple[List[str], np.ndarray, np.ndarray]:
+    """
+    Parses the checado_N columns of df once into an int32 seconds-of-day matrix.
+
+    Built by procesar_turnos_y_retardos and passed to both the early-departure
+    and the break passes, so one report parses its check-ins only once.
+
+    Args:
+        df: DataFrame with checado_N columns
+
+    Returns:
+        Tuple of (ordered checado columns, int32 matrix with _SIN_CHECADA for
+        missing or unparsable values, mask of rows holding values in another format)
+    """
+    columnas = _columnas_checado(df.columns)
+    segundos, irregular = _checados_a_segundos(df[columnas])
+    matriz = np.where(np.isnan(segundos), _SIN_CHECADA, segundos).astype(np.int32)
+    return columnas, matriz, irregular
+
+
+def _segundos_a_texto(segundos: np.ndarray) -> np.ndarray:
+    """
+    Formats durations in whole seconds as "HH:MM:SS" strings.
+
+    Values within one day use the seconds_to_hms lookup table; longer or
+    negative durations fall back to td_to_str.
+    """
+    texto = seconds_to_hms(np.clip(segundos, 0, 86399))
+    for posicion in np.flatnonzero((segundos < 0) | (segundos >= 86400)):
+        texto[posicion] = td_to_str(timedelta(seconds=int(segundos[posicion])))
+    return texto
+
+
+def _timedelta_a_texto(duraciones: pd.Series) -> np.ndarray:
+    """
+    Formats a timedelta Series the way str(timedelta).split()[-1] does,
+    keeping only the clock part ("HH:MM:SS[.ffffff]").
+    """
+    return duraciones.astype(str).str.split().str[-1].to_numpy()
+
+
+def _segundos_descanso(segundos: np.ndarray) -> np.ndarray:
+    """
+    Vectorized version of AttendanceProcessor.calcular_horas_descanso.
+
+    For every row, valid check-ins are packed left in their original order and
+    the middle pairs (2-3, 4-5, ...) are summed, skipping pairs that repeat the
+    entry/exit value, wrapping negative intervals past midnight and ignoring
+    intervals of 5 minutes or less. Rows with fewer than 4 check-ins get 0.
+
+    Args:
+        segundos: int32 matrix from _matriz_checados, _SIN_CHECADA where missing
+
+    Returns:
+        Array with the total break seconds per row
+    """
+    filas, columnas = segundos.shape
+    validos = segundos != _SIN_CHECADA
+    cantidad = validos.sum(axis=1)
+
+    # Stable sort on "is missing" keeps the valid values in column order
+    orden = np.argsort(~validos, axis=1, kind="stable")
+    empacados = np.take_along_axis(segundos, orden, axis=1)
+
+    primero = empacados[:, 0] if columnas else np.full(filas, _SIN_CHECADA)
+    ultimo = empacados[np.arange(filas), np.maximum(cantidad - 1, 0)] if columnas else primero
+
+    total = np.zeros(filas, dtype=np.int64)
+    for inicio_idx in range(1, columnas - 1, 2):
+        inicio = empacados[:, inicio_idx]
+        fin = empacados[:, inicio_idx + 1]
+        en_rango = inicio_idx + 1 <= cantidad - 1
+        toca_extremos = (
+            (inicio == primero) | (inicio == ultimo) | (fin == primero) | (fin == ultimo)
+        )
+        intervalo = fin - inicio
+        intervalo = np.where(intervalo < 0, intervalo + 86400, intervalo)
+        cuenta = en_rango & ~toca_extremos & (intervalo > 300)
+        total += np.where(cuenta, intervalo, 0)
+
+    total[cantidad < 4] = 0
+    return total
+
+
+def _retardos_acumulados(df: pd.DataFrame) -> pd.Series:
+    """
+    Running count of accumulable tardiness per employee.
+
+    The flags are int8; the count is widened to int16 first so long date
+    ranges cannot overflow it.
+    """
+    return df["es_retardo_acumulable"].astype("int16").groupby(df["employee"]).cumsum()
+
+
+def _descuento_por_3_retardos(df: pd.DataFrame) -> np.ndarray:
+    """
+    Marks every third accumulated tardiness per employee.
+
+    Args:
+        df: DataFrame with es_retardo_acumulable and retardos_acumulados
+
+    Returns:
+        Array with "Sí (3er retardo)" or "No" per row
+    """
+    acumulados = df["retardos_acumulados"].to_numpy()
+    tercer_retardo = (
+        (df["es_retardo_acumulable"].to_numpy() == 1)
+        & (acumulados > 0)
+        & (acumulados % 3 == 0)
+    )
+    return np.where(tercer_retardo, "Sí (3er retardo)", "No").astype(object)
+
 
 class AttendanceProcessor:
     """Main class for processing attendance data and applying business rules."""
@@ -42,9 +228,10 @@ class AttendanceProcessor:
 
         # Create DataFrame with optimized dtype usage
         df = pd.DataFrame(checkin_data)
-        df["time"] = pd.to_datetime(df["time"])
+        df["time"] = pd.to_datetime(df["time"], format="ISO8601", cache=True)
         df["dia"] = df["time"].dt.date
-        df["checado_time"] = df["time"].dt.strftime("%H:%M:%S")
+        # Format through a seconds-of-day lookup instead of per-row strftime
+        df["checado_time"] = seconds_to_hms(seconds_of_day(df["time"]))
 
         # Optimized employee mapping using drop_duplicates with keep='first'
         employee_map = (
@@ -53,9 +240,12 @@ class AttendanceProcessor:
             .rename(columns={"employee_name": "Nombre"})
         )
 
+        # One grouper for the hours aggregation and the check-in pivot below
+        grupos = df.groupby(["employee", "dia"], observed=True)
+
         # Optimized duration calculation using named aggregation
         df_hours = (
-            df.groupby(["employee", "dia"], observed=True)
+            grupos
             .agg(
                 min_time=("time", "min"),
                 max_time=("time", "max")
@@ -70,46 +260,63 @@ class AttendanceProcessor:
             .apply(lambda x: td_to_str(x) if pd.notna(x) else "00:00:00")
         )
 
-        # Optimized pivot using crosstab for better performance
-        df["checado_rank"] = df.groupby(["employee", "dia"]).cumcount() + 1
-        df_pivot = pd.crosstab(
-            index=[df["employee"], df["dia"]],
-            columns=df["checado_rank"],
-            values=df["checado_time"],
-            aggfunc="first"
+        # Pivot by scattering each check-in into a (groups x rank) array: the
+        # group number and the position inside the group (in input order) are
+        # the row and column of its cell
+        codigo_grupo = grupos.ngroup().to_numpy(dtype=float)
+        rango = grupos.cumcount().to_numpy()
+        con_grupo = ~np.isnan(codigo_grupo)
+        claves = grupos.size().index
+        columnas_pivot = int(rango[con_grupo].max()) + 1 if con_grupo.any() else 0
+
+        celdas = np.full((len(claves), columnas_pivot), np.nan, dtype=object)
+        celdas[codigo_grupo[con_grupo].astype(np.intp), rango[con_grupo]] = (
+            df["checado_time"].to_numpy()[con_grupo]
+        )
+        df_pivot = pd.DataFrame(
+            celdas,
+            index=claves,
+            columns=[f"checado_{i}" for i in range(1, columnas_pivot + 1)],
         )
-
-        if not df_pivot.empty:
-            df_pivot.columns = [f"checado_{i}" for i in range(1, len(df_pivot.columns) + 1)]
 
         # Use more efficient Cartesian product approach
         all_employees = df["employee"].unique()
-        all_dates = pd.date_range(start=start_date, end=end_date).date
+        rango_fechas = pd.date_range(start=start_date, end=end_date)
+        all_dates = rango_fechas.date
 
-        # Create base DataFrame using multi_index for better performance
+        # Join everything on the (employee, dia) index of the base grid instead of
+        # merging on columns, which re-hashes the keys for every merge. The
+        # weekday of each grid row comes from the date range instead of
+        # re-parsing the dia column, and travels through the joins as a column
         base_index = pd.MultiIndex.from_product([all_employees, all_dates], names=["employee", "dia"])
-        base_df = pd.DataFrame(index=base_index).reset_index()
-
-        # Optimized merges with better data type handling
-        daily_df = base_df.merge(df_pivot.reset_index(), on=["employee", "dia"], how="left")
-        final_df = daily_df.merge(employee_map, on="employee", how="left")
-
-        # Convert dia to date type once for efficient merging
-        df_hours["dia"] = pd.to_datetime(df_hours["dia"]).dt.date
-        final_df = final_df.merge(
-            df_hours[["employee", "dia", "duration", "horas_trabajadas"]],
-            on=["employee", "dia"],
-            how="left",
+        final_df = (
+            pd.DataFrame(
+                {"_weekday": np.tile(rango_fechas.weekday.to_numpy(), len(all_employees))},
+                index=base_index,
+            )
+            .join(df_pivot)
+            .reset_index()
+            .join(employee_map.set_index("employee"), on="employee")
+            .join(
+                df_hours.set_index(["employee", "dia"])[["duration", "horas_trabajadas"]],
+                on=["employee", "dia"],
+            )
         )
+        # An employee listed under two names gets one row per name, as with merge
+        final_df.index = pd.RangeIndex(len(final_df))
 
         # Optimized day calculations using vectorized operations
-        dias_datetime = pd.to_datetime(final_df["dia"])
-        final_df["dia_semana"] = dias_datetime.dt.day_name().map(DIAS_ESPANOL)
-        final_df["dia_iso"] = dias_datetime.dt.weekday + 1
+        weekdays = final_df.pop("_weekday").to_numpy()
+        final_df["dia_semana"] = np.take(np.array(DIAS_ESPANOL_BY_IDX, dtype=object), weekdays)
+        final_df["dia_iso"] = weekdays + 1
 
         return final_df
 
-    def calcular_horas_descanso(self, df_dia: Union[pd.DataFrame, pd.Series]) -> timedelta:
+    def calcular_horas_descanso(
+        self,
+        df_dia: Union[pd.DataFrame, pd.Series],
+        checado_columns: Optional[List[str]] = None,
+    ) -> timedelta:
         """
         Calculates break hours based on check-ins for the day.
         Only calculates break if there are 4+ check-ins and the break times 
@@ -117,6 +324,8 @@ class AttendanceProcessor:
         
         Args:
             df_dia: DataFrame or Series containing check-in data for a single day
+            checado_columns: Ordered checado_N columns, when the caller already
+                knows them; otherwise they are looked up on df_dia
             
         Returns:
             Calculated break time as timedelta
@@ -124,20 +333,18 @@ class AttendanceProcessor:
         if df_dia is None:
             return timedelta(0)
 
-        # Determine which columns store the check-in records
-        if isinstance(df_dia, pd.DataFrame):
-            if df_dia.empty:
-                return timedelta(0)
-            checado_columns = [col for col in df_dia.columns if col.startswith("checado_")]
-        else:
-            checado_columns = [col for col in df_dia.index if str(col).startswith("checado_")]
+        if isinstance(df_dia, pd.DataFrame) and df_dia.empty:
+            return timedelta(0)
+
+        # Determine which columns store the check-in records, ordered numerically
+        if checado_columns is None:
+            checado_columns = _columnas_checado(
+                df_dia.columns if isinstance(df_dia, pd.DataFrame) else df_dia.index
+            )
 
         if len(checado_columns) < 4:
             return timedelta(0)
 
-        # Order columns numerically (checado_1, checado_2, ...)
-        checado_columns.sort(key=lambda name: int(name.split("_")[1]))
-
         # Collect valid check-in times
         checkins: List[str] = []
         for column in checado_columns:
@@ -216,11 +423,19 @@ class AttendanceProcessor:
 
         return total_break
 
-    def aplicar_calculo_horas_descanso(self, df: pd.DataFrame) -> pd.DataFrame:
+    def aplicar_calculo_horas_descanso(
+        self,
+        df: pd.DataFrame,
+        checados: Optional[Tuple[List[str], np.ndarray, np.ndarray]] = None,
+    ) -> pd.DataFrame:
         """
         Applies break hours calculation to the entire DataFrame.
         NO adjustments are made to expected or worked hours - only calculates break time.
         Optimized for performance with vectorized operations.
+
+        Args:
+            df: DataFrame with checado_N columns
+            checados: Result of _matriz_checados for df's rows, parsed here when omitted
         """
         if df.empty:
             return df
@@ -241,26 +456,87 @@ class AttendanceProcessor:
         else:
             df["duration_td"] = pd.Timedelta(0)
 
-        # Vectorized break calculation - collect all checado columns first
-        checado_columns = [col for col in df.columns if col.startswith('checado_')]
+        # Vectorized break calculation over all checado columns at once
+        checado_columns = _columnas_checado(df.columns)
 
-        # Process rows where break calculation might apply (4+ check-ins)
-        mask_potential_break = df[checado_columns].notna().sum(axis=1) >= 4
+        if len(checado_columns) >= 4:
+            _, segundos, irregular = checados if checados is not None else _matriz_checados(df)
+            segundos_descanso = _segundos_descanso(segundos)
 
-        if mask_potential_break.any():
-            # Apply vectorized break calculation to relevant rows only
-            for idx in df[mask_potential_break].index:
-                row = df.loc[idx]
-                horas_descanso_td = self.calcular_horas_descanso(row)
+            # Rows with values in another format keep the per-row calculation
+            for posicion in np.flatnonzero(irregular):
+                segundos_descanso[posicion] = int(self.calcular_horas_descanso(
+                    df.iloc[posicion], checado_columns
+                ).total_seconds())
 
-                if horas_descanso_td > timedelta(0):
-                    df.at[idx, "horas_descanso_td"] = horas_descanso_td
-                    df.at[idx, "horas_descanso"] = td_to_str(horas_descanso_td)
+            df["horas_descanso_td"] = pd.to_timedelta(segundos_descanso, unit="s")
+            df["horas_descanso"] = _segundos_a_texto(segundos_descanso)
 
         total_dias_con_descanso = (df["horas_descanso_td"] > pd.Timedelta(0)).sum()
         logger.debug(f"Se calcularon horas de descanso para {total_dias_con_descanso} días")
         return df
 
+    def procesar_turnos_y_retardos(
+        self, df: pd.DataFrame, cache_horarios: Dict, max_workers: Optional[int] = None
+    ) -> pd.DataFrame:
+        """
+        Runs procesar_horarios_con_medianoche, analizar_asistencia_con_horarios_cache
+        and aplicar_calculo_horas_descanso.
+
+        The check-ins are parsed once, after the night shifts are regrouped, and
+        the same matrix is passed to the early-departure and the break passes.
+
+        All steps only relate rows of the same employee, so with more than one
+        worker the employees are split into contiguous chunks that are processed
+        in separate processes and concatenated back in (employee, dia) order.
+
+        Args:
+            df: DataFrame from process_checkins_to_dataframe
+            cache_horarios: Schedule cache by employee
+            max_workers: Worker processes, defaults to PROCESS_WORKERS
+
+        Returns:
+            DataFrame with night shifts regrouped, tardiness analysed and breaks calculated
+        """
+        max_workers = PROCESS_WORKERS if max_workers is None else max_workers
+        empleados = df["employee"].drop_duplicates().sort_values().to_numpy() if not df.empty else []
+        n_chunks = min(max_workers, len(empleados))
+
+        if n_chunks <= 1:
+            return self._procesar_turnos(df, cache_horarios)
+
+        chunks = [
+            df[df["employee"].isin(grupo)]
+            for grupo in np.array_split(empleados, n_chunks)
+        ]
+        logger.debug(
+            f"Procesando {len(empleados)} empleados en {n_chunks} procesos"
+        )
+        with worker_logging() as (initializer, initargs), ProcessPoolExecutor(
+            max_workers=n_chunks, initializer=initializer, initargs=initargs
+        ) as executor:
+            resultados = list(
+                executor.map(
+                    _procesar_turnos_chunk,
+                    chunks,
+                    [cache_horarios] * n_chunks,
+                )
+            )
+        return pd.concat(resultados, ignore_index=True)
+
+    def _procesar_turnos(self, df: pd.DataFrame, cache_horarios: Dict) -> pd.DataFrame:
+        """Sequential body of procesar_turnos_y_retardos for one group of employees."""
+        df = self.procesar_horarios_con_medianoche(df, cache_horarios)
+        if df.empty:
+            return df
+
+        # The analysis sorts by (employee, dia); sorting first lets the matrix
+        # built here line up with the rows it returns
+        df = df.sort_values(by=["employee", "dia"]).reset_index(drop=True)
+        checados = _matriz_checados(df)
+        df = self.analizar_asistencia_con_horarios_cache(df, cache_horarios, checados)
+        return self.aplicar_calculo_horas_descanso(df, checados)
+
     def procesar_horarios_con_medianoche(
         self, df: pd.DataFrame, cache_horarios: Dict
     ) -> pd.DataFrame:
@@ -287,174 +563,114 @@ class AttendanceProcessor:
         
         # Agregar columna es_primera_quincena si no existe
         if 'es_primera_quincena' not in df_proc.columns:
-            df_proc['es_primera_quincena'] = df_proc['dia'].apply(lambda x: x.day <= 15)
-        
-        # Función para mapear la fecha de turno correcta
-        def map_shift_date(checada_time, entrada, salida, cruza_medianoche, dia_original):
-            """
-            Adjust logic: treat times within grace window after salida as belonging to previous day.
-            """
-            if not cruza_medianoche:
-                return dia_original
-            try:
-                datetime.strptime(entrada, "%H:%M").time()
-                salida_time = datetime.strptime(salida, "%H:%M").time()
-                checada_time_obj = datetime.strptime(checada_time, "%H:%M:%S").time()
-                # Grace window after scheduled salida
-                limite_gracia = (datetime.combine(dia_original, salida_time) + timedelta(minutes=GRACE_MINUTES)).time()
-                # If checada is between salida and limite_gracia inclusive, assign to previous day
-                if salida_time <= checada_time_obj <= limite_gracia:
-                    return dia_original - timedelta(days=1)
-                else:
-                    return dia_original
-            except (ValueError, TypeError):
-                return dia_original
-            """
-            Mapea una hora de checada a la fecha de turno correcta.
-            
-            Args:
-                checada_time: Hora de la marca (ej: "18:04:00")
-                entrada: Hora de entrada programada (ej: "18:00")
-                salida: Hora de salida programada (ej: "02:00")
-                cruza_medianoche: Boolean indicando si el turno cruza medianoche
-                dia_original: Fecha original de la marca
-                
-            Returns:
-                Fecha del turno (datetime.date)
-            """
-            if not cruza_medianoche:
-                return dia_original
-                
-            # Para turnos que cruzan medianoche
-            try:
-                datetime.strptime(entrada, "%H:%M").time()
-                salida_time = datetime.strptime(salida, "%H:%M").time()
-                checada_time_obj = datetime.strptime(checada_time, "%H:%M:%S").time()
-                
-                # Lógica de ventana de gracia para turnos que cruzan medianoche
-                # Si la marca ocurre en la misma hora del horario de salida (p. ej. cualquier registro 
-                # entre 02:00:00 y 02:59:59 para salida 02:00) debe pertenecer al mismo día de turno 
-                # que la entrada, no al siguiente día de calendario.
-                datetime.combine(dia_original, salida_time)
-                limite_gracia = (datetime.combine(dia_original, salida_time) + 
-                                timedelta(minutes=GRACE_MINUTES)).time()
-                
-                # Si ts está después de medianoche pero <= salida + gracia → día anterior
-                if checada_time_obj <= limite_gracia:
-                    return dia_original - timedelta(days=1)
-                else:
-                    # La marca pertenece al turno que comenzó hoy
-                    return dia_original
-            except (ValueError, TypeError):
-                return dia_original
-        
-        # Función para detectar si un grupo de marcas solo contiene salidas
-        def is_only_checkout(marks, entrada_teorica, salida_teorica):
-            """
-            Determina si un grupo de marcas solo contiene registros de salida.
-            
-            Args:
-                marks: lista de timestamps ordenados
-                entrada_teorica: hora de entrada programada (time object)
-                salida_teorica: hora de salida programada (time object)
-                
-            Returns:
-                True si no hay marca >= entrada_teorica y < 23:59:59 del shift_date
-            """
-            try:
-                entrada_time = datetime.strptime(entrada_teorica, "%H:%M").time()
-                datetime.strptime(salida_teorica, "%H:%M").time()
-                
-                # Verificar si todas las marcas están antes de la hora de entrada programada
-                # o dentro de la ventana de gracia de la salida
-                for marca in marks:
-                    marca_time = datetime.strptime(marca, "%H:%M:%S").time()
-                    
-                    # Si hay una marca después de la entrada programada y antes de medianoche, no es solo salida
-                    if marca_time >= entrada_time and marca_time < time(23, 59, 59):
-                        return False
-                
-                # Si llegamos aquí, todas las marcas están antes de la entrada o en la ventana de gracia
-                return True
-            except (ValueError, TypeError):
-                return False
+            df_proc['es_primera_quincena'] = _es_primera_quincena(df_proc['dia'])
         
         # Procesar turnos nocturnos dia por dia
         marcas_list = []
         turnos_procesados = set()  # Para rastrear qué turnos fueron procesados
         
+        # Horarios por clave única (empleado, día, quincena) para el día de la fila y
+        # para el día anterior, que cubre marcas tardías en días sin horario programado
+        claves = pd.DataFrame({
+            'employee': df_proc['employee'].astype(str).to_numpy(),
+            'dia_iso': df_proc['dia_iso'].to_numpy(),
+            'es_primera_quincena': df_proc['es_primera_quincena'].to_numpy(),
+        })
+        dia_semana = pd.to_datetime(df_proc['dia']).dt.weekday.fillna(0).astype(int).to_numpy()
+        claves_anterior = claves.assign(dia_iso=(dia_semana - 1) % 7 + 1)
+        
+        horarios = {
+            clave: obtener_horario_empleado(*clave, cache_horarios)
+            for clave in pd.concat([claves, claves_anterior])
+            .drop_duplicates()
+            .itertuples(index=False, name=None)
+        }
+        horarios_df = pd.DataFrame.from_records(
+            [
+                (*clave, horario is not None and bool(horario), bool(horario and horario.get('cruza_medianoche', False)))
+                for clave, horario in horarios.items()
+            ],
+            columns=['employee', 'dia_iso', 'es_primera_quincena', 'tiene_horario', 'cruza'],
+        )
+        actual = claves.merge(horarios_df, on=list(claves.columns), how='left', sort=False)
+        anterior = claves_anterior.merge(horarios_df, on=list(claves.columns), how='left', sort=False)
+        
+        # Solo las filas con turno nocturno (del día actual o del anterior) se recorren
+        nocturno = np.where(
+            actual['tiene_horario'].to_numpy(dtype=bool),
+            actual['cruza'].to_numpy(dtype=bool),
+            anterior['cruza'].to_numpy(dtype=bool),
+        )
+        
         # Primero, identificar todos los empleados con turnos nocturnos y recolectar todas sus marcas por día
         empleados_turnos_nocturnos = {}
+        columnas_checado = [f'checado_{j}' for j in range(1, 10) if f'checado_{j}' in df_proc.columns]
+        filas_nocturnas = df_proc.loc[nocturno]
         
-        for index, row in df_proc.iterrows():
-            empleado = row['employee']
-            dia = row['dia']
-            
-            # Obtener horario del empleado para este día
-            horario = obtener_horario_empleado(
-                str(empleado),
-                row['dia_iso'],
-                row['es_primera_quincena'],
-                cache_horarios
-            )
-            
-            # Si no hay horario para este día, buscar en el día anterior
-            # para casos donde las marcas tardías caen en días sin horario programado
-            entrada = None
-            salida = None
-            cruza_medianoche = False
-            
+        # Segundos desde medianoche de cada marca; NaN si falta o no es HH:MM:SS
+        segundos_marcas, _ = _checados_a_segundos(filas_nocturnas[columnas_checado])
+        
+        for empleado, clave, clave_anterior, dia, segundos_fila, *marcas in zip(
+            filas_nocturnas['employee'],
+            claves.loc[nocturno].itertuples(index=False, name=None),
+            claves_anterior.loc[nocturno].itertuples(index=False, name=None),
+            filas_nocturnas['dia'],
+            segundos_marcas,
+            *(filas_nocturnas[col] for col in columnas_checado),
+        ):
+            horario = horarios[clave]
             if horario:
                 entrada = horario.get('hora_entrada')
                 salida = horario.get('hora_salida')
                 cruza_medianoche = horario.get('cruza_medianoche', False)
             else:
-                # Buscar horario del día anterior que pueda ser nocturno
-                dia_anterior = dia - timedelta(days=1)
-                dia_anterior_iso = dia_anterior.weekday() + 1
-                
-                horario_anterior = obtener_horario_empleado(
-                    str(empleado),
-                    dia_anterior_iso,
-                    row['es_primera_quincena'],
-                    cache_horarios
-                )
-                
-                if horario_anterior and horario_anterior.get('cruza_medianoche', False):
-                    entrada = horario_anterior.get('hora_entrada')
-                    salida = horario_anterior.get('hora_salida')
-                    cruza_medianoche = True
-            
-            # Solo procesar si hay un turno nocturno (ya sea del día actual o del anterior)
-            if not cruza_medianoche:
-                continue
+                horario_anterior = horarios[clave_anterior]
+                entrada = horario_anterior.get('hora_entrada')
+                salida = horario_anterior.get('hora_salida')
+                cruza_medianoche = True
             
             # Inicializar empleado si no existe
             if empleado not in empleados_turnos_nocturnos:
                 empleados_turnos_nocturnos[empleado] = {}
             
-            # Recolectar todas las marcas del día
-            checadas_dia = []
-            for j in range(1, 10):
-                col_checado = f'checado_{j}'
-                if col_checado in row and pd.notna(row[col_checado]):
-                    # Crear un horario simulado si es necesario
-                    horario_para_marca = horario or {
-                        'hora_entrada': entrada,
-                        'hora_salida': salida,
-                        'cruza_medianoche': cruza_medianoche,
-                        'horas_totales': 8.0
-                    }
-                    
-                    checadas_dia.append({
-                        'time': row[col_checado],
-                        'day': dia,
-                        'entrada_prog': entrada,
-                        'salida_prog': salida,
-                        'horario': horario_para_marca
-                    })
+            # Crear un horario simulado si es necesario
+            horario_para_marca = horario or {
+                'hora_entrada': entrada,
+                'hora_salida': salida,
+                'cruza_medianoche': cruza_medianoche,
+                'horas_totales': 8.0
+            }
             
-            empleados_turnos_nocturnos[empleado][dia] = checadas_dia
+            # Recolectar todas las marcas legibles del día
+            empleados_turnos_nocturnos[empleado][dia] = [
+                {
+                    'time': marca,
+                    'segundos': marca_segundos,
+                    'day': dia,
+                    'entrada_prog': entrada,
+                    'salida_prog': salida,
+                    'horario': horario_para_marca
+                }
+                for marca, marca_segundos in zip(marcas, segundos_fila)
+                if not np.isnan(marca_segundos)
+            ]
+        
+        # Horarios programados ("HH:MM") en segundos, una vez por valor distinto
+        horas_programadas = pd.Series(
+            list({
+                hora
+                for dias_marcas in empleados_turnos_nocturnos.values()
+                for marcas_dia in dias_marcas.values()
+                for marca_info in marcas_dia[:1]
+                for hora in (marca_info['horario'].get('hora_entrada'), marca_info['horario'].get('hora_salida'))
+                if isinstance(hora, str)
+            }),
+            dtype=object,
+        )
+        segundos_programados = dict(zip(
+            horas_programadas, _horas_a_segundos(horas_programadas, _PATRON_HM)
+        ))
+        gracia_segundos = GRACE_DELTA.total_seconds()
         
         # Ahora procesar cada empleado para determinar qué marcas pertenecen a qué turno
         for empleado, dias_marcas in empleados_turnos_nocturnos.items():
@@ -470,10 +686,9 @@ class AttendanceProcessor:
                 entrada = horario_actual.get('hora_entrada')
                 salida = horario_actual.get('hora_salida')
                 
-                try:
-                    entrada_time = datetime.strptime(entrada, "%H:%M").time()
-                    salida_time = datetime.strptime(salida, "%H:%M").time()
-                except (ValueError, TypeError):
+                entrada_seg = segundos_programados.get(entrada, np.nan)
+                salida_seg = segundos_programados.get(salida, np.nan)
+                if np.isnan(entrada_seg) or np.isnan(salida_seg):
                     continue
                 
                 # Separar marcas del día actual en entrada (antes de medianoche) y salida (después de medianoche)
@@ -481,17 +696,12 @@ class AttendanceProcessor:
                 marcas_salida_posibles = []  # Marcas tempranas que podrían ser salida del turno anterior
                 
                 for marca_info in marcas_dia:
-                    try:
-                        marca_time = datetime.strptime(marca_info['time'], "%H:%M:%S").time()
-                        
-                        # Si la marca es después de la hora de entrada programada, es entrada del turno actual
-                        if marca_time >= entrada_time:
-                            marcas_entrada.append(marca_info)
-                        else:
-                            # Marca temprana que podría ser salida del turno anterior
-                            marcas_salida_posibles.append(marca_info)
-                    except (ValueError, TypeError):
-                        continue
+                    # Si la marca es después de la hora de entrada programada, es entrada del turno actual
+                    if marca_info['segundos'] >= entrada_seg:
+                        marcas_entrada.append(marca_info)
+                    else:
+                        # Marca temprana que podría ser salida del turno anterior
+                        marcas_salida_posibles.append(marca_info)
                 
                 # Procesar marcas de entrada para el turno actual
                 for marca_info in marcas_entrada:
@@ -513,25 +723,21 @@ class AttendanceProcessor:
                     # Verificar si hay un turno nocturno el día anterior
                     if dia_anterior in dias_marcas:
                         # Buscar la marca más tardía dentro de la ventana de gracia como salida del turno anterior
-                        limite_gracia = (datetime.combine(datetime.now().date(), salida_time) + 
-                                       timedelta(minutes=GRACE_MINUTES)).time()
+                        # La ventana de gracia da la vuelta a medianoche como un reloj
+                        limite_gracia = (salida_seg + gracia_segundos) % 86400
                         
                         mejor_salida = None
                         marcas_restantes = []
                         
                         for marca_info in marcas_salida_posibles:
-                            try:
-                                marca_time = datetime.strptime(marca_info['time'], "%H:%M:%S").time()
-                                if marca_time <= limite_gracia:
-                                    if mejor_salida is None or marca_time > datetime.strptime(mejor_salida['time'], "%H:%M:%S").time():
-                                        if mejor_salida is not None:
-                                            marcas_restantes.append(mejor_salida)
-                                        mejor_salida = marca_info
-                                    else:
-                                        marcas_restantes.append(marca_info)
+                            if marca_info['segundos'] <= limite_gracia:
+                                if mejor_salida is None or marca_info['segundos'] > mejor_salida['segundos']:
+                                    if mejor_salida is not None:
+                                        marcas_restantes.append(mejor_salida)
+                                    mejor_salida = marca_info
                                 else:
                                     marcas_restantes.append(marca_info)
-                            except (ValueError, TypeError):
+                            else:
                                 marcas_restantes.append(marca_info)
                         
                         # Asignar la mejor salida al turno anterior
@@ -589,12 +795,11 @@ class AttendanceProcessor:
             logger.debug("No se encontraron turnos nocturnos para procesar")
             return df_proc
             
-        # Crear DataFrame de marcas
-        df_marcas = pd.DataFrame(marcas_list)
-        
         # Agrupar por empleado y fecha de turno, manteniendo todas las marcas
         df_marcas = pd.DataFrame(marcas_list)
         df_marcas = df_marcas.sort_values(['employee', 'fecha_turno', 'marca_time'])
+        # Segundos desde medianoche de cada marca, NaN si no tiene formato HH:MM:SS
+        df_marcas['marca_segundos'] = _horas_a_segundos(df_marcas['marca_time'])
         
         
         # Crear DataFrame de resultados procesados
@@ -605,22 +810,12 @@ class AttendanceProcessor:
                 continue  # Necesitamos al menos una marca
                 
             # Obtener horario para determinar entrada y salida programadas
+            # (ya validados al repartir las marcas entre turnos)
             entrada_prog = grupo.iloc[0]['entrada_programada']
             salida_prog = grupo.iloc[0]['salida_programada']
             
-            try:
-                datetime.strptime(entrada_prog, "%H:%M").time()
-                datetime.strptime(salida_prog, "%H:%M").time()
-            except (ValueError, TypeError):
-                continue
-            
-            # Ordenar por tiempo para obtener todas las marcas
-            grupo_ordenado = grupo.sort_values('marca_time')
-            marcas_times = grupo_ordenado['marca_time'].tolist()
-            
-            # Verificar si es un caso de "solo salida" para turnos nocturnos
-            if grupo.iloc[0]['cruza_medianoche']:
-                is_only_checkout(marcas_times, entrada_prog, salida_prog)
+            # df_marcas ya viene ordenado por hora dentro de cada turno
+            marcas_times = grupo['marca_time'].tolist()
             
             # Para mantener la compatibilidad con los tests, crear entrada con todas las marcas organizadas
             resultado = {
@@ -642,15 +837,12 @@ class AttendanceProcessor:
                 marcas_noche = []
                 marcas_madrugada = []
                 
-                for marca_time in marcas_times:
-                    try:
-                        marca_obj = datetime.strptime(marca_time, "%H:%M:%S").time()
-                        if marca_obj >= datetime.strptime("12:00:00", "%H:%M:%S").time():
-                            marcas_noche.append(marca_time)
-                        else:
-                            marcas_madrugada.append(marca_time)
-                    except (ValueError, TypeError):
+                for marca_time, marca_segundos in zip(marcas_times, grupo['marca_segundos']):
+                    # Las marcas ilegibles se tratan como de noche
+                    if np.isnan(marca_segundos) or marca_segundos >= 12 * 3600:
                         marcas_noche.append(marca_time)
+                    else:
+                        marcas_madrugada.append(marca_time)
                 
                 # Ordenar cada grupo
                 marcas_noche.sort()
@@ -674,47 +866,7 @@ class AttendanceProcessor:
                     if i <= 9:
                         resultado[f'checado_{i}'] = marca_time
             
-            # Calcular horas trabajadas usando checado_1 y checado_2
-            try:
-                entrada_mark = resultado.get('checado_1')
-                salida_mark = resultado.get('checado_2')
-                
-                if not entrada_mark and not salida_mark:
-                    horas_trabajadas = timedelta(0)
-                    observaciones = ["Sin marcas de asistencia"]
-                elif not entrada_mark:
-                    # Caso de solo salida: horas trabajadas = 0
-                    horas_trabajadas = timedelta(0)
-                    observaciones = ["Falta registro de entrada"]
-                elif not salida_mark:
-                    # Caso de solo entrada: horas trabajadas = 0
-                    horas_trabajadas = timedelta(0)
-                    observaciones = ["Falta registro de salida"]
-                else:
-                    # Caso normal: calcular diferencia entre entrada y salida
-                    entrada_time = datetime.strptime(entrada_mark, "%H:%M:%S").time()
-                    salida_time = datetime.strptime(salida_mark, "%H:%M:%S").time()
-                    
-                    inicio = datetime.combine(fecha_turno, entrada_time)
-                    
-                    # Para turnos que cruzan medianoche, ajustar la salida
-                    if grupo.iloc[0]['cruza_medianoche'] and salida_time < entrada_time:
-                        fin = datetime.combine(fecha_turno + timedelta(days=1), salida_time)
-                    else:
-                        fin = datetime.combine(fecha_turno, salida_time)
-                    
-                    horas_trabajadas = fin - inicio
-                    observaciones = []
-                
-                resultado['duration'] = horas_trabajadas
-                resultado['horas_trabajadas'] = td_to_str(horas_trabajadas)
-                resultado['observaciones'] = '; '.join(observaciones) if observaciones else None
-                
-                resultados.append(resultado)
-                
-            except (ValueError, TypeError) as e:
-                logger.error(f"Error calculando horas para empleado {empleado}: {e}")
-                continue
+            resultados.append(resultado)
         
         if not resultados:
             logger.debug("No se pudieron procesar turnos nocturnos")
@@ -723,288 +875,325 @@ class AttendanceProcessor:
         # Crear DataFrame de resultados
         df_resultados = pd.DataFrame(resultados)
         
-        # Actualizar el DataFrame original con los resultados procesados
-        for index, resultado in df_resultados.iterrows():
-            # Buscar la fila correspondiente en el DataFrame original usando la fecha del turno
-            mask = (df_proc['employee'] == resultado['employee']) & \
-                   (df_proc['dia'] == resultado['dia'])
+        # Horas trabajadas de todos los turnos a la vez con checado_1 y checado_2:
+        # la salida anterior a la entrada en un turno nocturno es del día siguiente
+        entrada_txt = df_resultados['checado_1'].to_numpy()
+        salida_txt = df_resultados['checado_2'].to_numpy()
+        tiene_entrada = df_resultados['checado_1'].notna().to_numpy() & (entrada_txt != '')
+        tiene_salida = df_resultados['checado_2'].notna().to_numpy() & (salida_txt != '')
+        ambas = tiene_entrada & tiene_salida
+        
+        entrada_seg = _horas_a_segundos(df_resultados['checado_1'])
+        salida_seg = _horas_a_segundos(df_resultados['checado_2'])
+        ilegibles = ambas & (np.isnan(entrada_seg) | np.isnan(salida_seg))
+        for empleado in df_resultados.loc[ilegibles, 'employee']:
+            logger.error(
+                "Error calculando horas para empleado %s: marca con formato inválido", empleado,
+                extra={"empleado": empleado},
+            )
+        
+        cruza = df_resultados['cruza_medianoche'].astype(bool).to_numpy()
+        segundos = np.where(
+            ambas & ~ilegibles,
+            salida_seg - entrada_seg + np.where(cruza & (salida_seg < entrada_seg), 86400, 0),
+            0,
+        ).astype(np.int64)
+        
+        df_resultados['duration'] = pd.to_timedelta(segundos, unit='s')
+        df_resultados['horas_trabajadas'] = _segundos_a_texto(segundos)
+        df_resultados['observaciones'] = np.select(
+            [~tiene_entrada & ~tiene_salida, ~tiene_entrada, ~tiene_salida],
+            ["Sin marcas de asistencia", "Falta registro de entrada", "Falta registro de salida"],
+            default=None,
+        )
+        df_resultados = df_resultados.loc[~ilegibles].reset_index(drop=True)
+        if df_resultados.empty:
+            logger.debug("No se pudieron procesar turnos nocturnos")
+            return df_proc
+        
+        # Fila de df_proc de cada turno procesado (primera coincidencia), -1 si no existe
+        posiciones = pd.DataFrame({
+            'employee': df_proc['employee'].to_numpy(),
+            'dia': df_proc['dia'].to_numpy(),
+            'posicion': np.arange(len(df_proc)),
+        }).drop_duplicates(['employee', 'dia'])
+        posicion_turno = (
+            df_resultados[['employee', 'dia']]
+            .merge(posiciones, on=['employee', 'dia'], how='left')['posicion']
+            .fillna(-1)
+            .astype(np.int64)
+            .to_numpy()
+        )
+        existe = posicion_turno >= 0
+        observaciones = df_resultados['observaciones'].to_numpy()
+        con_observaciones = pd.notna(observaciones) & (observaciones != '')
+        
+        # Actualizar en bloque las filas existentes con los turnos procesados
+        if existe.any():
+            idx_turnos = df_proc.index[posicion_turno[existe]]
+            procesados = df_resultados.loc[existe]
             
-            if mask.any():
-                idx_original = df_proc[mask].index[0]
-                
-                # Limpiar todas las checadas existentes solo para el turno nocturno procesado
-                for j in range(1, 10):
-                    col_checado = f'checado_{j}'
-                    if col_checado in df_proc.columns:
-                        df_proc.loc[idx_original, col_checado] = None
-                
-                # Asignar entrada y salida procesadas
-                df_proc.loc[idx_original, 'checado_1'] = resultado['checado_1']
-                df_proc.loc[idx_original, 'checado_2'] = resultado['checado_2']
-                df_proc.loc[idx_original, 'duration'] = resultado['duration']
-                df_proc.loc[idx_original, 'horas_trabajadas'] = resultado['horas_trabajadas']
-                
-                # Asignar observaciones si existen
-                if 'observaciones' in resultado and resultado['observaciones']:
-                    if 'observaciones' not in df_proc.columns:
-                        df_proc['observaciones'] = None
-                    df_proc.loc[idx_original, 'observaciones'] = resultado['observaciones']
-            else:
-                # Si no existe la fila para esta fecha de turno, crearla
-                # Esto puede pasar cuando las marcas se reasignan a un día anterior
-                fila_original = df_proc[df_proc['employee'] == resultado['employee']].iloc[0].copy()
-                fila_original['dia'] = resultado['dia']
-                fila_original['dia_iso'] = resultado['dia'].weekday() + 1
-                fila_original['es_primera_quincena'] = resultado['dia'].day <= 15
-                
-                # Limpiar todas las checadas
-                for j in range(1, 10):
-                    col_checado = f'checado_{j}'
-                    if col_checado in fila_original:
-                        fila_original[col_checado] = None
-                
-                # Asignar entrada y salida procesadas
-                fila_original['checado_1'] = resultado['checado_1']
-                fila_original['checado_2'] = resultado['checado_2']
-                fila_original['duration'] = resultado['duration']
-                fila_original['horas_trabajadas'] = resultado['horas_trabajadas']
-                
-                # Asignar observaciones si existen  
-                if 'observaciones' in resultado and resultado['observaciones']:
-                    if 'observaciones' not in fila_original:
-                        fila_original['observaciones'] = None
-                    fila_original['observaciones'] = resultado['observaciones']
-                
-                # Agregar la nueva fila al DataFrame
-                df_proc = pd.concat([df_proc, fila_original.to_frame().T], ignore_index=True)
+            # Limpiar todas las checadas existentes solo para los turnos nocturnos procesados
+            df_proc.loc[idx_turnos, columnas_checado] = None
+            
+            # Asignar entrada y salida procesadas
+            for col in ['checado_1', 'checado_2', 'duration', 'horas_trabajadas']:
+                df_proc.loc[idx_turnos, col] = procesados[col].to_numpy()
+            
+            # Asignar observaciones si existen
+            if con_observaciones[existe].any():
+                if 'observaciones' not in df_proc.columns:
+                    df_proc['observaciones'] = None
+                df_proc.loc[
+                    df_proc.index[posicion_turno[existe & con_observaciones]], 'observaciones'
+                ] = observaciones[existe & con_observaciones]
+        
+        # Si no existe la fila para esta fecha de turno, crearla a partir de la
+        # primera fila del empleado. Esto puede pasar cuando las marcas se
+        # reasignan a un día anterior
+        if not existe.all():
+            faltantes = df_resultados.loc[~existe]
+            nuevas = (
+                df_proc.drop_duplicates('employee')
+                .set_index('employee', drop=False)
+                .loc[faltantes['employee']]
+                .reset_index(drop=True)
+            )
+            nuevas['dia'] = faltantes['dia'].to_numpy()
+            nuevas['dia_iso'] = [dia.weekday() + 1 for dia in nuevas['dia']]
+            nuevas['es_primera_quincena'] = _es_primera_quincena(nuevas['dia'])
+            
+            # Limpiar todas las checadas y asignar entrada y salida procesadas
+            nuevas[columnas_checado] = None
+            for col in ['checado_1', 'checado_2', 'duration', 'horas_trabajadas']:
+                nuevas[col] = faltantes[col].to_numpy()
+            
+            # Asignar observaciones si existen
+            if con_observaciones[~existe].any():
+                if 'observaciones' not in nuevas.columns:
+                    nuevas['observaciones'] = None
+                nuevas.loc[con_observaciones[~existe], 'observaciones'] = (
+                    observaciones[~existe & con_observaciones]
+                )
+            
+            # Agregar las nuevas filas al DataFrame
+            df_proc = pd.concat([df_proc, nuevas], ignore_index=True)
         
-        # Limpiar marcas de días originales que fueron completamente procesadas y reasignadas
-        for index, resultado in df_resultados.iterrows():
-            # Si la fecha del turno es diferente al día original, necesitamos limpiar las marcas del día original
-            # que fueron reasignadas al turno
-            if resultado['dia'] != resultado['dia_original']:
-                mask_original = (df_proc['employee'] == resultado['employee']) & \
-                               (df_proc['dia'] == resultado['dia_original'])
+        # Marcas reasignadas agrupadas por (empleado, fecha de turno, día original)
+        marcas_por_turno = {}
+        for marca_info in marcas_list:
+            clave_turno = (marca_info['employee'], marca_info['fecha_turno'], marca_info['dia_original'])
+            marcas_por_turno.setdefault(clave_turno, []).append(marca_info['marca_time'])
+        
+        # Limpiar marcas de días originales cuyas marcas se reasignaron a otro
+        # turno: primero se calculan las checadas restantes de cada fila y luego
+        # se escriben todas en una sola asignación
+        reasignado = (df_resultados['dia'] != df_resultados['dia_original']).to_numpy()
+        if reasignado.any():
+            posiciones_originales = pd.DataFrame({
+                'employee': df_proc['employee'].to_numpy(),
+                'dia': df_proc['dia'].to_numpy(),
+                'posicion': np.arange(len(df_proc)),
+            }).drop_duplicates(['employee', 'dia'])
+            turnos_reasignados = df_resultados.loc[reasignado, ['employee', 'dia', 'dia_original']]
+            posicion_original = (
+                turnos_reasignados
+                .merge(
+                    posiciones_originales.rename(columns={'dia': 'dia_original'}),
+                    on=['employee', 'dia_original'],
+                    how='left',
+                )['posicion']
+                .fillna(-1)
+                .astype(np.int64)
+                .to_numpy()
+            )
+            
+            filas_originales = []
+            checadas_limpias = []
+            for (empleado, dia, dia_original), posicion in zip(
+                turnos_reasignados.itertuples(index=False, name=None), posicion_original
+            ):
+                if posicion < 0:
+                    continue
                 
-                if mask_original.any():
-                    idx_original = df_proc[mask_original].index[0]
-                    
-                    # Obtener todas las marcas que fueron reasignadas a este turno
-                    marcas_reasignadas = []
-                    for marca_info in marcas_list:
-                        if (marca_info['employee'] == resultado['employee'] and 
-                            marca_info['fecha_turno'] == resultado['dia'] and
-                            marca_info['dia_original'] == resultado['dia_original']):
-                            marcas_reasignadas.append(marca_info['marca_time'])
-                    
-                    # Limpiar solo las marcas que fueron reasignadas, mantener las que corresponden al día original
-                    for j in range(1, 10):
-                        col_checado = f'checado_{j}'
-                        if col_checado in df_proc.columns and pd.notna(df_proc.loc[idx_original, col_checado]):
-                            # Si esta marca fue reasignada, limpiarla
-                            if df_proc.loc[idx_original, col_checado] in marcas_reasignadas:
-                                df_proc.loc[idx_original, col_checado] = None
-                    
-                    # Reorganizar las marcas restantes
-                    marcas_restantes = []
-                    for j in range(1, 10):
-                        col_checado = f'checado_{j}'
-                        if col_checado in df_proc.columns and pd.notna(df_proc.loc[idx_original, col_checado]):
-                            marcas_restantes.append(df_proc.loc[idx_original, col_checado])
-                            df_proc.loc[idx_original, col_checado] = None
-                    
-                    # Reasignar las marcas restantes desde checado_1
-                    for i, marca in enumerate(marcas_restantes, 1):
-                        if i <= 9:
-                            df_proc.loc[idx_original, f'checado_{i}'] = marca
-                    
-                    # Si no quedan marcas, limpiar duration y horas_trabajadas
-                    if not marcas_restantes:
-                        df_proc.loc[idx_original, 'duration'] = None
-                        df_proc.loc[idx_original, 'horas_trabajadas'] = None
+                # Mantener solo las marcas que corresponden al día original,
+                # reorganizadas desde checado_1
+                marcas_reasignadas = marcas_por_turno.get((empleado, dia, dia_original), [])
+                marcas_restantes = [
+                    marca
+                    for marca in df_proc.iloc[posicion][columnas_checado]
+                    if pd.notna(marca) and marca not in marcas_reasignadas
+                ]
+                filas_originales.append(posicion)
+                checadas_limpias.append(
+                    marcas_restantes + [None] * (len(columnas_checado) - len(marcas_restantes))
+                )
+            
+            if filas_originales:
+                idx_originales = df_proc.index[filas_originales]
+                df_proc.loc[idx_originales, columnas_checado] = np.array(
+                    checadas_limpias, dtype=object
+                )
+                
+                # Si no quedan marcas, limpiar duration y horas_trabajadas
+                sin_marcas = [fila[0] is None for fila in checadas_limpias]
+                df_proc.loc[idx_originales[sin_marcas], ['duration', 'horas_trabajadas']] = None
         
         logger.debug(f"Procesamiento completado: {len(resultados)} turnos nocturnos procesados")
         return df_proc
 
     def analizar_asistencia_con_horarios_cache(
-        self, df: pd.DataFrame, cache_horarios: Dict
+        self,
+        df: pd.DataFrame,
+        cache_horarios: Dict,
+        checados: Optional[Tuple[List[str], np.ndarray, np.ndarray]] = None,
     ) -> pd.DataFrame:
         """
         Enriches the DataFrame with schedule and tardiness analysis using the schedule cache.
         Optimized for performance with vectorized operations.
+
+        Args:
+            df: DataFrame with the day's check-ins
+            cache_horarios: Schedule cache by employee
+            checados: Result of _matriz_checados for df's rows, parsed here when omitted
         """
         if df.empty:
             return df
         logger.debug("Iniciando análisis de horarios y retardos...")
 
         # Determina la quincena respetando que "dia" puede ser datetime.date
-        df["es_primera_quincena"] = df["dia"].apply(
-            lambda value: value.day <= 15 if pd.notna(value) else False
-        )
-
-        # Initialize columns with proper dtypes for memory efficiency
-        df["hora_entrada_programada"] = None
-        df["hora_salida_programada"] = None
-        df["cruza_medianoche"] = False
-        df["horas_esperadas"] = None
-
-        # Optimized schedule retrieval with vectorized operations where possible
-        def obtener_horario_fila(row):
-            horario = obtener_horario_empleado(
-                row["employee"],
-                row["dia_iso"],
-                row["es_primera_quincena"],
-                cache_horarios,
-            )
+        df["es_primera_quincena"] = _es_primera_quincena(df["dia"])
+        df["dia_iso"] = df["dia_iso"].astype("int8")
+
+        # Un horario por combinación (empleado, día, quincena): se consulta una vez
+        # por clave única y se une al DataFrame con un merge en lugar de df.apply.
+        claves = ["employee", "dia_iso", "es_primera_quincena"]
+        registros = []
+        for employee, dia_iso, es_primera in (
+            df[claves].drop_duplicates().itertuples(index=False, name=None)
+        ):
+            horario = obtener_horario_empleado(employee, dia_iso, es_primera, cache_horarios)
             if horario:
-                return pd.Series(
-                    [
-                        horario.get("hora_entrada"),
-                        horario.get("hora_salida"),
-                        horario.get("cruza_medianoche", False),
-                        str(timedelta(hours=float(horario.get("horas_totales", 0)))),
-                    ]
-                )
-            return pd.Series([None, None, False, None])
-
-        # Apply schedule lookup
-        df[
-            [
-                "hora_entrada_programada",
-                "hora_salida_programada",
-                "cruza_medianoche",
-                "horas_esperadas",
-            ]
-        ] = df.apply(obtener_horario_fila, axis=1, result_type="expand")
+                registros.append((
+                    employee,
+                    dia_iso,
+                    es_primera,
+                    horario.get("hora_entrada"),
+                    horario.get("hora_salida"),
+                    horario.get("cruza_medianoche", False),
+                    str(timedelta(hours=float(horario.get("horas_totales", 0)))),
+                ))
+            else:
+                registros.append((employee, dia_iso, es_primera, None, None, False, None))
+
+        columnas_horario = [
+            "hora_entrada_programada",
+            "hora_salida_programada",
+            "cruza_medianoche",
+            "horas_esperadas",
+        ]
+        horarios_df = pd.DataFrame.from_records(
+            registros, columns=claves + columnas_horario
+        )
+        # El merge izquierdo conserva el orden de df, así que se asigna por posición
+        unidos = df[claves].merge(horarios_df, on=claves, how="left", sort=False)
+        for columna in columnas_horario:
+            df[columna] = unidos[columna].to_numpy()
 
         logger.debug("Calculando retardos y puntualidad...")
 
-        # Optimized tardiness analysis with vectorized time parsing
+        # Tardiness analysis on seconds-of-day arrays
         def analizar_retardo_vectorizado(df_subset):
             """Vectorized tardiness analysis for better performance."""
-            results = []
-
-            for _, row in df_subset.iterrows():
-                if pd.isna(row.get("hora_entrada_programada")):
-                    results.append(["Día no Laborable", 0])
-                    continue
-
-                if pd.isna(row.get("checado_1")):
-                    if row.get("cruza_medianoche", False) and pd.notna(row.get("checado_2")):
-                        results.append(["Falta Entrada Nocturno", 0])
-                    else:
-                        results.append(["Falta", 0])
-                    continue
-
-                try:
-                    # Handle both HH:MM and HH:MM:SS formats
-                    hora_prog_str = row["hora_entrada_programada"]
-                    if len(hora_prog_str.split(':')) == 2:
-                        hora_prog_str += ":00"
-                    hora_prog = datetime.strptime(hora_prog_str, "%H:%M:%S")
-                    hora_checada = datetime.strptime(row["checado_1"], "%H:%M:%S")
-
-                    # Handle midnight crossing
-                    if row.get("cruza_medianoche", False) and hora_prog.hour >= 12 and hora_checada.hour < 12:
-                        hora_prog -= timedelta(days=1)
-
-                    diferencia = (hora_checada - hora_prog).total_seconds() / 60
-
-                    if not row.get("cruza_medianoche", False) and diferencia < -12 * 60:
-                        diferencia += 24 * 60
-
-                    # Classify tardiness
-                    if diferencia <= TOLERANCIA_RETARDO_MINUTOS:
-                        tipo = "A Tiempo"
-                    elif diferencia <= UMBRAL_FALTA_INJUSTIFICADA_MINUTOS:
-                        tipo = "Retardo"
-                    else:
-                        tipo = "Falta Injustificada"
-
-                    results.append([tipo, int(diferencia)])
-
-                except (ValueError, TypeError):
-                    results.append(["Falta", 0])
-
-            return results
+            vacio = pd.Series(None, index=df_subset.index, dtype=object)
+            programada = df_subset["hora_entrada_programada"]
+            checado_1 = df_subset.get("checado_1", vacio)
+            checado_2 = df_subset.get("checado_2", vacio)
+            cruza = df_subset["cruza_medianoche"].astype(bool).to_numpy()
+
+            no_laborable = programada.isna().to_numpy()
+            sin_entrada = ~no_laborable & checado_1.isna().to_numpy()
+
+            prog_seg = _horas_a_segundos(programada, _PATRON_HORA_PROGRAMADA)
+            checada_seg = _horas_a_segundos(checado_1)
+
+            # Night shifts: an early-morning check-in belongs to the previous day's entry
+            diferencia = checada_seg - prog_seg
+            diferencia = np.where(
+                cruza & (prog_seg >= 12 * 3600) & (checada_seg < 12 * 3600),
+                diferencia + 86400,
+                diferencia,
+            ) / 60
+            diferencia = np.where(~cruza & (diferencia < -12 * 60), diferencia + 24 * 60, diferencia)
+
+            calculado = ~no_laborable & ~sin_entrada & ~np.isnan(diferencia)
+            tipos = np.full(len(df_subset), "Falta", dtype=object)
+            tipos[no_laborable] = "Día no Laborable"
+            tipos[sin_entrada & cruza & checado_2.notna().to_numpy()] = "Falta Entrada Nocturno"
+            tipos[calculado] = TIPOS_RETARDO[classify_tardiness(diferencia[calculado])]
+
+            # Differences stay within ±24h, so int16 is enough
+            minutos = np.where(calculado, np.trunc(np.nan_to_num(diferencia)), 0).astype(np.int16)
+            return pd.DataFrame(
+                {"tipo_retardo": tipos, "minutos_tarde": minutos}, index=df_subset.index
+            )
 
         # Apply vectorized tardiness analysis
-        tardiness_results = analizar_retardo_vectorizado(df)
-        df[["tipo_retardo", "minutos_tarde"]] = pd.DataFrame(tardiness_results, index=df.index)
+        df[["tipo_retardo", "minutos_tarde"]] = analizar_retardo_vectorizado(df)
 
-        # Sort and calculate accumulated values efficiently
-        df = df.sort_values(by=["employee", "dia"]).reset_index(drop=True)
+        # Sort and calculate accumulated values efficiently; the check-in
+        # matrix follows the same row order
+        orden = df.reset_index(drop=True).sort_values(by=["employee", "dia"]).index.to_numpy()
+        df = df.iloc[orden].reset_index(drop=True)
+        if checados is not None:
+            columnas, segundos, irregular = checados
+            checados = (columnas, segundos[orden], irregular[orden])
 
         # Vectorized boolean operations
         df["es_retardo_acumulable"] = (df["tipo_retardo"] == "Retardo").astype("int8")  # Use int8 for memory efficiency
         df["es_falta"] = df["tipo_retardo"].isin(["Falta", "Falta Injustificada"]).astype("int8")
 
         # Optimized cumulative calculation
-        df["retardos_acumulados"] = df.groupby("employee")["es_retardo_acumulable"].cumsum()
+        df["retardos_acumulados"] = _retardos_acumulados(df)
 
         # Vectorized discount calculation
-        df["descuento_por_3_retardos"] = np.where(
-            (df["es_retardo_acumulable"] == 1) &
-            (df["retardos_acumulados"] > 0) &
-            (df["retardos_acumulados"] % 3 == 0),
-            "Sí (3er retardo)",
-            "No"
-        )
+        df["descuento_por_3_retardos"] = _descuento_por_3_retardos(df)
 
         logger.debug("Detectando salidas anticipadas...")
 
-        # Optimized early departure detection
-        def detectar_salida_anticipada_optimizada(row):
-            """Optimized early departure detection."""
-            if pd.isna(row.get("hora_salida_programada")) or pd.isna(row.get("checado_1")):
-                return False
-
-            # Collect check-ins efficiently
-            checadas_dia = []
-            for i in range(1, 10):
-                col_checado = f"checado_{i}"
-                if col_checado in row and pd.notna(row[col_checado]):
-                    checadas_dia.append(row[col_checado])
-
-            if len(checadas_dia) <= 1:
-                return False
-
-            try:
-                checadas_datetime = [datetime.strptime(checada, "%H:%M:%S") for checada in checadas_dia]
-
-                if row.get("cruza_medianoche", False):
-                    # Optimized midnight crossing adjustment
-                    checadas_ajustadas = [
-                        dt + timedelta(hours=24) if dt.hour < 12 else dt
-                        for dt in checadas_datetime
-                    ]
-                    ultima_checada_dt = max(checadas_ajustadas)
-                    ultima_checada = ultima_checada_dt.strftime("%H:%M:%S")
-                else:
-                    ultima_checada = max(checadas_datetime).strftime("%H:%M:%S")
-
-                # Parse scheduled exit time efficiently
-                hora_salida_prog = datetime.strptime(
-                    row["hora_salida_programada"] + ":00", "%H:%M:%S"
-                )
-                hora_ultima_checada = datetime.strptime(ultima_checada, "%H:%M:%S")
-
-                # Calculate difference
-                diferencia = (hora_salida_prog - hora_ultima_checada).total_seconds() / 60
-
-                # Handle midnight cases
-                if diferencia < -12 * 60:
-                    diferencia += 24 * 60
-                elif diferencia > 12 * 60:
-                    diferencia -= 24 * 60
-
-                return diferencia > TOLERANCIA_SALIDA_ANTICIPADA_MINUTOS
-
-            except (ValueError, TypeError):
-                return False
+        # Early departure: last check-in of the day against the scheduled exit
+        def detectar_salida_anticipada_vectorizada(df_subset):
+            """Vectorized early departure detection over the check-in matrix."""
+            todas, matriz, _ = checados if checados is not None else _matriz_checados(df_subset)
+            posiciones = [j for j, col in enumerate(todas) if int(col[8:]) <= 9]
+            columnas = [todas[j] for j in posiciones]
+            if "checado_1" not in columnas:
+                return np.zeros(len(df_subset), dtype=bool)
+
+            checadas = matriz[:, posiciones]
+            presentes = df_subset[columnas].notna().to_numpy()
+            cruza = df_subset["cruza_medianoche"].astype(bool).to_numpy()
+
+            # Night shifts: morning check-ins come after the evening ones
+            ajustadas = np.where(cruza[:, None] & (checadas < 12 * 3600), checadas + 86400, checadas)
+            ultima = np.where(presentes, ajustadas, 0).max(axis=1) % 86400
+
+            salida_prog = _horas_a_segundos(
+                df_subset["hora_salida_programada"], _PATRON_HORA_PROGRAMADA
+            )
+            diferencia = (salida_prog - ultima) / 60
+            diferencia = np.where(diferencia < -12 * 60, diferencia + 24 * 60, diferencia)
+            diferencia = np.where(diferencia > 12 * 60, diferencia - 24 * 60, diferencia)
+
+            evaluable = (
+                df_subset["hora_salida_programada"].notna().to_numpy()
+                & df_subset["checado_1"].notna().to_numpy()
+                & (presentes.sum(axis=1) > 1)
+                & ~(presentes & (checadas == _SIN_CHECADA)).any(axis=1)
+            )
+            return evaluable & (np.nan_to_num(diferencia) > TOLERANCIA_SALIDA_ANTICIPADA_MINUTOS)
 
-        # Apply optimized early departure detection
-        df["salida_anticipada"] = df.apply(detectar_salida_anticipada_optimizada, axis=1)
+        df["salida_anticipada"] = detectar_salida_anticipada_vectorizada(df)
 
         logger.debug("Análisis completado.")
         return df
@@ -1028,82 +1217,100 @@ class AttendanceProcessor:
         df["horas_esperadas_originales"] = df["horas_esperadas"].copy()
         df["horas_descontadas_permiso"] = "00:00:00"
 
-        permisos_con_descuento = 0
-        permisos_sin_goce = 0
-        permisos_medio_dia = 0
-
-        for index, row in df.iterrows():
-            employee_code = str(row["employee"])
-            fecha = row["dia"]
-
-            if employee_code in permisos_dict and fecha in permisos_dict[employee_code]:
-                permiso_info = permisos_dict[employee_code][fecha]
-                leave_type_normalized = permiso_info.get("leave_type_normalized", "")
-                is_half_day = permiso_info.get("is_half_day", False)
-
-                df.at[index, "tiene_permiso"] = True
-                df.at[index, "tipo_permiso"] = permiso_info["leave_type"]
-                df.at[index, "es_permiso_medio_dia"] = is_half_day
-
-                accion = POLITICA_PERMISOS.get(leave_type_normalized, "ajustar_a_cero")
-
-                horas_esperadas_orig = row["horas_esperadas"]
-
-                if (
-                    pd.notna(horas_esperadas_orig)
-                    and horas_esperadas_orig != "00:00:00"
-                ):
-                    if accion == "no_ajustar":
-                        df.at[index, "es_permiso_sin_goce"] = True
-                        permisos_sin_goce += 1
-                    elif accion == "ajustar_a_cero":
-                        if is_half_day:
-                            # For half-day leaves, deduct only half the hours
-                            try:
-                                # Convert expected hours to timedelta
-                                horas_td = pd.to_timedelta(horas_esperadas_orig)
-                                # Calculate half
-                                mitad_horas = horas_td / 2
-                                # Convert back to string
-                                mitad_horas_str = str(mitad_horas).split()[
-                                    -1
-                                ]  # Get only HH:MM:SS
-
-                                # Adjust expected hours (subtract half)
-                                horas_ajustadas = horas_td - mitad_horas
-                                horas_ajustadas_str = str(horas_ajustadas).split()[-1]
-
-                                df.at[index, "horas_esperadas"] = horas_ajustadas_str
-                                df.at[index, "horas_descontadas_permiso"] = (
-                                    mitad_horas_str
-                                )
-                                permisos_medio_dia += 1
-                            except (ValueError, TypeError):
-                                # If there's an error in calculation, treat as full day
-                                df.at[index, "horas_esperadas"] = "00:00:00"
-                                df.at[index, "horas_descontadas_permiso"] = (
-                                    horas_esperadas_orig
-                                )
-                                permisos_con_descuento += 1
-                        else:
-                            # Full day leave
-                            df.at[index, "horas_esperadas"] = "00:00:00"
-                            df.at[index, "horas_descontadas_permiso"] = (
-                                horas_esperadas_orig
-                            )
-                            permisos_con_descuento += 1
+        # Flatten the leaves into a (employee, dia) table and left-join it once
+        permisos_df = pd.DataFrame(
+            [
+                (
+                    employee_code,
+                    fecha,
+                    info["leave_type"],
+                    info.get("leave_type_normalized", ""),
+                    bool(info.get("is_half_day", False)),
+                )
+                for employee_code, permisos_empleado in permisos_dict.items()
+                for fecha, info in permisos_empleado.items()
+            ],
+            columns=[
+                "employee",
+                "dia",
+                "tipo_permiso",
+                "leave_type_normalized",
+                "is_half_day",
+            ],
+        )
+        claves = pd.DataFrame(
+            {"employee": df["employee"].astype(str).to_numpy(), "dia": df["dia"].to_numpy()}
+        )
+        permisos_fila = claves.merge(
+            permisos_df.astype({"employee": str}), on=["employee", "dia"], how="left"
+        )
+
+        tiene_permiso = permisos_fila["tipo_permiso"].notna().to_numpy()
+        es_medio_dia = permisos_fila["is_half_day"].eq(True).to_numpy()
+        accion = (
+            permisos_fila["leave_type_normalized"]
+            .map(POLITICA_PERMISOS)
+            .fillna("ajustar_a_cero")
+            .to_numpy()
+        )
+
+        df["tiene_permiso"] = tiene_permiso
+        df.loc[tiene_permiso, "tipo_permiso"] = permisos_fila["tipo_permiso"].to_numpy()[
+            tiene_permiso
+        ]
+        df["es_permiso_medio_dia"] = es_medio_dia
+
+        horas_orig = df["horas_esperadas_originales"]
+        con_horas = (
+            tiene_permiso & horas_orig.notna().to_numpy() & (horas_orig != "00:00:00").to_numpy()
+        )
+        sin_goce = con_horas & (accion == "no_ajustar")
+        a_cero = con_horas & (accion == "ajustar_a_cero")
+        df["es_permiso_sin_goce"] = sin_goce
+
+        # Half-day leaves deduct half the expected hours; values that cannot be
+        # parsed as a duration fall back to the full-day rule
+        horas_td = pd.Series(pd.NaT, index=df.index, dtype="timedelta64[ns]")
+        if (a_cero & es_medio_dia).any():
+            horas_td[a_cero & es_medio_dia] = pd.to_timedelta(
+                horas_orig[a_cero & es_medio_dia].astype(str), errors="coerce"
+            )
+        medio_dia = a_cero & es_medio_dia & horas_td.notna().to_numpy()
+        dia_completo = a_cero & ~medio_dia
+
+        if medio_dia.any():
+            mitad = horas_td[medio_dia] / 2
+            df.loc[medio_dia, "horas_esperadas"] = _timedelta_a_texto(horas_td[medio_dia] - mitad)
+            df.loc[medio_dia, "horas_descontadas_permiso"] = _timedelta_a_texto(mitad)
+        df.loc[dia_completo, "horas_esperadas"] = "00:00:00"
+        df.loc[dia_completo, "horas_descontadas_permiso"] = horas_orig[dia_completo]
+
+        permisos_con_descuento = int(dia_completo.sum())
+        permisos_sin_goce = int(sin_goce.sum())
+        permisos_medio_dia = int(medio_dia.sum())
 
         empleados_con_permisos = df[df["tiene_permiso"]]["employee"].nunique()
         dias_con_permisos = df["tiene_permiso"].sum()
 
-        logger.debug("Ajuste completado:")
-        logger.debug(f"   - {empleados_con_permisos} empleados con permisos")
-        logger.debug(f"   - {dias_con_permisos} días con permisos")
+        # One record for the whole summary; the counts also travel as
+        # structured fields for handlers that want them
+        resumen_permisos = {
+            "empleados_con_permisos": int(empleados_con_permisos),
+            "dias_con_permisos": int(dias_con_permisos),
+            "permisos_con_descuento": permisos_con_descuento,
+            "permisos_medio_dia": permisos_medio_dia,
+            "permisos_sin_goce": permisos_sin_goce,
+        }
         logger.debug(
-            f"   - {permisos_con_descuento} permisos con horas descontadas (día completo)"
+            "Ajuste completado:\n"
+            "   - %(empleados_con_permisos)s empleados con permisos\n"
+            "   - %(dias_con_permisos)s días con permisos\n"
+            "   - %(permisos_con_descuento)s permisos con horas descontadas (día completo)\n"
+            "   - %(permisos_medio_dia)s permisos de medio día\n"
+            "   - %(permisos_sin_goce)s permisos sin goce (sin descuento)",
+            resumen_permisos,
+            extra=resumen_permisos,
         )
-        logger.debug(f"   - {permisos_medio_dia} permisos de medio día")
-        logger.debug(f"   - {permisos_sin_goce} permisos sin goce (sin descuento)")
 
         return df
 
@@ -1123,9 +1330,9 @@ class AttendanceProcessor:
         if "duration_td" in df.columns:
             df["horas_trabajadas_td"] = df["duration_td"].fillna(pd.Timedelta(0))
         else:
-            df["horas_trabajadas_td"] = df["horas_trabajadas"].apply(safe_timedelta)
+            df["horas_trabajadas_td"] = safe_timedelta_series(df["horas_trabajadas"])
 
-        df["horas_esperadas_td"] = df["horas_esperadas"].apply(safe_timedelta)
+        df["horas_esperadas_td"] = safe_timedelta_series(df["horas_esperadas"])
 
         # Calculate if shift hours were fulfilled
         df["cumplio_horas_turno"] = (
@@ -1167,27 +1374,16 @@ class AttendanceProcessor:
                 )
 
         # Recalculate derived columns
-        df["es_retardo_acumulable"] = (df["tipo_retardo"] == "Retardo").astype(int)
+        df["es_retardo_acumulable"] = (df["tipo_retardo"] == "Retardo").astype("int8")
         df["es_falta"] = (
             df["tipo_retardo"].isin(["Falta", "Falta Injustificada"])
-        ).astype(int)
+        ).astype("int8")
 
         # Recalculate accumulated tardiness by employee
-        df["retardos_acumulados"] = df.groupby("employee")[
-            "es_retardo_acumulable"
-        ].cumsum()
+        df["retardos_acumulados"] = _retardos_acumulados(df)
 
         # Recalculate discount for 3 tardiness
-        df["descuento_por_3_retardos"] = df.apply(
-            lambda row: (
-                "Sí (3er retardo)"
-                if row["es_retardo_acumulable"]
-                and row["retardos_acumulados"] > 0
-                and row["retardos_acumulados"] % 3 == 0
-                else "No"
-            ),
-            axis=1,
-        )
+        df["descuento_por_3_retardos"] = _descuento_por_3_retardos(df)
 
         total_perdonados = df["retardo_perdonado"].sum()
         if total_perdonados > 0:
@@ -1226,7 +1422,7 @@ class AttendanceProcessor:
         # Calculate es_falta_ajustada in both cases
         df["es_falta_ajustada"] = (
             df["tipo_falta_ajustada"].isin(["Falta", "Falta Injustificada"])
-        ).astype(int)
+        ).astype("int8")
 
         return df
 
@@ -1280,3 +1476,8 @@ class AttendanceProcessor:
         df.drop(columns=['fecha_contratacion'], inplace=True)
 
         return df
+
+
+def _procesar_turnos_chunk(df: pd.DataFrame, cache_horarios: Dict) -> pd.DataFrame:
+    """Worker for AttendanceProcessor.procesar_turnos_y_retardos on one employee chunk."""
+    return AttendanceProcessor()._procesar_turnos(df, cache_horarios)
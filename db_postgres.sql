@@ -906,6 +906,53 @@ GROUP BY
 ORDER BY nombre_completo, es_primera_quincena DESC;
 $func$;
 
+-- ---------------------------------------------------------------------
+-- 3. VERSIÓN DE HORARIOS PARA INVALIDAR CACHÉS
+-- ---------------------------------------------------------------------
+-- La aplicación guarda en caché el resultado de f_tabla_horarios_multi_quincena
+-- junto con esta versión; cualquier cambio en las tablas que alimentan la
+-- función la incrementa y deja obsoletas las entradas anteriores.
+CREATE TABLE IF NOT EXISTS meta_horarios (
+    id BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),
+    version BIGINT NOT NULL DEFAULT 0
+);
+
+INSERT INTO meta_horarios (id, version) VALUES (TRUE, 0)
+ON CONFLICT (id) DO NOTHING;
+
+CREATE OR REPLACE FUNCTION f_incrementar_version_horarios()
+RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE meta_horarios SET version = version + 1;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_version_horarios ON Empleados;
+CREATE TRIGGER trg_version_horarios
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON Empleados
+FOR EACH STATEMENT EXECUTE FUNCTION f_incrementar_version_horarios();
+
+DROP TRIGGER IF EXISTS trg_version_horarios ON Sucursales;
+CREATE TRIGGER trg_version_horarios
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON Sucursales
+FOR EACH STATEMENT EXECUTE FUNCTION f_incrementar_version_horarios();
+
+DROP TRIGGER IF EXISTS trg_version_horarios ON TipoTurno;
+CREATE TRIGGER trg_version_horarios
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON TipoTurno
+FOR EACH STATEMENT EXECUTE FUNCTION f_incrementar_version_horarios();
+
+DROP TRIGGER IF EXISTS trg_version_horarios ON Horario;
+CREATE TRIGGER trg_version_horarios
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON Horario
+FOR EACH STATEMENT EXECUTE FUNCTION f_incrementar_version_horarios();
+
+DROP TRIGGER IF EXISTS trg_version_horarios ON AsignacionHorario;
+CREATE TRIGGER trg_version_horarios
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON AsignacionHorario
+FOR EACH STATEMENT EXECUTE FUNCTION f_incrementar_version_horarios();
+
 -- =====================================================================
 -- 💡 CÓMO LLAMAR A LA FUNCIÓN CORRECTAMENTE
 -- =====================================================================
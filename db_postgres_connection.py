@@ -1,12 +1,18 @@
 import os
 import json
 import psycopg2
-from psycopg2.extras import RealDictCursor
-from psycopg2 import pool
+from psycopg2.extras import RealDictCursor, register_default_json, register_default_jsonb
+from psycopg2 import errorcodes, pool
 from dotenv import load_dotenv
 from typing import Optional, Dict, Any
 import logging
-from functools import lru_cache
+from collections import OrderedDict
+from functools import lru_cache, wraps
+
+try:
+    import orjson
+except ImportError:  # Optional fast JSON decoder; fall back to the stdlib json
+    orjson = None
 
 # Carga las variables de entorno desde el archivo .env
 load_dotenv()
@@ -26,6 +32,14 @@ MAX_POOL_CONNECTIONS = int(os.getenv("MAX_POOL_CONNECTIONS", "10"))
 _connection_pool = None
 logger = logging.getLogger(__name__)
 
+# Decodificador de los horarios JSON por día
+_json_loads = orjson.loads if orjson is not None else json.loads
+
+if orjson is not None:
+    # psycopg2 decodifica las columnas json/jsonb con esta función en todas las conexiones
+    register_default_json(globally=True, loads=orjson.loads)
+    register_default_jsonb(globally=True, loads=orjson.loads)
+
 
 def get_connection_pool():
     """
@@ -166,6 +180,70 @@ def connection_context_manager():
     return ConnectionContext()
 
 
+# Resultados de obtener_tabla_horarios por (sucursal, quincena, códigos, versión),
+# del menos al más recientemente usado
+_tabla_horarios_cache = OrderedDict()
+MAX_TABLA_HORARIOS_CACHE = 64
+
+# False cuando la tabla meta_horarios no existe, para no volver a consultarla
+_version_horarios_estado = {"disponible": True}
+
+
+def _version_horarios(conn):
+    """
+    Lee la versión de los horarios de la tabla meta_horarios, que los triggers
+    de db_postgres.sql incrementan con cada cambio en las tablas de horarios.
+    Se lee en cada llamada (es una sola fila), así que un cambio de horarios se
+    ve en la siguiente búsqueda; si la tabla no existe se avisa una vez y no se
+    vuelve a consultar.
+
+    Returns:
+        La versión actual, o None si no hay versión (sin caché)
+    """
+    estado = _version_horarios_estado
+    if not estado["disponible"]:
+        return None
+
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT version FROM meta_horarios")
+            fila = cursor.fetchone()
+    except psycopg2.Error as err:
+        # La consulta fallida deja la transacción abortada
+        conn.rollback()
+        if getattr(err, "pgcode", None) == errorcodes.UNDEFINED_TABLE:
+            estado["disponible"] = False
+            logger.warning(
+                "La tabla meta_horarios no existe (aplica db_postgres.sql); "
+                "los horarios no se guardarán en caché"
+            )
+        else:
+            logger.debug(f"Sin versión de horarios, no se usa caché: {err}")
+        return None
+
+    return fila[0] if fila else None
+
+
+def _decodificar_dias_horario(row):
+    """
+    Copia una fila de f_tabla_horarios convirtiendo a dict los horarios por día
+    que llegan como texto JSON. Los que ya vienen deserializados no se tocan.
+    """
+    horario_empleado = dict(row)
+    for dia in [
+        "Lunes",
+        "Martes",
+        "Miércoles",
+        "Jueves",
+        "Viernes",
+        "Sábado",
+        "Domingo",
+    ]:
+        if isinstance(horario_empleado[dia], str):
+            horario_empleado[dia] = _json_loads(horario_empleado[dia])
+    return horario_empleado
+
+
 def obtener_tabla_horarios(
     sucursal: str, es_primera_quincena: bool, conn=None, codigos_frappe=None
 ):
@@ -176,12 +254,16 @@ def obtener_tabla_horarios(
 
     Args:
         sucursal: Nombre de la sucursal (ej: 'Villas')
-        es_primera_quincena: True si es primera quincena, False si es segunda
+        es_primera_quincena: True si es primera quincena, False si es segunda,
+                             None para obtener ambas en una sola consulta
         conn: Conexión a la base de datos (opcional, para compatibilidad)
         codigos_frappe: Lista de códigos frappe de la API para filtrar (opcional)
 
     Returns:
-        Lista de diccionarios con los horarios por empleado y día
+        Lista de diccionarios con los horarios por empleado y día; cada fila trae
+        su columna es_primera_quincena. Los resultados
+        se guardan en caché por versión de horarios, así que los diccionarios
+        deben tratarse como de solo lectura.
     """
     close_conn = False
 
@@ -193,49 +275,56 @@ def obtener_tabla_horarios(
             return []
 
     try:
-        cursor = conn.cursor(cursor_factory=RealDictCursor)
-
-        # Usar la nueva función f_tabla_horarios_multi_quincena que incluye cruza_medianoche
-        sql_horarios = """
-        SELECT * FROM f_tabla_horarios_multi_quincena(%s)
-        WHERE es_primera_quincena = %s
-        """
-        cursor.execute(sql_horarios, (sucursal, es_primera_quincena))
-        horarios_result = cursor.fetchall()
-
-        # Filtrar por códigos frappe si se proporcionan
-        if codigos_frappe:
-            # Convertir los códigos a string para comparación
-            codigos_str = [str(codigo) for codigo in codigos_frappe]
-            horarios_result = [
-                horario
-                for horario in horarios_result
-                if str(horario.get("codigo_frappe")) in codigos_str
-            ]
-
-        cursor.close()
-
-        # Procesar los resultados para manejar los datos JSONB
-        horarios_procesados = []
-        for row in horarios_result:
-            horario_empleado = dict(row)
-            for dia in [
-                "Lunes",
-                "Martes",
-                "Miércoles",
-                "Jueves",
-                "Viernes",
-                "Sábado",
-                "Domingo",
-            ]:
-                if horario_empleado[dia] is not None:
-                    # Si es una cadena JSON, convertirla a diccionario Python
-                    if isinstance(horario_empleado[dia], str):
-                        horario_empleado[dia] = json.loads(horario_empleado[dia])
-                    # Si ya es un dict o un objeto JSON deserializado, no hacer nada
-            horarios_procesados.append(horario_empleado)
-
-        return horarios_procesados
+        # Convertir los códigos a string para comparación; None no filtra
+        codigos_str = [str(codigo) for codigo in codigos_frappe] if codigos_frappe else None
+
+        # Reutilizar el resultado mientras la versión de los horarios no cambie
+        version = _version_horarios(conn)
+        clave_cache = (
+            sucursal,
+            es_primera_quincena,
+            frozenset(codigos_str) if codigos_str else None,
+            version,
+        )
+        if version is not None and clave_cache in _tabla_horarios_cache:
+            logger.debug(f"Horarios de {sucursal} obtenidos del caché (versión {version})")
+            _tabla_horarios_cache.move_to_end(clave_cache)
+            return list(_tabla_horarios_cache[clave_cache])
+
+        # Cursor del lado del servidor: las filas llegan en bloques de itersize
+        # sin materializar todo el resultado
+        with conn.cursor(name="horarios_stream", cursor_factory=RealDictCursor) as cursor:
+            cursor.itersize = 2000
+
+            # Usar la nueva función f_tabla_horarios_multi_quincena que incluye
+            # cruza_medianoche; el filtro por códigos frappe se aplica en la base
+            # de datos para no transferir filas que se descartarían
+            sql_horarios = """
+            SELECT * FROM f_tabla_horarios_multi_quincena(%s)
+            WHERE (%s::boolean IS NULL OR es_primera_quincena = %s)
+              AND (%s::text[] IS NULL OR codigo_frappe::text = ANY(%s::text[]))
+            """
+            cursor.execute(
+                sql_horarios,
+                (
+                    sucursal,
+                    es_primera_quincena,
+                    es_primera_quincena,
+                    codigos_str,
+                    codigos_str,
+                ),
+            )
+
+            # Procesar los datos JSONB
+            horarios_procesados = [_decodificar_dias_horario(row) for row in cursor]
+
+        if version is not None:
+            # Se descarta la entrada usada hace más tiempo; las de versiones
+            # anteriores dejan de usarse y son las primeras en salir
+            _tabla_horarios_cache[clave_cache] = horarios_procesados
+            if len(_tabla_horarios_cache) > MAX_TABLA_HORARIOS_CACHE:
+                _tabla_horarios_cache.popitem(last=False)
+        return list(horarios_procesados)
     except psycopg2.Error as err:
         logger.error(f"❌ Error en consulta de horarios para {sucursal}: {err}")
         return []
@@ -302,7 +391,7 @@ def mapear_horarios_por_empleado(horarios_tabla, empleados_codigos):
                     "cruza_medianoche": cruza_medianoche,
                 }
 
-    print(
+    logger.info(
         f"✅ Se mapearon horarios para {empleados_mapeados} empleados usando código frappe"
     )
     return horarios_mapeados
@@ -327,21 +416,80 @@ def obtener_horarios_multi_quincena(
     """
     result = {}
 
-    if incluye_primera:
+    if incluye_primera and incluye_segunda:
+        # Ambas quincenas en una sola consulta, separadas después por su columna
+        horarios = obtener_tabla_horarios(sucursal, None, conn, codigos_frappe)
+        result[True] = [h for h in horarios if h.get("es_primera_quincena")]
+        result[False] = [h for h in horarios if not h.get("es_primera_quincena")]
+    elif incluye_primera:
         result[True] = obtener_tabla_horarios(sucursal, True, conn, codigos_frappe)
-        print(
+    elif incluye_segunda:
+        result[False] = obtener_tabla_horarios(sucursal, False, conn, codigos_frappe)
+
+    if True in result:
+        logger.info(
             f"✅ Se obtuvieron {len(result[True])} registros de horarios para la primera quincena"
         )
-
-    if incluye_segunda:
-        result[False] = obtener_tabla_horarios(sucursal, False, conn, codigos_frappe)
-        print(
+    if False in result:
+        logger.info(
             f"✅ Se obtuvieron {len(result[False])} registros de horarios para la segunda quincena"
         )
 
     return result
 
 
+def _invalida_indice(metodo):
+    """Envuelve un método de dict que modifica el caché para descartar su índice."""
+
+    @wraps(metodo)
+    def envoltura(self, *args, **kwargs):
+        self._indice = None
+        return metodo(self, *args, **kwargs)
+
+    return envoltura
+
+
+class HorariosMultiQuincena(dict):
+    """
+    Caché de horarios en formato multi-quincena
+    {codigo_frappe: {es_primera_quincena: {dia_semana: horario}}}.
+
+    Lo devuelve mapear_horarios_por_empleado_multi; el tipo deja fijado el
+    formato al construir el caché, de modo que las consultas no tengan que
+    deducirlo revisando las claves de cada empleado.
+
+    También guarda el índice plano que usa obtener_horario_empleado. Agregar,
+    reemplazar o quitar empleados lo invalida; tras editar en sitio los
+    horarios anidados de un empleado hay que llamar a invalidar_indice().
+    """
+
+    _indice = None
+
+    __setitem__ = _invalida_indice(dict.__setitem__)
+    __delitem__ = _invalida_indice(dict.__delitem__)
+    __ior__ = _invalida_indice(dict.__ior__)
+    clear = _invalida_indice(dict.clear)
+    pop = _invalida_indice(dict.pop)
+    popitem = _invalida_indice(dict.popitem)
+    setdefault = _invalida_indice(dict.setdefault)
+    update = _invalida_indice(dict.update)
+
+    def indice(self):
+        """Devuelve {(codigo_frappe, dia_semana, es_primera_quincena): horario}, construido una vez."""
+        if self._indice is None:
+            self._indice = _indexar_horarios(self)
+        return self._indice
+
+    def invalidar_indice(self):
+        """Descarta el índice para que la próxima consulta lo reconstruya."""
+        self._indice = None
+
+    def __reduce__(self):
+        # El índice no viaja al copiar o serializar (p. ej. a los procesos de
+        # trabajo); se reconstruye en la primera consulta
+        return (self.__class__, (dict(self),))
+
+
 def mapear_horarios_por_empleado_multi(horarios_por_quincena):
     """
     Mapea los horarios de ambas quincenas por código de empleado, día de la semana y quincena
@@ -365,7 +513,7 @@ def mapear_horarios_por_empleado_multi(horarios_por_quincena):
     ]
     dias_indices = {dias_semana[i - 1]: i for i in range(1, 8)}  # Lunes=1, Domingo=7
 
-    horarios_mapeados = {}
+    horarios_mapeados = HorariosMultiQuincena()
     empleados_mapeados = set()
 
     # Procesar cada quincena
@@ -406,7 +554,7 @@ def mapear_horarios_por_empleado_multi(horarios_por_quincena):
                         "cruza_medianoche": cruza_medianoche,
                     }
 
-    print(
+    logger.info(
         f"✅ Se mapearon horarios para {len(empleados_mapeados)} empleados usando código frappe en formato multi-quincena"
     )
     return horarios_mapeados
@@ -456,7 +604,9 @@ def obtener_horario_empleado(
 ):
     """
     Obtiene el horario de un empleado para un día específico desde el caché.
-    Versión optimizada con cache LRU para mejorar rendimiento.
+    Versión optimizada: con un HorariosMultiQuincena la primera consulta aplana
+    el caché en un índice guardado en el propio caché, y las siguientes son una
+    sola búsqueda en ese índice.
 
     Args:
         codigo_frappe: Código frappe del empleado
@@ -468,19 +618,53 @@ def obtener_horario_empleado(
     Returns:
         Diccionario con el horario o None si no existe
     """
-    # Almacenar el cache_horarios principal para acceso posterior
-    global _horario_cache
-    if '_main_cache' not in _horario_cache:
-        _horario_cache['_main_cache'] = cache_horarios
-
-    # Usar una versión simplificada del cache_horarios_id para el cache LRU
-    cache_horarios_id = id(cache_horarios) % 1000  # Simplificar para evitar problemas de memoria
+    if isinstance(cache_horarios, HorariosMultiQuincena):
+        return cache_horarios.indice().get(
+            (str(codigo_frappe), int(dia_semana), bool(es_primera_quincena))
+        )
 
-    horario, _ = obtener_horario_empleado_cached(
-        str(codigo_frappe), int(dia_semana), bool(es_primera_quincena), cache_horarios_id
+    # Otros cachés (formato legacy o armados a mano) no llevan índice, así que se
+    # consultan directamente y siempre reflejan su contenido actual
+    return obtener_horario_empleado_base(
+        str(codigo_frappe), int(dia_semana), bool(es_primera_quincena), cache_horarios
     )
 
-    return horario
+
+def _es_formato_multi(codigo_cache):
+    """
+    Indica si los horarios de un empleado están en formato multi-quincena, es
+    decir, si sus claves son True/False en lugar de días de la semana. Solo se
+    necesita para cachés que no vienen de mapear_horarios_por_empleado_multi.
+    """
+    # isinstance y no "True in codigo_cache": True == 1 coincidiría con el lunes
+    return any(isinstance(clave, bool) for clave in codigo_cache)
+
+
+def _indexar_horarios(cache_horarios):
+    """
+    Aplana el caché de horarios en un solo diccionario
+    {(codigo_frappe, dia_semana, es_primera_quincena): horario}, de modo que
+    cada consulta sea una sola búsqueda en lugar de recorrer los niveles anidados.
+
+    Los empleados en formato legacy {dia_semana: horario} quedan indexados con
+    ambas quincenas, igual que los resuelve obtener_horario_empleado_base.
+    """
+    indice = {}
+    es_multi = isinstance(cache_horarios, HorariosMultiQuincena)
+    for codigo, codigo_cache in cache_horarios.items():
+        if es_multi or _es_formato_multi(codigo_cache):
+            # Formato multi-quincena: cache[codigo][es_primera_quincena][dia_semana]
+            for es_primera_quincena, dias in codigo_cache.items():
+                for dia_semana, horario in dias.items():
+                    if horario:
+                        indice[(codigo, dia_semana, es_primera_quincena)] = horario
+        else:
+            # Formato legacy: cache[codigo][dia_semana]
+            for dia_semana, horario in codigo_cache.items():
+                if horario:
+                    indice[(codigo, dia_semana, True)] = horario
+                    indice[(codigo, dia_semana, False)] = horario
+    return indice
 
 
 def obtener_horario_empleado_base(
@@ -504,11 +688,7 @@ def obtener_horario_empleado_base(
 
     codigo_cache = cache_horarios[codigo_frappe]
 
-    # Detectar si estamos usando el formato multi-quincena
-    # En el formato multi-quincena, el valor en codigo_cache[True/False] es un dict de días
-    keys_bool = [k for k in codigo_cache.keys() if isinstance(k, bool)]
-
-    if keys_bool:
+    if isinstance(cache_horarios, HorariosMultiQuincena) or _es_formato_multi(codigo_cache):
         # Formato multi-quincena: cache[codigo][es_primera_quincena][dia_semana]
         if es_primera_quincena not in codigo_cache:
             return None
@@ -525,6 +705,8 @@ def clear_horario_cache():
     """
     global _horario_cache
     _horario_cache.clear()
+    _tabla_horarios_cache.clear()
+    _version_horarios_estado["disponible"] = True
     obtener_horario_empleado_cached.cache_clear()
     logger.info("✅ Caché de horarios limpiado")
 
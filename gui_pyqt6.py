@@ -5,6 +5,7 @@ This application provides a user-friendly interface to generate attendance repor
 with date selection, branch selection, and automatic Excel file opening capabilities.
 """
 
+import multiprocessing
 import os
 import platform
 import subprocess
@@ -36,12 +37,13 @@ from PyQt6.QtWidgets import (
 )
 
 from api_client import APIClient, procesar_permisos_empleados
-from config import validate_api_credentials
+from config import install_crash_flush_hooks, validate_api_credentials
 from data_processor import AttendanceProcessor
 from db_postgres_connection import (
     connect_db,
     mapear_horarios_por_empleado_multi,
     obtener_horarios_multi_quincena,
+    return_connection_to_pool,
 )
 from main import AttendanceReportManager
 from report_generator import ReportGenerator
@@ -144,24 +146,25 @@ class CustomAttendanceReportManager(AttendanceReportManager):
                 start_date, end_date
             )
 
-            cache_horarios = {}
-            horarios_por_quincena = obtener_horarios_multi_quincena(
-                sucursal,
-                conn_pg,
-                codigos_empleados_api,
-                incluye_primera=incluye_primera,
-                incluye_segunda=incluye_segunda,
-            )
+            # The pooled connection goes back to the pool even if the query fails
+            try:
+                horarios_por_quincena = obtener_horarios_multi_quincena(
+                    sucursal,
+                    conn_pg,
+                    codigos_empleados_api,
+                    incluye_primera=incluye_primera,
+                    incluye_segunda=incluye_segunda,
+                )
+            finally:
+                return_connection_to_pool(conn_pg)
 
             if not any(horarios_por_quincena.values()):
-                conn_pg.close()
                 return {
                     "success": False,
                     "error": f"No hay horarios para la sucursal '{sucursal}'. Verifica que los empleados tengan horarios asignados en la base de datos.",
                 }
 
             cache_horarios = mapear_horarios_por_empleado_multi(horarios_por_quincena)
-            conn_pg.close()
             step3_time = time.time() - step_start
 
             self.emit_progress(
@@ -177,13 +180,9 @@ class CustomAttendanceReportManager(AttendanceReportManager):
             df_detalle = self.processor.process_checkins_to_dataframe(
                 checkin_records, start_date, end_date
             )
-            df_detalle = self.processor.procesar_horarios_con_medianoche(
-                df_detalle, cache_horarios
-            )
-            df_detalle = self.processor.analizar_asistencia_con_horarios_cache(
+            df_detalle = self.processor.procesar_turnos_y_retardos(
                 df_detalle, cache_horarios
             )
-            df_detalle = self.processor.aplicar_calculo_horas_descanso(df_detalle)
             df_detalle = self.processor.ajustar_horas_esperadas_con_permisos(
                 df_detalle, permisos_dict, cache_horarios
             )
@@ -697,6 +696,7 @@ class AttendanceReportGUI(QMainWindow):
 
 def main():
     """Main function to start the GUI application."""
+    install_crash_flush_hooks()
     app = QApplication(sys.argv)
 
     # Set application properties
@@ -713,4 +713,7 @@ def main():
 
 
 if __name__ == "__main__":
+    # Worker processes (PROCESS_WORKERS > 1) re-run this entry point when
+    # spawned, e.g. on Windows or from a frozen build
+    multiprocessing.freeze_support()
     main()
@@ -6,15 +6,17 @@ This script coordinates all modules to generate comprehensive attendance reports
 from datetime import datetime
 import sys
 import logging
+import multiprocessing
 
 # Import our modular components
-from config import validate_api_credentials, setup_logging
+from config import validate_api_credentials, setup_logging, install_crash_flush_hooks
 from utils import obtener_codigos_empleados_api, determine_period_type
 from api_client import APIClient, procesar_permisos_empleados
 from data_processor import AttendanceProcessor
 from report_generator import ReportGenerator
 from db_postgres_connection import (
     connect_db,
+    return_connection_to_pool,
     obtener_horarios_multi_quincena,
     mapear_horarios_por_empleado_multi,
 )
@@ -57,9 +59,11 @@ class AttendanceReportManager:
             # Validate API credentials
             validate_api_credentials()
             
-            # Step 1: Fetch check-ins
-            logger.info("Paso 1: Obteniendo registros de entrada/salida...")
-            checkin_records = self.api_client.fetch_checkins(start_date, end_date, device_filter)
+            # Step 1: Fetch check-ins, leave applications and joining dates concurrently
+            logger.info("Paso 1: Obteniendo registros de entrada/salida, permisos y fechas de contratación...")
+            checkin_records, leave_records, all_joining_dates = self.api_client.fetch_all(
+                start_date, end_date, device_filter
+            )
             if not checkin_records:
                 logger.error(f"No se obtuvieron registros de entrada/salida para el dispositivo '{device_filter}' en el período {start_date} al {end_date}.")
                 logger.error("Posibles causas:")
@@ -71,14 +75,11 @@ class AttendanceReportManager:
 
             codigos_empleados_api = obtener_codigos_empleados_api(checkin_records)
 
-            # Step 2: Fetch leave applications
-            logger.info("Paso 2: Obteniendo solicitudes de permisos...")
-            leave_records = self.api_client.fetch_leave_applications(start_date, end_date)
+            # Step 2: Process leave applications
+            logger.info("Paso 2: Procesando solicitudes de permisos...")
             permisos_dict = procesar_permisos_empleados(leave_records)
 
-            # Step 2a: Fetch all employee joining dates
-            logger.info("Paso 2a: Obteniendo todas las fechas de contratación...")
-            all_joining_dates = self.api_client.fetch_employee_joining_dates()
+            # Step 2a: Index employee joining dates
             joining_dates_dict = {
                 str(rec["employee"]): datetime.strptime(
                     rec["date_of_joining"], "%Y-%m-%d"
@@ -94,15 +95,18 @@ class AttendanceReportManager:
                 return {"success": False, "error": "Falló la conexión a la base de datos"}
 
             incluye_primera, incluye_segunda = determine_period_type(start_date, end_date)
-            
-            cache_horarios = {}
-            horarios_por_quincena = obtener_horarios_multi_quincena(
-                sucursal,
-                conn_pg,
-                codigos_empleados_api,
-                incluye_primera=incluye_primera,
-                incluye_segunda=incluye_segunda,
-            )
+
+            # The pooled connection goes back to the pool even if the query fails
+            try:
+                horarios_por_quincena = obtener_horarios_multi_quincena(
+                    sucursal,
+                    conn_pg,
+                    codigos_empleados_api,
+                    incluye_primera=incluye_primera,
+                    incluye_segunda=incluye_segunda,
+                )
+            finally:
+                return_connection_to_pool(conn_pg)
             
             if not any(horarios_por_quincena.values()):
                 logger.error(f"No se encontraron horarios para la sucursal '{sucursal}'.")
@@ -111,24 +115,18 @@ class AttendanceReportManager:
                 logger.error("  2. Los empleados no tienen horarios configurados")
                 logger.error("  3. No hay empleados que coincidan con los códigos de la API")
                 logger.error("Sugerencia: Verifica que haya empleados con horarios asignados en la base de datos.")
-                conn_pg.close()
                 return {"success": False, "error": f"No hay horarios para la sucursal '{sucursal}'. Verifica que los empleados tengan horarios asignados en la base de datos."}
 
             cache_horarios = mapear_horarios_por_empleado_multi(horarios_por_quincena)
-            conn_pg.close()
 
             # Step 4: Process data
             logger.info("Paso 4: Procesando datos...")
             df_detalle = self.processor.process_checkins_to_dataframe(
                 checkin_records, start_date, end_date
             )
-            df_detalle = self.processor.procesar_horarios_con_medianoche(
+            df_detalle = self.processor.procesar_turnos_y_retardos(
                 df_detalle, cache_horarios
             )
-            df_detalle = self.processor.analizar_asistencia_con_horarios_cache(
-                df_detalle, cache_horarios
-            )
-            df_detalle = self.processor.aplicar_calculo_horas_descanso(df_detalle)
             df_detalle = self.processor.ajustar_horas_esperadas_con_permisos(
                 df_detalle, permisos_dict, cache_horarios
             )
@@ -189,7 +187,9 @@ def main():
     Can be run with command line arguments or by modifying the default values.
     """
     import argparse
-    
+
+    install_crash_flush_hooks()
+
     parser = argparse.ArgumentParser(description='Generar reporte de asistencia')
     parser.add_argument('--start', type=str, default="2025-07-01",
                        help='Fecha de inicio (YYYY-MM-DD)')
@@ -251,4 +251,7 @@ def main():
 
 
 if __name__ == "__main__":
+    # Worker processes (PROCESS_WORKERS > 1) re-run this entry point when
+    # spawned, e.g. on Windows or from a frozen build
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file
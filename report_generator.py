@@ -239,8 +239,8 @@ class ReportGenerator:
         # Save summary to CSV
         self._save_csv_with_fallback(resumen_final, OUTPUT_SUMMARY_REPORT, "resumen del período")
 
-        logger.debug("Visualización del Resumen del Período:")
-        logger.debug(resumen_final.to_string())
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Visualización del Resumen del Período:\n%s", resumen_final.to_string())
         return resumen_final
 
     def save_detailed_report(self, df: pd.DataFrame) -> str:
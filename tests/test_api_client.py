@@ -6,10 +6,24 @@ import pytest
 from unittest.mock import Mock, patch, MagicMock
 import requests
 import json
+import threading
+import time
 from datetime import datetime, date, timedelta
 
 import config
-from api_client import APIClient, procesar_permisos_empleados
+from api_client import (
+    APIClient, HTTP_POOL_MAXSIZE, procesar_permisos_empleados, _split_date_range
+)
+from async_api_client import AsyncAPIClient
+
+
+def _json_response(payload):
+    """Builds a mocked requests response whose body decodes to payload."""
+    response = Mock()
+    response.raise_for_status.return_value = None
+    response.json.return_value = payload
+    response.content = json.dumps(payload).encode()
+    return response
 
 
 class TestAPIClient:
@@ -25,19 +39,39 @@ class TestAPIClient:
         assert hasattr(self.client, 'leave_url')
         assert hasattr(self.client, 'page_length')
         assert hasattr(self.client, 'timeout')
-        assert self.client.page_length == 100
+        assert self.client.page_length == 500
         assert self.client.timeout == 30
+        assert isinstance(self.client.session, requests.Session)
+
+    def test_init_custom_page_length(self):
+        """Test that page_length can be overridden per client."""
+        client = APIClient(page_length=1000)
+        assert client.page_length == 1000
+
+    @patch('api_client.get_api_headers')
+    def test_headers_cached_per_client(self, mock_get_headers):
+        """Test that authentication headers are built only once per client."""
+        mock_get_headers.return_value = {'Authorization': 'token key:secret'}
+
+        assert self.client._get_headers() == {'Authorization': 'token key:secret'}
+        assert self.client._get_headers() is self.client._get_headers()
+        mock_get_headers.assert_called_once()
+
+    def test_context_manager_closes_session(self):
+        """Test that the client closes its pooled session on exit."""
+        with patch.object(requests.Session, 'close') as mock_close:
+            with APIClient() as client:
+                assert isinstance(client, APIClient)
+            mock_close.assert_called_once()
     
     def test_fetch_checkins_success(self):
         """Test successful checkin fetching."""
         with patch('config.API_SECRET', 'test_secret'), \
              patch('config.API_KEY', 'test_key'), \
-             patch('api_client.requests.get') as mock_get:
+             patch('api_client.requests.Session.get') as mock_get:
 
             # Mock successful API response
-            mock_response = Mock()
-            mock_response.raise_for_status.return_value = None
-            mock_response.json.return_value = {
+            mock_response = _json_response({
                 'data': [
                     {
                         'employee': 'EMP001',
@@ -50,11 +84,9 @@ class TestAPIClient:
                         'time': '2025-01-01T17:00:00Z'
                     }
                 ]
-            }
+            })
             # Terminate pagination loop
-            mock_response_empty = Mock()
-            mock_response_empty.raise_for_status.return_value = None
-            mock_response_empty.json.return_value = {'data': []}
+            mock_response_empty = _json_response({'data': []})
             mock_get.side_effect = [mock_response, mock_response_empty]
 
             # Execute
@@ -76,31 +108,246 @@ class TestAPIClient:
         """Test checkin fetching with pagination."""
         with patch('config.API_SECRET', 'test_secret'), \
              patch('config.API_KEY', 'test_key'), \
-             patch('api_client.requests.get') as mock_get:
+             patch('api_client.requests.Session.get') as mock_get:
 
             # Mock first page response
-            first_response = Mock()
-            first_response.raise_for_status.return_value = None
-            first_response.json.return_value = {
-                'data': [{'employee': f'EMP{i:03d}', 'employee_name': f'Employee {i}', 'time': '2025-01-01T08:30:00Z'} for i in range(100)]
-            }
+            first_response = _json_response({
+                'data': [{'employee': f'EMP{i:03d}', 'employee_name': f'Employee {i}', 'time': '2025-01-01T08:30:00Z'} for i in range(self.client.page_length)]
+            })
 
-            # Mock second page response (empty)
-            second_response = Mock()
-            second_response.raise_for_status.return_value = None
-            second_response.json.return_value = {'data': []}
+            # Mock following pages (empty)
+            empty_response = _json_response({'data': []})
 
-            mock_get.side_effect = [first_response, second_response]
+            def fake_get(url, params=None, **kwargs):
+                if url == config.COUNT_API_URL:
+                    return _json_response({})  # Count unavailable
+                return first_response if params['limit_start'] == 0 else empty_response
+
+            mock_get.side_effect = fake_get
 
             # Execute
             result = self.client.fetch_checkins('2025-01-01', '2025-01-01', '%test%')
 
-            # Verify
-            assert len(result) == 100
-            assert mock_get.call_count == 2
+            # Verify: first page, count request, then one concurrent wave of pages
+            assert len(result) == self.client.page_length
+            assert mock_get.call_count == 2 + self.client.max_workers
+
+    def test_fetch_checkins_normalizes_timezone(self):
+        """Test that UTC check-in times are converted to Mexico City time."""
+        with patch('config.API_SECRET', 'test_secret'), \
+             patch('config.API_KEY', 'test_key'), \
+             patch('api_client.requests.Session.get') as mock_get:
+
+            mock_response = _json_response({
+                'data': [
+                    {'employee': 'EMP001', 'employee_name': 'John Doe', 'time': '2025-01-01T14:30:00Z'},
+                    {'employee': 'EMP001', 'employee_name': 'John Doe', 'time': '2021-06-01T14:30:00Z'},
+                ]
+            })
+            mock_get.return_value = mock_response
+
+            result = self.client.fetch_checkins('2025-01-01', '2025-01-01', '%test%')
+
+            assert isinstance(result[0]['time'], datetime)
+            assert result[0]['time'].isoformat() == '2025-01-01T08:30:00-06:00'
+            # Before October 2022 Mexico City observed daylight saving time
+            assert result[1]['time'].isoformat() == '2021-06-01T09:30:00-05:00'
+
+    def test_fetch_checkins_as_string(self):
+        """Test that as_string returns ISO 8601 strings for the check-in times."""
+        with patch('config.API_SECRET', 'test_secret'), \
+             patch('config.API_KEY', 'test_key'), \
+             patch('api_client.requests.Session.get') as mock_get:
+
+            mock_get.return_value = _json_response({
+                'data': [
+                    {'employee': 'EMP001', 'employee_name': 'John Doe', 'time': '2025-01-01T14:30:00Z'},
+                ]
+            })
+
+            result = self.client.fetch_checkins('2025-01-01', '2025-01-01', '%test%', as_string=True)
+
+            assert result[0]['time'] == '2025-01-01T08:30:00-06:00'
+
+    def test_async_client_returns_same_time_type(self):
+        """Test that the async client normalizes check-in times like the sync one."""
+        payload = {
+            'data': [
+                {'employee': 'EMP001', 'employee_name': 'John Doe', 'time': '2025-01-01T14:30:00Z'},
+                {'employee': 'EMP001', 'employee_name': 'John Doe', 'time': '2021-06-01T14:30:00Z'},
+            ]
+        }
+        with patch('config.API_SECRET', 'test_secret'), \
+             patch('config.API_KEY', 'test_key'), \
+             patch('api_client.requests.Session.get', return_value=_json_response(payload)):
+            sync_result = self.client.fetch_checkins('2025-01-01', '2025-01-01', '%test%')
+
+        async_client = AsyncAPIClient()
+        async_result = async_client._normalize_timezones(json.loads(json.dumps(payload['data'])))
+        assert [r['time'] for r in async_result] == [r['time'] for r in sync_result]
+        assert all(isinstance(r['time'], datetime) for r in async_result)
+        assert async_result[0]['time'].isoformat() == '2025-01-01T08:30:00-06:00'
+
+        # Naive values take the per-record path and still come back as datetimes
+        naive = async_client._normalize_timezones([{'time': '2025-01-01 08:30:00'}])
+        assert isinstance(naive[0]['time'], datetime)
+        assert naive[0]['time'].tzinfo is not None
+
+        as_string = async_client._normalize_timezones(
+            json.loads(json.dumps(payload['data'])), as_string=True
+        )
+        assert as_string[0]['time'] == '2025-01-01T08:30:00-06:00'
+
+    def test_fetch_checkins_without_orjson(self):
+        """Test that pages are decoded from raw bytes with the stdlib when orjson is missing."""
+        with patch('config.API_SECRET', 'test_secret'), \
+             patch('config.API_KEY', 'test_key'), \
+             patch('api_client.orjson', None), \
+             patch('api_client.requests.Session.get') as mock_get:
+
+            mock_response = _json_response({
+                'data': [
+                    {'employee': 'EMP001', 'employee_name': 'John Doe', 'time': '2025-01-01T14:30:00Z'},
+                ]
+            })
+            mock_get.return_value = mock_response
+
+            result = self.client.fetch_checkins('2025-01-01', '2025-01-01', '%test%')
+
+            assert [r['employee'] for r in result] == ['EMP001']
+            mock_response.json.assert_not_called()
+
+    def test_fetch_checkins_concurrent_pages_keep_order(self):
+        """Test that concurrently fetched pages are merged in page order."""
+        with patch('config.API_SECRET', 'test_secret'), \
+             patch('config.API_KEY', 'test_key'), \
+             patch('api_client.requests.Session.get') as mock_get:
+
+            page_length = self.client.page_length
+            total_records = page_length * 3 + 10
+
+            def fake_get(url, params=None, **kwargs):
+                if url == config.COUNT_API_URL:
+                    return _json_response({'message': total_records})
+                start = params['limit_start']
+                end = min(start + params['limit_page_length'], total_records)
+                response = _json_response({
+                    'data': [
+                        {'employee': f'EMP{i:04d}', 'employee_name': f'Employee {i}', 'time': '2025-01-01T08:30:00Z'}
+                        for i in range(start, end)
+                    ]
+                })
+                return response
+
+            mock_get.side_effect = fake_get
+
+            result = self.client.fetch_checkins('2025-01-01', '2025-01-01', '%test%')
+
+            assert len(result) == total_records
+            assert [r['employee'] for r in result] == [f'EMP{i:04d}' for i in range(total_records)]
+            # First page, count request and exactly the three remaining pages
+            assert mock_get.call_count == 5
+
+    def test_fetch_checkins_exact_multiple_uses_count(self):
+        """Test that a server-side count avoids requesting an empty trailing page."""
+        with patch('config.API_SECRET', 'test_secret'), \
+             patch('config.API_KEY', 'test_key'), \
+             patch('api_client.requests.Session.get') as mock_get:
+
+            page_length = self.client.page_length
+            total_records = page_length * 2
+
+            def fake_get(url, params=None, **kwargs):
+                if url == config.COUNT_API_URL:
+                    assert params['doctype'] == 'Employee Checkin'
+                    assert 'filters' in params
+                    return _json_response({'message': total_records})
+                start = params['limit_start']
+                end = min(start + params['limit_page_length'], total_records)
+                return _json_response({
+                    'data': [
+                        {'employee': f'EMP{i:04d}', 'employee_name': f'Employee {i}', 'time': '2025-01-01T08:30:00Z'}
+                        for i in range(start, end)
+                    ]
+                })
+
+            mock_get.side_effect = fake_get
+
+            result = self.client.fetch_checkins('2025-01-01', '2025-01-01', '%test%')
+
+            assert len(result) == total_records
+            requested_offsets = [
+                c[1]['params']['limit_start'] for c in mock_get.call_args_list
+                if c[0][0] != config.COUNT_API_URL
+            ]
+            assert requested_offsets == [0, page_length]
     
+    def test_fetch_checkins_shards_wide_ranges_by_week(self):
+        """Test that wide date ranges are fetched as disjoint week-sized windows."""
+        with patch('config.API_SECRET', 'test_secret'), \
+             patch('config.API_KEY', 'test_key'), \
+             patch('api_client.requests.Session.get') as mock_get:
+
+            def fake_get(url, params=None, **kwargs):
+                window = json.loads(params['filters'])[0][3]
+                return _json_response({
+                    'data': [{'employee': 'EMP001', 'employee_name': 'John Doe', 'time': f'{window[0]}T14:30:00Z'}]
+                })
+
+            mock_get.side_effect = fake_get
+
+            result = self.client.fetch_checkins('2025-01-01', '2025-01-20', '%test%')
+
+            windows = sorted(json.loads(c[1]['params']['filters'])[0][3] for c in mock_get.call_args_list)
+            assert windows == [
+                ['2025-01-01', '2025-01-07'],
+                ['2025-01-08', '2025-01-14'],
+                ['2025-01-15', '2025-01-20'],
+            ]
+            # Results are merged in window order
+            assert [r['time'].date() for r in result] == [date(2025, 1, 1), date(2025, 1, 8), date(2025, 1, 15)]
+
+    def test_fetch_checkins_requests_bounded_by_pool(self):
+        """Test that windows and pages never put more requests in flight than the pool holds."""
+        with patch('config.API_SECRET', 'test_secret'), \
+             patch('config.API_KEY', 'test_key'), \
+             patch('api_client.requests.Session.get') as mock_get:
+
+            page_length = self.client.page_length
+            total_records = page_length * 6
+            lock = threading.Lock()
+            in_flight = [0]
+            peak = [0]
+
+            def fake_get(url, params=None, **kwargs):
+                with lock:
+                    in_flight[0] += 1
+                    peak[0] = max(peak[0], in_flight[0])
+                time.sleep(0.005)
+                with lock:
+                    in_flight[0] -= 1
+                if url == config.COUNT_API_URL:
+                    return _json_response({'message': total_records})
+                start = params['limit_start']
+                end = min(start + params['limit_page_length'], total_records)
+                return _json_response({
+                    'data': [
+                        {'employee': f'EMP{i:04d}', 'employee_name': f'Employee {i}', 'time': '2025-01-01T08:30:00Z'}
+                        for i in range(start, end)
+                    ]
+                })
+
+            mock_get.side_effect = fake_get
+
+            # Five week-sized windows of six pages each
+            result = self.client.fetch_checkins('2025-01-01', '2025-02-04', '%test%')
+
+            assert len(result) == total_records * 5
+            assert peak[0] <= HTTP_POOL_MAXSIZE
+            assert self.client._executor._max_workers == HTTP_POOL_MAXSIZE
+
     @patch('api_client.get_api_headers')
-    @patch('api_client.requests.get')
+    @patch('api_client.requests.Session.get')
     def test_fetch_checkins_missing_credentials(self, mock_get, mock_get_headers):
         """Test checkin fetching with missing API credentials."""
         mock_get_headers.side_effect = ValueError("Missing API credentials")
@@ -112,7 +359,7 @@ class TestAPIClient:
         """Test checkin fetching with API error."""
         with patch('config.API_SECRET', 'test_secret'), \
              patch('config.API_KEY', 'test_key'), \
-             patch('api_client.requests.get') as mock_get:
+             patch('api_client.requests.Session.get') as mock_get:
             mock_get.side_effect = requests.exceptions.RequestException("API Error")
             result = self.client.fetch_checkins('2025-01-01', '2025-01-01', '%test%')
             assert result == []
@@ -121,16 +368,14 @@ class TestAPIClient:
         """Test successful leave application fetching."""
         with patch('config.API_SECRET', 'test_secret'), \
              patch('config.API_KEY', 'test_key'), \
-             patch('api_client.requests.get') as mock_get:
+             patch('api_client.requests.Session.get') as mock_get:
 
-            mock_response = Mock()
-            mock_response.raise_for_status.return_value = None
-            mock_response.json.return_value = {
+            mock_response = _json_response({
                 'data': [
                     {'employee': 'EMP001', 'employee_name': 'John Doe', 'leave_type': 'Vacations', 'from_date': '2025-01-01', 'to_date': '2025-01-01', 'status': 'Approved', 'half_day': 0},
                     {'employee': 'EMP002', 'employee_name': 'Jane Smith', 'leave_type': 'Sick Leave', 'from_date': '2025-01-02', 'to_date': '2025-01-03', 'status': 'Approved', 'half_day': 1}
                 ]
-            }
+            })
             mock_response_empty = Mock()
             mock_response_empty.raise_for_status.return_value = None
             mock_response_empty.json.return_value = {'data': []}
@@ -144,25 +389,40 @@ class TestAPIClient:
             assert result[1]['half_day'] == 1
             mock_get.assert_called()
 
+            # Filters travel as query params against the constant resource URL
+            call_args = mock_get.call_args_list[0]
+            assert call_args[0][0] == self.client.leave_url
+            assert json.loads(call_args[1]['params']['filters']) == [
+                ["status", "=", "Approved"],
+                ["from_date", ">=", "2025-01-01"],
+                ["to_date", "<=", "2025-01-03"],
+            ]
+
     def test_fetch_leave_applications_timeout(self):
-        """Test leave application fetching with timeout."""
+        """Test that a timeout surviving the adapter retries is not retried forever."""
         with patch('config.API_SECRET', 'test_secret'), \
              patch('config.API_KEY', 'test_key'), \
-             patch('api_client.requests.get') as mock_get:
+             patch('api_client.requests.Session.get') as mock_get:
 
             timeout_response = requests.exceptions.Timeout("Timeout")
-            success_response = Mock()
-            success_response.raise_for_status.return_value = None
-            success_response.json.return_value = {'data': []}
+            success_response = _json_response({'data': []})
             mock_get.side_effect = [timeout_response, success_response]
 
             result = self.client.fetch_leave_applications('2025-01-01', '2025-01-03')
 
             assert result == []
-            assert mock_get.call_count == 2
+            assert mock_get.call_count == 1
+
+    def test_session_retries_are_bounded(self):
+        """Test that the pooled session retries GETs a bounded number of times."""
+        retries = self.client.session.get_adapter('https://erp.asiatech.com.mx').max_retries
+
+        assert retries.total == 3
+        assert retries.backoff_factor == 0.5
+        assert 'GET' in retries.allowed_methods
     
     @patch('api_client.get_api_headers')
-    @patch('api_client.requests.get')
+    @patch('api_client.requests.Session.get')
     def test_fetch_leave_applications_missing_credentials(self, mock_get, mock_get_headers):
         """Test leave application fetching with missing credentials."""
         mock_get_headers.side_effect = ValueError("Missing API credentials")
@@ -174,7 +434,7 @@ class TestAPIClient:
         """Test leave application fetching with API error."""
         with patch('config.API_SECRET', 'test_secret'), \
              patch('config.API_KEY', 'test_key'), \
-             patch('api_client.requests.get') as mock_get:
+             patch('api_client.requests.Session.get') as mock_get:
             mock_get.side_effect = requests.exceptions.RequestException("API Error")
             result = self.client.fetch_leave_applications('2025-01-01', '2025-01-03')
             assert result == []
@@ -183,16 +443,14 @@ class TestAPIClient:
         """Test successful fetching of employee joining dates."""
         with patch('config.API_SECRET', 'test_secret'), \
              patch('config.API_KEY', 'test_key'), \
-             patch('api_client.requests.get') as mock_get:
+             patch('api_client.requests.Session.get') as mock_get:
 
-            mock_response = Mock()
-            mock_response.raise_for_status.return_value = None
-            mock_response.json.return_value = {
+            mock_response = _json_response({
                 'data': [
                     {'employee': 'EMP001', 'date_of_joining': '2020-01-15'},
                     {'employee': 'EMP002', 'date_of_joining': '2021-03-10'}
                 ]
-            }
+            })
             mock_get.return_value = mock_response
 
             result = self.client.fetch_employee_joining_dates('2025-01-01', '2025-01-31')
@@ -205,34 +463,83 @@ class TestAPIClient:
             assert self.client.employee_url == call_args[0][0]
             assert json.loads(call_args[1]['params']['fields']) == ["employee", "date_of_joining"]
 
+    def test_fetch_all_runs_all_three_fetchers(self):
+        """Test that fetch_all returns check-ins, leaves and joining dates in order."""
+        with patch('config.API_SECRET', 'test_secret'), \
+             patch('config.API_KEY', 'test_key'), \
+             patch('api_client.requests.Session.get') as mock_get:
+
+            def fake_get(url, params=None, **kwargs):
+                if url == self.client.checkin_url:
+                    return _json_response({'data': [
+                        {'employee': 'EMP001', 'employee_name': 'John Doe', 'time': '2025-01-01T14:30:00Z'}
+                    ]})
+                if url == self.client.leave_url:
+                    return _json_response({'data': [leave]})
+                return _json_response({'data': [{'date_of_joining': '2022-01-01'}]})
+
+            leave = {
+                'employee': 'EMP001', 'employee_name': 'John Doe', 'leave_type': 'Vacations',
+                'from_date': '2025-01-02', 'to_date': '2025-01-02', 'status': 'Approved', 'half_day': 0,
+            }
+            mock_get.side_effect = fake_get
+
+            checkins, leaves, employees = self.client.fetch_all('2025-01-01', '2025-01-31', '%test%')
+
+            # One check-in request per week-sized window, all on the shared executor
+            assert len(checkins) == 5
+            assert leaves == [leave]
+            assert employees == [{'date_of_joining': '2022-01-01'}]
+            assert mock_get.call_count == 7
+            assert self.client._executor._max_workers == HTTP_POOL_MAXSIZE
+
+    def test_fetch_all_isolates_failing_resource(self):
+        """Test that a failing resource in fetch_all does not discard the others."""
+        with patch('config.API_SECRET', 'test_secret'), \
+             patch('config.API_KEY', 'test_key'), \
+             patch('api_client.requests.Session.get') as mock_get:
+
+            def fake_get(url, params=None, **kwargs):
+                if url == self.client.leave_url:
+                    raise requests.exceptions.RequestException("API Error")
+                if url == self.client.checkin_url:
+                    return _json_response({'data': [
+                        {'employee': 'EMP001', 'employee_name': 'John Doe', 'time': '2025-01-01T14:30:00Z'}
+                    ]})
+                return _json_response({'data': [{'date_of_joining': '2022-01-01'}]})
+
+            mock_get.side_effect = fake_get
+
+            checkins, leaves, employees = self.client.fetch_all('2025-01-01', '2025-01-01', '%test%')
+
+            assert len(checkins) == 1
+            assert leaves == []
+            assert employees == [{'date_of_joining': '2022-01-01'}]
+
     def test_fetch_employee_joining_dates_pagination(self):
         """Test fetching employee joining dates with pagination."""
         with patch('config.API_SECRET', 'test_secret'), \
              patch('config.API_KEY', 'test_key'), \
-             patch('api_client.requests.get') as mock_get:
+             patch('api_client.requests.Session.get') as mock_get:
 
-            first_response = Mock()
-            first_response.raise_for_status.return_value = None
-            first_response.json.return_value = {
-                'data': [{'employee': f'EMP{i:03d}', 'date_of_joining': '2022-01-01'} for i in range(100)]
-            }
+            first_response = _json_response({
+                'data': [{'employee': f'EMP{i:03d}', 'date_of_joining': '2022-01-01'} for i in range(self.client.page_length)]
+            })
 
-            second_response = Mock()
-            second_response.raise_for_status.return_value = None
-            second_response.json.return_value = {'data': []}
+            second_response = _json_response({'data': []})
 
             mock_get.side_effect = [first_response, second_response]
 
             result = self.client.fetch_employee_joining_dates('2025-01-01', '2025-01-31')
 
-            assert len(result) == 100
+            assert len(result) == self.client.page_length
             assert mock_get.call_count == 2
 
     def test_fetch_employee_joining_dates_api_error(self):
         """Test fetching employee joining dates with an API error."""
         with patch('config.API_SECRET', 'test_secret'), \
              patch('config.API_KEY', 'test_key'), \
-             patch('api_client.requests.get') as mock_get:
+             patch('api_client.requests.Session.get') as mock_get:
             mock_get.side_effect = requests.exceptions.RequestException("API Error")
             result = self.client.fetch_employee_joining_dates('2025-01-01', '2025-01-31')
             assert result == []
@@ -431,6 +738,47 @@ class TestProcesarPermisosEmpleados:
         assert 'leave_type_normalized' in leave_info
         # The normalization should be handled by the normalize_leave_type function
 
+    def test_procesar_permisos_empleados_full_day_shares_entry(self):
+        """Test that all days of a full-day leave share one read-only entry."""
+        leave_data = [
+            {
+                'employee': 'EMP001',
+                'employee_name': 'John Doe',
+                'leave_type': 'Vacations',
+                'from_date': '2025-01-01',
+                'to_date': '2025-01-03',
+                'status': 'Approved',
+                'half_day': 0
+            }
+        ]
+
+        result = procesar_permisos_empleados(leave_data)
+
+        entries = [result['EMP001'][date(2025, 1, day)] for day in (1, 2, 3)]
+        assert entries[0] is entries[1] is entries[2]
+        assert entries[0]['from_date'] == date(2025, 1, 1)
+        assert entries[0]['to_date'] == date(2025, 1, 3)
+
+
+class TestSplitDateRange:
+    """Tests for the _split_date_range helper."""
+
+    def test_single_window(self):
+        """Test that a short range stays in one window."""
+        assert _split_date_range('2025-01-01', '2025-01-05', 7) == [('2025-01-01', '2025-01-05')]
+
+    def test_contiguous_windows(self):
+        """Test that windows are contiguous, disjoint and cover the range."""
+        assert _split_date_range('2025-01-29', '2025-02-12', 7) == [
+            ('2025-01-29', '2025-02-04'),
+            ('2025-02-05', '2025-02-11'),
+            ('2025-02-12', '2025-02-12'),
+        ]
+
+    def test_unparseable_range(self):
+        """Test that unparseable dates fall back to a single window."""
+        assert _split_date_range('2025-01-01 08:00', '2025-01-31', 7) == [('2025-01-01 08:00', '2025-01-31')]
+
 
 class TestAPIClientIntegration:
     """Integration tests for APIClient with realistic scenarios."""
@@ -20,7 +20,8 @@ from config import (
     API_SECRET,
     API_URL,
     LEAVE_API_URL,
-    DIAS_ESPANOL
+    DIAS_ESPANOL,
+    DIAS_ESPANOL_BY_IDX,
 )
 
 
@@ -77,6 +78,15 @@ class TestConfigConstants:
         assert OUTPUT_SUMMARY_REPORT == "resumen_periodo.csv"
         assert OUTPUT_HTML_DASHBOARD == "dashboard_asistencia.html"
 
+    def test_dias_espanol_by_idx_matches_weekday(self):
+        """Test that DIAS_ESPANOL_BY_IDX is indexed by datetime.weekday()."""
+        from datetime import date
+
+        monday = date(2025, 1, 6)
+        for offset in range(7):
+            day = monday + timedelta(days=offset)
+            assert DIAS_ESPANOL_BY_IDX[day.weekday()] == DIAS_ESPANOL[day.strftime("%A")]
+
 
 class TestValidateApiCredentials:
     """Tests for API credential validation function."""
@@ -267,6 +277,77 @@ class TestEnvironmentVariableHandling:
                 validate_api_credentials()
 
 
+class TestBusinessRulesValidation:
+    """Tests for the startup validation of business rules."""
+
+    def test_default_rules_are_valid(self):
+        """Test that the shipped configuration passes validation."""
+        from config import BusinessRules
+        BusinessRules.validate_all()
+
+    def test_rejects_wrong_type(self):
+        """Test that a non-integer threshold is rejected."""
+        from config import BusinessRules
+        with patch.object(BusinessRules, 'TOLERANCIA_RETARDO_MINUTOS', "15"):
+            with pytest.raises(ValueError, match="TOLERANCIA_RETARDO_MINUTOS"):
+                BusinessRules.validate_all()
+
+    def test_rejects_bool_for_numeric_rule(self):
+        """Test that a bool is not accepted where a number is expected."""
+        from config import BusinessRules
+        with patch.object(BusinessRules, 'GRACE_MINUTES', True):
+            with pytest.raises(ValueError, match="GRACE_MINUTES"):
+                BusinessRules.validate_all()
+
+    def test_rejects_negative_value(self):
+        """Test that negative values are rejected."""
+        from config import BusinessRules
+        with patch.object(BusinessRules, 'MIN_CHECKINS_FOR_BREAK', -1):
+            with pytest.raises(ValueError, match="MIN_CHECKINS_FOR_BREAK"):
+                BusinessRules.validate_all()
+
+    def test_rejects_unknown_leave_action(self):
+        """Test that leave policies must use a known action."""
+        from config import BusinessRules
+        with patch.dict(POLITICA_PERMISOS, {"permiso especial": "descontar"}):
+            with pytest.raises(ValueError, match="descontar"):
+                BusinessRules.validate_all()
+
+
+class TestApiHeaders:
+    """Tests for the cached API headers."""
+
+    def setup_method(self):
+        from config import get_api_headers
+        get_api_headers.cache_clear()
+
+    def teardown_method(self):
+        from config import get_api_headers
+        get_api_headers.cache_clear()
+
+    def test_headers_built_once_and_read_only(self):
+        """Test that get_api_headers returns the same immutable mapping."""
+        from config import get_api_headers
+
+        with patch('config.API_KEY', 'key'), patch('config.API_SECRET', 'secret'):
+            headers = get_api_headers()
+            assert headers == {"Authorization": "token key:secret"}
+            assert get_api_headers() is headers
+            with pytest.raises(TypeError):
+                headers["Authorization"] = "otro"
+
+    def test_missing_credentials_not_cached(self):
+        """Test that a failed validation is retried on the next call."""
+        from config import get_api_headers
+
+        with patch('config.API_KEY', None), patch('config.API_SECRET', None):
+            with pytest.raises(ValueError):
+                get_api_headers()
+
+        with patch('config.API_KEY', 'key'), patch('config.API_SECRET', 'secret'):
+            assert get_api_headers()["Authorization"] == "token key:secret"
+
+
 class TestConfigRobustness:
     """Test configuration robustness and error handling."""
     
@@ -300,4 +381,196 @@ class TestConfigRobustness:
             assert isinstance(constant, (int, str, float, tuple, frozenset, type(None)))
         
         # POLITICA_PERMISOS is expected to be a dict (mutable but intended as config)
-        assert isinstance(POLITICA_PERMISOS, dict)
\ No newline at end of file
+        assert isinstance(POLITICA_PERMISOS, dict)
+
+class TestSetupLogging:
+    """Tests for the queued logging configuration."""
+
+    def test_records_reach_file_through_queue(self, tmp_path):
+        """Test that the root logger enqueues records and the listener writes them."""
+        import logging
+        from logging.handlers import QueueHandler
+        import config
+
+        root = logging.getLogger()
+        saved_handlers, saved_level = root.handlers[:], root.level
+        log_file = tmp_path / "test.log"
+        try:
+            with patch('config.LOG_FILE', str(log_file)):
+                config.setup_logging(force=True)
+
+            assert len(root.handlers) == 1
+            assert isinstance(root.handlers[0], QueueHandler)
+
+            logging.getLogger("test_config").debug("mensaje en cola")
+            config._stop_log_listener()
+
+            assert "mensaje en cola" in log_file.read_text(encoding="utf-8")
+        finally:
+            config._stop_log_listener()
+            root.handlers[:] = saved_handlers
+            root.setLevel(saved_level)
+
+    def test_setup_logging_is_idempotent(self, tmp_path):
+        """Test that a second call keeps the existing handlers unless forced."""
+        import logging
+        import config
+
+        root = logging.getLogger()
+        saved_handlers, saved_level = root.handlers[:], root.level
+        try:
+            with patch('config.LOG_FILE', str(tmp_path / "test.log")):
+                config.setup_logging(force=True)
+                handler = root.handlers[0]
+                listener = config._log_listener
+
+                config.setup_logging()
+                assert root.handlers == [handler]
+                assert config._log_listener is listener
+
+                config.setup_logging(force=True)
+                assert config._log_listener is not listener
+        finally:
+            config._stop_log_listener()
+            root.handlers[:] = saved_handlers
+            root.setLevel(saved_level)
+
+    def test_console_line_format(self, tmp_path, capsys):
+        """Test that console lines keep the 'LEVEL - message' format."""
+        import logging
+        import config
+
+        root = logging.getLogger()
+        saved_handlers, saved_level = root.handlers[:], root.level
+        try:
+            with patch('config.LOG_FILE', str(tmp_path / "test.log")):
+                config.setup_logging(force=True)
+
+            logging.getLogger("test_config").info("procesando %s empleados", 3)
+            logging.getLogger("test_config").debug("solo en archivo")
+            config._stop_log_listener()
+        finally:
+            config._stop_log_listener()
+            root.handlers[:] = saved_handlers
+            root.setLevel(saved_level)
+
+        err = capsys.readouterr().err
+        assert "INFO - procesando 3 empleados\n" in err
+        assert "solo en archivo" not in err
+
+    def test_sigterm_flushes_buffered_records(self, tmp_path):
+        """Test that the SIGTERM handler drains the buffer before chaining."""
+        import logging
+        import signal
+        import config
+
+        root = logging.getLogger()
+        saved_handlers, saved_level = root.handlers[:], root.level
+        log_file = tmp_path / "test.log"
+        previous = Mock()
+        try:
+            with patch('config.LOG_FILE', str(log_file)):
+                config.setup_logging(force=True)
+
+            logging.getLogger("test_config").info("antes de terminar")
+            with patch('config._previous_sigterm_handler', previous):
+                config._flush_logs_on_sigterm(signal.SIGTERM, None)
+
+            previous.assert_called_once_with(signal.SIGTERM, None)
+            assert config._log_listener is None
+            assert "antes de terminar" in log_file.read_text(encoding="utf-8")
+        finally:
+            config._stop_log_listener()
+            root.handlers[:] = saved_handlers
+            root.setLevel(saved_level)
+
+    def test_setup_logging_leaves_process_hooks_alone(self, tmp_path):
+        """Test that only install_crash_flush_hooks touches SIGTERM and faulthandler."""
+        import logging
+        import signal
+        import config
+
+        root = logging.getLogger()
+        saved_handlers, saved_level = root.handlers[:], root.level
+        previous = Mock()
+        saved_sigterm = signal.signal(signal.SIGTERM, previous)
+        try:
+            with patch('config.LOG_FILE', str(tmp_path / "test.log")), \
+                    patch('config.faulthandler.enable') as enable:
+                config.setup_logging(force=True)
+                assert signal.getsignal(signal.SIGTERM) is previous
+                enable.assert_not_called()
+
+            with patch('config._sigterm_handler_installed', False), \
+                    patch('config._previous_sigterm_handler', None), \
+                    patch('config.faulthandler.is_enabled', return_value=False), \
+                    patch('config.faulthandler.enable') as enable:
+                config.install_crash_flush_hooks()
+                enable.assert_called_once()
+                assert signal.getsignal(signal.SIGTERM) is config._flush_logs_on_sigterm
+                assert config._previous_sigterm_handler is previous
+        finally:
+            signal.signal(signal.SIGTERM, saved_sigterm)
+            config._stop_log_listener()
+            root.handlers[:] = saved_handlers
+            root.setLevel(saved_level)
+
+    def test_socket_sink_replaces_file(self, tmp_path):
+        """Test that LOG_SINK=socket sends detailed records to a SocketHandler."""
+        import logging
+        from logging.handlers import SocketHandler
+        import config
+
+        root = logging.getLogger()
+        saved_handlers, saved_level = root.handlers[:], root.level
+        log_file = tmp_path / "test.log"
+        socket_path = str(tmp_path / "attendance.sock")
+        try:
+            with patch('config.LOG_SINK', 'socket'), \
+                 patch('config.LOG_SOCKET_PATH', socket_path), \
+                 patch('config.LOG_FILE', str(log_file)):
+                config.setup_logging(force=True)
+
+            socket_handlers = [
+                h for h in config._log_listener.handlers if isinstance(h, SocketHandler)
+            ]
+            assert len(socket_handlers) == 1
+            assert socket_handlers[0].host == socket_path
+            assert socket_handlers[0].port is None
+        finally:
+            config._stop_log_listener()
+            root.handlers[:] = saved_handlers
+            root.setLevel(saved_level)
+
+        assert not log_file.exists()
+
+    def test_file_writes_are_buffered_until_error(self, tmp_path):
+        """Test that file records are held in memory until an ERROR record flushes them."""
+        import logging
+        import time
+        import config
+
+        root = logging.getLogger()
+        saved_handlers, saved_level = root.handlers[:], root.level
+        log_file = tmp_path / "test.log"
+        try:
+            with patch('config.LOG_FILE', str(log_file)):
+                config.setup_logging(force=True)
+
+            test_logger = logging.getLogger("test_config")
+            test_logger.debug("registro en buffer")
+            time.sleep(0.1)
+            # The file is only created when the buffer is first flushed
+            assert not log_file.exists()
+
+            test_logger.error("registro de error")
+            deadline = time.time() + 2
+            while not log_file.exists() or "registro de error" not in log_file.read_text(encoding="utf-8"):
+                assert time.time() < deadline
+                time.sleep(0.01)
+
+            assert "registro en buffer" in log_file.read_text(encoding="utf-8")
+        finally:
+            config._stop_log_listener()
+            root.handlers[:] = saved_handlers
+            root.setLevel(saved_level)
@@ -146,6 +146,25 @@ class TestCruceMedianoche:
         # Verificar cálculo de horas
         assert fila_dia_1['horas_trabajadas'] == '01:55:00'  # 23:10 a 01:05
 
+    def test_cruce_medianoche_ignora_marcas_ilegibles(self, processor, cache_horarios_nocturno):
+        """Las marcas que no son HH:MM:SS no participan en el reparto entre turnos."""
+        df = pd.DataFrame({
+            'employee': ['EMP001', 'EMP001'],
+            'dia': [date(2025, 7, 15), date(2025, 7, 16)],
+            'dia_iso': [2, 3],
+            'es_primera_quincena': [True, True],
+            'checado_1': ['23:10:00', '---'],
+            'checado_2': [None, '01:05:00'],
+            'horas_trabajadas': ['00:00:00', '00:00:00'],
+        })
+
+        resultado = processor.procesar_horarios_con_medianoche(df, cache_horarios_nocturno)
+
+        fila_dia_1 = resultado[resultado['dia'] == date(2025, 7, 15)].iloc[0]
+        assert fila_dia_1['checado_1'] == '23:10:00'
+        assert fila_dia_1['checado_2'] == '01:05:00'
+        assert fila_dia_1['horas_trabajadas'] == '01:55:00'
+
     def test_cruce_medianoche_sin_dia_siguiente(self, processor, cache_horarios_nocturno):
         """Prueba el caso donde no hay día siguiente (último día del periodo)."""
         df = pd.DataFrame({
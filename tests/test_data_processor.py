@@ -2,11 +2,14 @@
 Tests for data_processor.py - AttendanceProcessor class
 """
 
+import logging
 import pytest
 import pandas as pd
+import numpy as np
 from datetime import datetime, timedelta, date, time
 from unittest.mock import Mock, patch, MagicMock
 
+import data_processor
 from data_processor import AttendanceProcessor
 
 
@@ -136,6 +139,33 @@ class TestAttendanceProcessor:
         assert emp_row['checado_3'] == '13:00:00'
         assert emp_row['checado_4'] == '17:00:00'
     
+    def test_process_checkins_to_dataframe_pivot_intercalado(self):
+        """Interleaved check-ins land in their own employee/day row, in arrival order."""
+        checkin_data = [
+            {'employee': 'EMP002', 'employee_name': 'Jane Smith', 'time': '2025-01-02T09:00:00'},
+            {'employee': 'EMP001', 'employee_name': 'John Doe', 'time': '2025-01-01T08:00:00'},
+            {'employee': 'EMP002', 'employee_name': 'Jane Smith', 'time': '2025-01-02T14:00:00'},
+            {'employee': 'EMP001', 'employee_name': 'John Doe', 'time': '2025-01-01T12:00:00'},
+            {'employee': 'EMP002', 'employee_name': 'Jane Smith', 'time': '2025-01-02T18:00:00'},
+        ]
+
+        result = self.processor.process_checkins_to_dataframe(
+            checkin_data, '2025-01-01', '2025-01-02'
+        ).set_index(['employee', 'dia'])
+
+        assert list(result.filter(like='checado_').columns) == ['checado_1', 'checado_2', 'checado_3']
+        assert result.loc[('EMP002', date(2025, 1, 2)), ['checado_1', 'checado_2', 'checado_3']].tolist() == [
+            '09:00:00', '14:00:00', '18:00:00'
+        ]
+        assert result.loc[('EMP001', date(2025, 1, 1)), 'checado_2'] == '12:00:00'
+        assert pd.isna(result.loc[('EMP001', date(2025, 1, 1)), 'checado_3'])
+        assert pd.isna(result.loc[('EMP001', date(2025, 1, 2)), 'checado_1'])
+
+    def test_es_primera_quincena_vectorizado(self):
+        """Days 1-15 are the first fortnight; missing days are not."""
+        dias = pd.Series([date(2025, 1, 1), date(2025, 1, 15), date(2025, 1, 16), None])
+        assert data_processor._es_primera_quincena(dias).tolist() == [True, True, False, False]
+
     def test_calcular_horas_descanso_insufficient_checkins(self):
         """Test break calculation with insufficient checkins."""
         # Create a mock row with less than 4 checkins
@@ -174,6 +204,20 @@ class TestAttendanceProcessor:
         result = self.processor.calcular_horas_descanso(test_row)
         # Should be 0.5 hours (10:30-10:00) + 1 hour (13:00-12:00) = 1.5 hours
         assert result == timedelta(hours=1, minutes=30)
+
+    def test_calcular_horas_descanso_columnas_precalculadas(self):
+        """Columns passed by the caller are used in numeric order without rescanning."""
+        test_row = pd.Series({
+            'checado_10': '17:00:00',
+            'checado_1': '08:00:00',
+            'checado_2': '12:00:00',
+            'checado_3': '13:00:00',
+            'otro': 'x',
+        })
+        columnas = ['checado_1', 'checado_2', 'checado_3', 'checado_10']
+
+        assert self.processor.calcular_horas_descanso(test_row, columnas) == timedelta(hours=1)
+        assert self.processor.calcular_horas_descanso(test_row) == timedelta(hours=1)
     
     @patch('data_processor.obtener_horario_empleado')
     def test_procesar_horarios_con_medianoche_no_midnight_crossing(self, mock_obtener_horario):
@@ -235,6 +279,70 @@ class TestAttendanceProcessor:
         assert not result.empty
         # Additional assertions would depend on the specific night shift logic
     
+    @patch('data_processor.obtener_horario_empleado')
+    def test_procesar_horarios_con_medianoche_consulta_por_clave_unica(self, mock_obtener_horario):
+        """Schedules are looked up per unique key, not once per row."""
+        mock_obtener_horario.return_value = {
+            'hora_entrada': '08:00',
+            'hora_salida': '17:00',
+            'cruza_medianoche': False,
+            'horas_totales': 8.0
+        }
+
+        dias = [date(2025, 1, 6) + timedelta(days=14 * semana) for semana in range(2)] * 10
+        df = pd.DataFrame({
+            'employee': ['EMP001'] * 20,
+            'dia': dias,
+            'dia_iso': [1] * 20,
+            'es_primera_quincena': [d.day <= 15 for d in dias],
+            'checado_1': ['08:00:00'] * 20,
+            'checado_2': ['17:00:00'] * 20,
+        })
+
+        result = self.processor.procesar_horarios_con_medianoche(df, {})
+
+        # Two (day, fortnight) keys, each looked up for the row's day and the day before
+        assert mock_obtener_horario.call_count == 4
+        pd.testing.assert_frame_equal(result, df)
+
+    def test_matriz_checados_int32_con_centinela(self):
+        """The check-in matrix holds int32 seconds and _SIN_CHECADA for missing values."""
+        df = pd.DataFrame({
+            'checado_2': ['12:00:00', '09:00:00'],
+            'checado_1': ['08:00:00', None],
+            'checado_3': ['---', 'a las 5'],
+        })
+
+        columnas, segundos, irregular = data_processor._matriz_checados(df)
+
+        assert columnas == ['checado_1', 'checado_2', 'checado_3']
+        assert segundos.dtype == np.int32
+        assert segundos.tolist() == [
+            [8 * 3600, 12 * 3600, data_processor._SIN_CHECADA],
+            [data_processor._SIN_CHECADA, 9 * 3600, data_processor._SIN_CHECADA],
+        ]
+        assert irregular.tolist() == [False, True]
+
+    def test_procesar_turnos_y_retardos_parsea_checadas_una_vez(self):
+        """The early-departure and break passes share one check-in matrix."""
+        checkin_data = [
+            {'employee': 'EMP001', 'employee_name': 'Empleado', 'time': f'2025-01-01 {hora}'}
+            for hora in ('08:00:00', '12:00:00', '13:00:00', '16:00:00')
+        ]
+        horario = {'hora_entrada': '08:00', 'hora_salida': '17:00',
+                   'cruza_medianoche': False, 'horas_totales': 9.0}
+        df = self.processor.process_checkins_to_dataframe(checkin_data, '2025-01-01', '2025-01-01')
+
+        with patch('data_processor._matriz_checados',
+                   wraps=data_processor._matriz_checados) as parse:
+            result = self.processor.procesar_turnos_y_retardos(
+                df, {'EMP001': {True: {3: horario}}}, max_workers=1
+            )
+
+        assert parse.call_count == 1
+        assert result.loc[0, 'horas_descanso'] == '01:00:00'
+        assert bool(result.loc[0, 'salida_anticipada']) is True
+
     def test_aplicar_calculo_horas_descanso_empty_df(self):
         """Test break calculation application on empty DataFrame."""
         df = pd.DataFrame()
@@ -305,7 +413,144 @@ class TestAttendanceProcessor:
         assert result.iloc[0]['hora_entrada_programada'] == '08:00'
         assert result.iloc[0]['tipo_retardo'] == 'Retardo'  # 30 minutes late
         assert result.iloc[0]['minutos_tarde'] == 30
-    
+
+    @patch('data_processor.obtener_horario_empleado')
+    def test_analizar_asistencia_consulta_horario_una_vez_por_clave(self, mock_obtener_horario):
+        """Each (employee, day, fortnight) key is looked up once and merged onto every row."""
+        horarios = {
+            ('EMP001', 3): {'hora_entrada': '08:00', 'hora_salida': '17:00',
+                            'cruza_medianoche': False, 'horas_totales': 8.0},
+            ('EMP002', 3): {'hora_entrada': '22:00', 'hora_salida': '06:00',
+                            'cruza_medianoche': True, 'horas_totales': 7.5},
+        }
+        mock_obtener_horario.side_effect = (
+            lambda employee, dia_iso, es_primera, cache: horarios.get((employee, dia_iso))
+        )
+
+        df = pd.DataFrame({
+            'employee': ['EMP002', 'EMP001', 'EMP002', 'EMP001'],
+            'dia': [date(2025, 1, 1), date(2025, 1, 1), date(2025, 1, 2), date(2025, 1, 2)],
+            'dia_iso': [3, 3, 4, 4],
+            'checado_1': ['22:05:00', '08:00:00', '22:00:00', '08:00:00'],
+            'checado_2': ['06:00:00', '17:00:00', '06:00:00', '17:00:00'],
+        })
+
+        result = self.processor.analizar_asistencia_con_horarios_cache(df, {})
+
+        assert mock_obtener_horario.call_count == 4
+        por_clave = result.set_index(['employee', 'dia'])
+        assert por_clave.loc[('EMP001', date(2025, 1, 1)), 'hora_entrada_programada'] == '08:00'
+        assert por_clave.loc[('EMP001', date(2025, 1, 1)), 'horas_esperadas'] == '8:00:00'
+        assert por_clave.loc[('EMP002', date(2025, 1, 1)), 'hora_entrada_programada'] == '22:00'
+        assert por_clave.loc[('EMP002', date(2025, 1, 1)), 'cruza_medianoche'] == True
+        assert por_clave.loc[('EMP002', date(2025, 1, 1)), 'horas_esperadas'] == '7:30:00'
+        assert pd.isna(por_clave.loc[('EMP001', date(2025, 1, 2)), 'hora_entrada_programada'])
+        assert por_clave.loc[('EMP001', date(2025, 1, 2)), 'tipo_retardo'] == 'Día no Laborable'
+
+    @patch('data_processor.obtener_horario_empleado')
+    def test_analizar_asistencia_clasifica_retardos(self, mock_obtener_horario):
+        """Tardiness covers on-time, late, unjustified, missing and night-shift entries."""
+        horarios = {
+            'DIA': {'hora_entrada': '08:00', 'hora_salida': '17:00',
+                    'cruza_medianoche': False, 'horas_totales': 8.0},
+            'NOCHE': {'hora_entrada': '23:30', 'hora_salida': '07:00',
+                      'cruza_medianoche': True, 'horas_totales': 7.5},
+        }
+        mock_obtener_horario.side_effect = (
+            lambda employee, dia_iso, es_primera, cache: horarios[employee.split('_')[0]]
+        )
+
+        df = pd.DataFrame({
+            'employee': ['DIA_1', 'DIA_2', 'DIA_3', 'DIA_4', 'NOCHE_1', 'NOCHE_2', 'DIA_5'],
+            'dia': [date(2025, 1, 2)] * 7,
+            'dia_iso': [4] * 7,
+            'checado_1': ['08:10:00', '08:45:30', '09:30:00', None, '00:20:00', None, '07:50:00'],
+            'checado_2': ['17:00:00', None, None, None, None, '07:00:00', '17:00:00'],
+        })
+
+        result = self.processor.analizar_asistencia_con_horarios_cache(df, {}).set_index('employee')
+
+        assert result.loc['DIA_1', 'tipo_retardo'] == 'A Tiempo'
+        assert result.loc['DIA_2', 'tipo_retardo'] == 'Retardo'
+        assert result.loc['DIA_2', 'minutos_tarde'] == 45
+        assert result.loc['DIA_3', 'tipo_retardo'] == 'Falta Injustificada'
+        assert result.loc['DIA_4', 'tipo_retardo'] == 'Falta'
+        assert result.loc['NOCHE_1', 'tipo_retardo'] == 'Retardo'
+        assert result.loc['NOCHE_1', 'minutos_tarde'] == 50
+        assert result.loc['NOCHE_2', 'tipo_retardo'] == 'Falta Entrada Nocturno'
+        assert result.loc['DIA_5', 'tipo_retardo'] == 'A Tiempo'
+        assert result.loc['DIA_5', 'minutos_tarde'] == -10
+
+    @patch('data_processor.obtener_horario_empleado')
+    def test_analizar_asistencia_detecta_salida_anticipada(self, mock_obtener_horario):
+        """Early departure uses the last check-in, shifted past midnight for night shifts."""
+        horarios = {
+            'DIA': {'hora_entrada': '08:00', 'hora_salida': '17:00',
+                    'cruza_medianoche': False, 'horas_totales': 8.0},
+            'NOCHE': {'hora_entrada': '22:00', 'hora_salida': '06:00',
+                      'cruza_medianoche': True, 'horas_totales': 8.0},
+        }
+        mock_obtener_horario.side_effect = (
+            lambda employee, dia_iso, es_primera, cache: horarios[employee.split('_')[0]]
+        )
+
+        df = pd.DataFrame({
+            'employee': ['DIA_1', 'DIA_2', 'DIA_3', 'NOCHE_1', 'NOCHE_2'],
+            'dia': [date(2025, 1, 2)] * 5,
+            'dia_iso': [4] * 5,
+            'checado_1': ['08:00:00', '08:00:00', '08:00:00', '22:00:00', '22:00:00'],
+            'checado_2': ['16:00:00', '12:00:00', None, '05:00:00', '23:50:00'],
+            'checado_3': [None, '16:55:00', None, '06:05:00', '05:58:00'],
+        })
+
+        result = self.processor.analizar_asistencia_con_horarios_cache(df, {}).set_index('employee')
+
+        assert result.loc['DIA_1', 'salida_anticipada'] == True
+        assert result.loc['DIA_2', 'salida_anticipada'] == False
+        assert result.loc['DIA_3', 'salida_anticipada'] == False
+        assert result.loc['NOCHE_1', 'salida_anticipada'] == False
+        assert result.loc['NOCHE_2', 'salida_anticipada'] == False
+
+    def test_procesar_turnos_y_retardos_en_paralelo_igual_a_secuencial(self):
+        """Splitting employees across worker processes gives the sequential result."""
+        checkin_data = [
+            {'employee': emp, 'employee_name': f'Empleado {emp}', 'time': f'2025-01-0{dia} {hora}'}
+            for emp in ['EMP001', 'EMP002', 'EMP003']
+            for dia in (1, 2)
+            for hora in ('08:20:00', '17:00:00', '22:05:00')
+        ]
+        horario_dia = {'hora_entrada': '08:00', 'hora_salida': '17:00',
+                       'cruza_medianoche': False, 'horas_totales': 9.0}
+        horario_noche = {'hora_entrada': '22:00', 'hora_salida': '06:00',
+                         'cruza_medianoche': True, 'horas_totales': 8.0}
+        cache_horarios = {
+            'EMP001': {True: {3: horario_dia, 4: horario_dia}},
+            'EMP002': {True: {3: horario_noche, 4: horario_noche}},
+            'EMP003': {True: {3: horario_dia}},
+        }
+        df = self.processor.process_checkins_to_dataframe(checkin_data, '2025-01-01', '2025-01-02')
+
+        secuencial = self.processor.procesar_turnos_y_retardos(df.copy(), cache_horarios, max_workers=1)
+        paralelo = self.processor.procesar_turnos_y_retardos(df.copy(), cache_horarios, max_workers=2)
+
+        pd.testing.assert_frame_equal(paralelo, secuencial)
+
+    def test_procesar_turnos_y_retardos_reenvia_logs_de_workers(self, caplog):
+        """Records logged inside worker processes reach the parent's handlers."""
+        checkin_data = [
+            {'employee': emp, 'employee_name': f'Empleado {emp}', 'time': f'2025-01-01 {hora}'}
+            for emp in ['EMP001', 'EMP002']
+            for hora in ('08:20:00', '17:00:00')
+        ]
+        df = self.processor.process_checkins_to_dataframe(checkin_data, '2025-01-01', '2025-01-01')
+
+        with caplog.at_level(logging.DEBUG, logger='data_processor'):
+            self.processor.procesar_turnos_y_retardos(df, {}, max_workers=2)
+
+        # Only the workers run the midnight step when the work is split
+        mensajes = [r.getMessage() for r in caplog.records if r.name == 'data_processor']
+        assert mensajes.count("Procesando turnos que cruzan medianoche...") == 2
+
     def test_ajustar_horas_esperadas_con_permisos_no_permits(self):
         """Test hours adjustment without permits."""
         df = pd.DataFrame({
@@ -386,6 +631,44 @@ class TestAttendanceProcessor:
         assert result.iloc[0]['tiene_permiso'] == True
         assert result.iloc[0]['es_permiso_medio_dia'] == True
         assert result.iloc[0]['horas_esperadas'] == '04:00:00'  # Half of 8 hours
+
+    def test_ajustar_horas_esperadas_con_permisos_mixed_rows(self):
+        """Leaves are matched per (employee, day) and each policy is applied row by row."""
+        df = pd.DataFrame({
+            'employee': [101, 101, 101, 'EMP002'],
+            'dia': [date(2025, 1, 1), date(2025, 1, 2), date(2025, 1, 3), date(2025, 1, 1)],
+            'horas_esperadas': ['07:30:00', '08:00:00', 'sin horario', '08:00:00']
+        })
+
+        permisos_dict = {
+            '101': {
+                date(2025, 1, 1): {
+                    'leave_type': 'Personal Leave',
+                    'leave_type_normalized': 'personal',
+                    'is_half_day': True
+                },
+                date(2025, 1, 2): {
+                    'leave_type': 'Permiso sin goce',
+                    'leave_type_normalized': 'permiso sin goce',
+                    'is_half_day': False
+                },
+                date(2025, 1, 3): {
+                    'leave_type': 'Personal Leave',
+                    'leave_type_normalized': 'personal',
+                    'is_half_day': True
+                }
+            }
+        }
+
+        result = self.processor.ajustar_horas_esperadas_con_permisos(df, permisos_dict, {})
+
+        assert result['tiene_permiso'].tolist() == [True, True, True, False]
+        assert result['horas_esperadas'].tolist() == ['03:45:00', '08:00:00', '00:00:00', '08:00:00']
+        assert result['horas_descontadas_permiso'].tolist() == [
+            '03:45:00', '00:00:00', 'sin horario', '00:00:00'
+        ]
+        assert result['es_permiso_sin_goce'].tolist() == [False, True, False, False]
+        assert pd.isna(result.iloc[3]['tipo_permiso'])
     
     def test_aplicar_regla_perdon_retardos_basic(self):
         """Test basic tardiness forgiveness rule."""
@@ -137,3 +137,37 @@ def test_td_to_str_preserva_duracion_mayor_24_horas():
     td_25_horas = pd.Timedelta(hours=25, minutes=30, seconds=45)
 
     assert td_to_str(td_25_horas) == "25:30:45"
+
+
+def test_calculo_vectorizado_coincide_con_calculo_por_fila(processor):
+    """El cálculo vectorizado da el mismo resultado que calcular_horas_descanso."""
+    import random
+
+    rng = random.Random(7)
+    filas = []
+    for _ in range(300):
+        fila = {"employee": 1, "dia": "2025-01-01"}
+        for i in range(1, 9):
+            opcion = rng.random()
+            if opcion < 0.3:
+                valor = None
+            elif opcion < 0.35:
+                valor = "---"
+            else:
+                # Few distinct minutes so repeated entry/exit values also occur
+                valor = f"{rng.choice([0, 8, 12, 13, 18, 23]):02}:{rng.choice([0, 3, 30]):02}:00"
+            fila[f"checado_{i}"] = valor
+        filas.append(fila)
+    # Formats outside HH:MM:SS go through the per-row path
+    filas[0].update({"checado_1": "08:00", "checado_2": "12:00", "checado_3": "13:00", "checado_4": "17:00"})
+
+    df = pd.DataFrame(filas)
+    df["horas_trabajadas"] = "00:00:00"
+    df["horas_esperadas"] = "00:00:00"
+
+    resultado = processor.aplicar_calculo_horas_descanso(df.copy())
+
+    for posicion in range(len(df)):
+        esperado = processor.calcular_horas_descanso(df.iloc[posicion])
+        assert resultado["horas_descanso_td"].iloc[posicion] == esperado
+        assert resultado["horas_descanso"].iloc[posicion] == td_to_str(esperado)
@@ -56,10 +56,9 @@ class TestAttendanceReportManager:
         mock_mapear_horarios.return_value = {'EMP001': {'08:00': '17:00'}}
         
         # Mock API client methods
-        self.manager.api_client.fetch_checkins = Mock(return_value=[
+        self.manager.api_client.fetch_all = Mock(return_value=([
             {'employee': 'EMP001', 'employee_name': 'Test Employee', 'time': '2025-01-01T08:00:00'}
-        ])
-        self.manager.api_client.fetch_leave_applications = Mock(return_value=[])
+        ], [], []))
         
         # Mock processor methods
         mock_df = pd.DataFrame({
@@ -104,8 +103,7 @@ class TestAttendanceReportManager:
         assert result['employees_processed'] == 2
         
         # Verify method calls
-        self.manager.api_client.fetch_checkins.assert_called_once()
-        self.manager.api_client.fetch_leave_applications.assert_called_once()
+        self.manager.api_client.fetch_all.assert_called_once_with('2025-01-01', '2025-01-15', '%test%')
         self.manager.processor.process_checkins_to_dataframe.assert_called_once()
         self.manager.report_generator.save_detailed_report.assert_called_once()
     
@@ -113,7 +111,7 @@ class TestAttendanceReportManager:
         """Test handling when no check-ins are found."""
         
         # Mock API client to return no checkins
-        self.manager.api_client.fetch_checkins = Mock(return_value=[])
+        self.manager.api_client.fetch_all = Mock(return_value=([], [], []))
         
         result = self.manager.generate_attendance_report(
             start_date='2025-01-01',
@@ -133,10 +131,9 @@ class TestAttendanceReportManager:
         mock_connect_db.return_value = None
         
         # Mock API client to return checkins
-        self.manager.api_client.fetch_checkins = Mock(return_value=[
+        self.manager.api_client.fetch_all = Mock(return_value=([
             {'employee': 'EMP001', 'employee_name': 'Test Employee', 'time': '2025-01-01T08:00:00'}
-        ])
-        self.manager.api_client.fetch_leave_applications = Mock(return_value=[])
+        ], [], []))
         
         result = self.manager.generate_attendance_report(
             start_date='2025-01-01',
@@ -179,10 +176,9 @@ class TestAttendanceReportManager:
             # Mock no schedules found
             mock_obtener_horarios.return_value = {'primera': [], 'segunda': []}
             
-            self.manager.api_client.fetch_checkins = Mock(return_value=[
+            self.manager.api_client.fetch_all = Mock(return_value=([
                 {'employee': 'EMP001', 'employee_name': 'Test Employee', 'time': '2025-01-01T08:00:00'}
-            ])
-            self.manager.api_client.fetch_leave_applications = Mock(return_value=[])
+            ], [], []))
             
             result = self.manager.generate_attendance_report(
                 start_date='2025-01-01',
@@ -195,6 +191,34 @@ class TestAttendanceReportManager:
             assert 'No hay horarios' in result['error']
 
 
+    @patch('main.obtener_horarios_multi_quincena')
+    def test_generate_attendance_report_returns_connection_on_schedule_error(self, mock_obtener_horarios):
+        """The pooled connection is returned even when the schedule query raises."""
+        conn = MagicMock()
+
+        with patch('main.validate_api_credentials'), \
+             patch('main.connect_db', return_value=conn), \
+             patch('main.return_connection_to_pool') as mock_return, \
+             patch('main.obtener_codigos_empleados_api', return_value=['EMP001']), \
+             patch('main.determine_period_type', return_value=(True, False)):
+
+            mock_obtener_horarios.side_effect = RuntimeError("consulta fallida")
+
+            self.manager.api_client.fetch_all = Mock(return_value=([
+                {'employee': 'EMP001', 'employee_name': 'Test Employee', 'time': '2025-01-01T08:00:00'}
+            ], [], []))
+
+            result = self.manager.generate_attendance_report(
+                start_date='2025-01-01',
+                end_date='2025-01-15',
+                sucursal='Test Branch',
+                device_filter='%test%'
+            )
+
+            assert result['success'] is False
+            mock_return.assert_called_once_with(conn)
+
+
 class TestMainFunction:
     """Tests for the main() function."""
     
@@ -306,8 +330,7 @@ class TestEndToEndIntegration:
             }
         ]
         
-        with patch.object(manager.api_client, 'fetch_checkins', return_value=checkin_data), \
-             patch.object(manager.api_client, 'fetch_leave_applications', return_value=[]), \
+        with patch.object(manager.api_client, 'fetch_all', return_value=(checkin_data, [], [])), \
              patch('main.obtener_codigos_empleados_api', return_value=['EMP001']), \
              patch('main.procesar_permisos_empleados', return_value={}), \
              patch('main.determine_period_type', return_value=(True, False)), \
@@ -185,6 +185,24 @@ class TestPerdonRetardos:
         assert df_resultado.iloc[2]["descuento_por_3_retardos"] == "No"
         assert df_resultado.iloc[3]["descuento_por_3_retardos"] == "Sí (3er retardo)"
 
+    def test_retardos_acumulados_no_desborda_en_rangos_largos(self):
+        """Test: El acumulado sigue siendo correcto con más de 127 retardos por empleado."""
+        dias = pd.date_range("2025-01-01", periods=200, freq="D").date
+        df = pd.DataFrame({
+            "employee": ["EMP008"] * 200,
+            "dia": dias,
+            "tipo_retardo": ["Retardo"] * 200,
+            "minutos_tarde": [20] * 200,
+            "horas_trabajadas": ["07:00:00"] * 200,
+            "horas_esperadas": ["08:00:00"] * 200,
+        })
+
+        df_resultado = AttendanceProcessor().aplicar_regla_perdon_retardos(df)
+
+        assert df_resultado["es_retardo_acumulable"].dtype == "int8"
+        assert df_resultado["retardos_acumulados"].iloc[-1] == 200
+        assert (df_resultado["descuento_por_3_retardos"] == "Sí (3er retardo)").sum() == 66
+
     def test_manejo_valores_nulos_y_especiales(self):
         """Test: Verificar manejo correcto de valores nulos y especiales."""
         # Crear DataFrame de prueba con valores problemáticos
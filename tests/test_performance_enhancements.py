@@ -5,6 +5,7 @@ Tests connection pooling, caching, async patterns, structured logging, and perfo
 
 import pytest
 import asyncio
+import aiohttp
 import time
 import json
 import tempfile
@@ -18,16 +19,25 @@ from datetime import datetime, timedelta
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+import db_postgres_connection
 from db_postgres_connection import (
     get_connection_pool,
     get_connection_from_pool,
     return_connection_to_pool,
+    obtener_horario_empleado,
     obtener_horario_empleado_cached,
     clear_horario_cache,
     get_cache_stats,
     connection_context_manager
 )
-from async_api_client import AsyncAPIClient, AsyncAPIClientConfig, fetch_all_data_async
+from async_api_client import (
+    AsyncAPIClient,
+    AsyncAPIClientConfig,
+    close_shared_client,
+    fetch_all_data,
+    fetch_all_data_async,
+    get_shared_client,
+)
 from structured_logger import StructuredLogger, LogLevel, get_logger, configure_logging
 from performance_monitor import PerformanceMonitor, get_performance_monitor, monitor_performance
 
@@ -156,6 +166,86 @@ class TestCaching:
         assert 'local_cache_size' in stats
         assert stats['lru_cache']['hits'] >= 1
 
+    def test_obtener_horario_empleado_rebuilt_cache_invalidates_memo(self):
+        """A rebuilt schedule cache must not be answered from the previous one."""
+        clear_horario_cache()
+
+        cache_viejo = {'123': {True: {1: {'hora_entrada': '08:00', 'hora_salida': '17:00'}}}}
+        cache_nuevo = {'123': {True: {1: {'hora_entrada': '22:00', 'hora_salida': '06:00'}}}}
+
+        assert obtener_horario_empleado('123', 1, True, cache_viejo)['hora_entrada'] == '08:00'
+        assert obtener_horario_empleado('123', 1, True, cache_viejo)['hora_entrada'] == '08:00'
+        assert obtener_horario_empleado('123', 1, True, cache_nuevo)['hora_entrada'] == '22:00'
+        assert obtener_horario_empleado('456', 1, True, cache_nuevo) is None
+
+        clear_horario_cache()
+
+    def test_obtener_horario_empleado_indexa_una_vez_por_cache(self):
+        """The schedule cache is flattened once; later lookups only read the index."""
+        cache_horarios = db_postgres_connection.HorariosMultiQuincena({
+            '123': {True: {1: {'hora_entrada': '08:00'}}, False: {1: {'hora_entrada': '09:00'}}},
+        })
+
+        with patch('db_postgres_connection._indexar_horarios',
+                   wraps=db_postgres_connection._indexar_horarios) as mock_indexar:
+            assert obtener_horario_empleado('123', 1, True, cache_horarios)['hora_entrada'] == '08:00'
+            assert obtener_horario_empleado(123, 1, False, cache_horarios)['hora_entrada'] == '09:00'
+            assert obtener_horario_empleado('123', 2, False, cache_horarios) is None
+
+        assert mock_indexar.call_count == 1
+
+    def test_obtener_horario_empleado_cache_mutado_invalida_indice(self):
+        """Adding, replacing or removing employees in place is seen by the next lookup."""
+        cache_horarios = db_postgres_connection.HorariosMultiQuincena({
+            '123': {True: {1: {'hora_entrada': '08:00'}}},
+        })
+        assert obtener_horario_empleado('123', 1, True, cache_horarios)['hora_entrada'] == '08:00'
+
+        cache_horarios['456'] = {True: {1: {'hora_entrada': '07:00'}}}
+        assert obtener_horario_empleado('456', 1, True, cache_horarios)['hora_entrada'] == '07:00'
+
+        cache_horarios.update({'123': {True: {1: {'hora_entrada': '22:00'}}}})
+        assert obtener_horario_empleado('123', 1, True, cache_horarios)['hora_entrada'] == '22:00'
+
+        del cache_horarios['456']
+        assert obtener_horario_empleado('456', 1, True, cache_horarios) is None
+
+        # Nested edits need an explicit invalidation
+        cache_horarios['123'][True][1] = {'hora_entrada': '06:00'}
+        cache_horarios.invalidar_indice()
+        assert obtener_horario_empleado('123', 1, True, cache_horarios)['hora_entrada'] == '06:00'
+
+    def test_obtener_horario_empleado_legacy_sin_indice(self):
+        """Plain dict caches (legacy format) are read directly and always reflect their content."""
+        cache_horarios = {'456': {2: {'hora_entrada': '07:00'}}}
+
+        assert obtener_horario_empleado('456', 2, True, cache_horarios)['hora_entrada'] == '07:00'
+        assert obtener_horario_empleado('456', 2, False, cache_horarios)['hora_entrada'] == '07:00'
+
+        cache_horarios['456'][2] = {'hora_entrada': '10:00'}
+        assert obtener_horario_empleado('456', 2, True, cache_horarios)['hora_entrada'] == '10:00'
+
+
+class _FakeCountResponse:
+    """Response returned by a patched session.get for frappe.client.get_count."""
+
+    def __init__(self, total=None, status=200):
+        self.total = total
+        self.status = status
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        pass
+
+    def raise_for_status(self):
+        if self.status >= 400:
+            raise aiohttp.ClientResponseError(Mock(), (), status=self.status)
+
+    async def read(self):
+        return json.dumps({'message': self.total}).encode()
+
 
 class TestAsyncAPIClient:
     """Test async API client functionality."""
@@ -194,6 +284,32 @@ class TestAsyncAPIClient:
             assert client.headers is not None
             mock_get_headers.assert_called_once()
 
+    @pytest.mark.asyncio
+    @patch('async_api_client.get_api_headers')
+    async def test_connector_limit_per_host(self, mock_get_headers):
+        """Test that the per-host limit defaults to the whole pool and can be overridden."""
+        mock_get_headers.return_value = {'Authorization': 'Bearer token'}
+
+        async with AsyncAPIClient(AsyncAPIClientConfig(max_connections=12)) as client:
+            assert client.session.connector.limit_per_host == 12
+
+        config = AsyncAPIClientConfig(max_connections=12, limit_per_host=4)
+        async with AsyncAPIClient(config) as client:
+            assert client.session.connector.limit_per_host == 4
+
+    @pytest.mark.asyncio
+    @patch('async_api_client.aiodns', None)
+    @patch('async_api_client.get_api_headers')
+    async def test_async_client_without_aiodns(self, mock_get_headers):
+        """Test that the client falls back to aiohttp's default resolver without aiodns."""
+        mock_get_headers.return_value = {'Authorization': 'Bearer token'}
+
+        async with AsyncAPIClient() as client:
+            assert client._resolver is None
+            assert client.session is not None
+
+        assert client.session is None
+
     @pytest.mark.asyncio
     @patch('async_api_client.get_api_headers')
     async def test_make_request_with_retry(self, mock_get_headers):
@@ -206,7 +322,7 @@ class TestAsyncAPIClient:
 
         # Mock successful response
         mock_response = AsyncMock()
-        mock_response.json.return_value = {'data': [{'id': 1}]}
+        mock_response.read.return_value = json.dumps({'data': [{'id': 1}]}).encode()
         mock_response.raise_for_status = Mock()
 
         with patch.object(client.session, 'request') as mock_request:
@@ -214,6 +330,70 @@ class TestAsyncAPIClient:
 
             result = await client._make_request_with_retry('http://test.com', {'param': 'value'})
             assert result == {'data': [{'id': 1}]}
+            mock_response.json.assert_not_called()
+
+        await client.close()
+
+    @pytest.mark.asyncio
+    @patch('async_api_client.asyncio.sleep', new_callable=AsyncMock)
+    @patch('async_api_client.get_api_headers')
+    async def test_make_request_backoff_with_jitter(self, mock_get_headers, mock_sleep):
+        """Test that retries wait the exponential backoff plus at most 50% jitter."""
+        mock_get_headers.return_value = {'Authorization': 'Bearer token'}
+
+        config = AsyncAPIClientConfig(max_retries=2, retry_delay=0.1)
+        client = AsyncAPIClient(config)
+        assert client._backoff == [0.1, 0.2, 0.4]
+        await client._initialize_session()
+
+        with patch.object(client.session, 'request', side_effect=aiohttp.ClientError("boom")):
+            with pytest.raises(aiohttp.ClientError):
+                await client._make_request_with_retry('http://test.com', {})
+
+        delays = [c[0][0] for c in mock_sleep.await_args_list]
+        assert len(delays) == 2
+        assert 0.1 <= delays[0] <= 0.15
+        assert 0.2 <= delays[1] <= 0.3
+
+        await client.close()
+
+    @pytest.mark.asyncio
+    @patch('async_api_client.get_api_headers')
+    async def test_make_request_respects_max_inflight(self, mock_get_headers):
+        """Test that concurrent requests never exceed max_inflight."""
+        mock_get_headers.return_value = {'Authorization': 'Bearer token'}
+
+        client = AsyncAPIClient(AsyncAPIClientConfig(max_connections=10, max_inflight=2))
+        await client._initialize_session()
+
+        in_flight = 0
+        peak = 0
+
+        class FakeResponse:
+            async def __aenter__(self):
+                nonlocal in_flight, peak
+                in_flight += 1
+                peak = max(peak, in_flight)
+                await asyncio.sleep(0.01)
+                return self
+
+            async def __aexit__(self, *args):
+                nonlocal in_flight
+                in_flight -= 1
+
+            def raise_for_status(self):
+                pass
+
+            async def read(self):
+                return b'{"data": []}'
+
+        with patch.object(client.session, 'request', side_effect=lambda *a, **k: FakeResponse()):
+            results = await asyncio.gather(*[
+                client._make_request_with_retry('http://test.com', {'page': i}) for i in range(6)
+            ])
+
+        assert results == [{'data': []}] * 6
+        assert peak == 2
 
         await client.close()
 
@@ -244,6 +424,168 @@ class TestAsyncAPIClient:
 
         await client.close()
 
+    @pytest.mark.asyncio
+    @patch('async_api_client.get_api_headers')
+    async def test_paginate_stops_at_short_page(self, mock_get_headers):
+        """Test that pages are yielded in order until a short page is returned."""
+        mock_get_headers.return_value = {'Authorization': 'Bearer token'}
+
+        config = AsyncAPIClientConfig(page_length=2, max_connections=2)
+        client = AsyncAPIClient(config)
+        await client._initialize_session()
+
+        records = [{'id': i} for i in range(5)]
+
+        async def fake_request(url, params):
+            start = params['limit_start']
+            return {'data': records[start:start + params['limit_page_length']]}
+
+        # A forbidden count is tried once, with no retry backoff, before falling back
+        with patch.object(client, '_make_request_with_retry', side_effect=fake_request) as mock_request, \
+                patch.object(client.session, 'get', return_value=_FakeCountResponse(status=403)) as mock_get, \
+                patch('async_api_client.asyncio.sleep', new_callable=AsyncMock) as mock_sleep:
+            pages = [page async for page in client._paginate('http://test.com', {})]
+
+            assert pages == [records[0:2], records[2:4], records[4:5]]
+            mock_get.assert_called_once()
+            mock_sleep.assert_not_awaited()
+            offsets = [c[0][1]['limit_start'] for c in mock_request.call_args_list]
+            assert offsets[:3] == [0, 2, 4]
+            # At most one page past the end was already in flight when the short page arrived
+            assert len(offsets) <= 4
+
+        await client.close()
+
+    @pytest.mark.asyncio
+    @patch('async_api_client.get_api_headers')
+    async def test_paginate_requests_only_counted_pages(self, mock_get_headers):
+        """Test that with the total known no page past the end is requested."""
+        mock_get_headers.return_value = {'Authorization': 'Bearer token'}
+
+        config = AsyncAPIClientConfig(page_length=2, max_connections=4)
+        client = AsyncAPIClient(config)
+        await client._initialize_session()
+
+        records = [{'id': i} for i in range(6)]
+        filters = json.dumps([["status", "=", "Approved"]])
+
+        async def fake_request(url, params):
+            start = params['limit_start']
+            return {'data': records[start:start + params['limit_page_length']]}
+
+        with patch.object(client, '_make_request_with_retry', side_effect=fake_request) as mock_request, \
+                patch.object(client.session, 'get', return_value=_FakeCountResponse(len(records))) as mock_get:
+            pages = [
+                page async for page in client._paginate(
+                    'http://test.com/api/resource/Leave Application', {'filters': filters}
+                )
+            ]
+
+            assert pages == [records[0:2], records[2:4], records[4:6]]
+            mock_get.assert_called_once_with(
+                client.count_url, params={'doctype': 'Leave Application', 'filters': filters}
+            )
+            offsets = [c[0][1]['limit_start'] for c in mock_request.call_args_list]
+            assert sorted(offsets) == [0, 2, 4]
+
+        await client.close()
+
+    @pytest.mark.asyncio
+    @patch('async_api_client.get_api_headers')
+    async def test_fetch_leave_applications_uses_params(self, mock_get_headers):
+        """Test that leave filters are sent as params against the constant resource URL."""
+        mock_get_headers.return_value = {'Authorization': 'Bearer token'}
+
+        client = AsyncAPIClient(AsyncAPIClientConfig(page_length=10))
+        await client._initialize_session()
+
+        leave = {'employee': 'EMP001', 'employee_name': 'John Doe', 'leave_type': 'Vacations',
+                 'from_date': '2024-01-02', 'to_date': '2024-01-03', 'status': 'Approved', 'half_day': 0}
+
+        with patch.object(client, '_make_request_with_retry', return_value={'data': [leave]}) as mock_request:
+            result = await client.fetch_leave_applications_async('2024-01-01', '2024-01-31')
+
+            assert result == [leave]
+            url, params = mock_request.call_args[0]
+            assert url == client.leave_url
+            assert json.loads(params['filters']) == [
+                ["status", "=", "Approved"],
+                ["from_date", ">=", "2024-01-01"],
+                ["to_date", "<=", "2024-01-31"],
+            ]
+
+        await client.close()
+
+    @pytest.mark.asyncio
+    @patch('async_api_client.get_api_headers')
+    async def test_paginate_keeps_order_with_out_of_order_completion(self, mock_get_headers):
+        """Test that pages finishing out of order are still yielded in page order."""
+        mock_get_headers.return_value = {'Authorization': 'Bearer token'}
+
+        config = AsyncAPIClientConfig(page_length=2, max_connections=3)
+        client = AsyncAPIClient(config)
+        await client._initialize_session()
+
+        records = [{'id': i} for i in range(9)]
+
+        async def fake_request(url, params):
+            start = params['limit_start']
+            # Later pages answer first
+            await asyncio.sleep(0.01 * (10 - start) / 10)
+            return {'data': records[start:start + params['limit_page_length']]}
+
+        with patch.object(client, '_make_request_with_retry', side_effect=fake_request), \
+                patch.object(client.session, 'get', return_value=_FakeCountResponse(len(records))):
+            pages = [page async for page in client._paginate('http://test.com', {})]
+
+        assert [r for page in pages for r in page] == records
+
+        await client.close()
+
+    def test_normalize_timezones_vectorized(self):
+        """Test vectorized timezone normalization keeps unparseable values."""
+        client = AsyncAPIClient()
+        records = [
+            {'time': '2025-01-01T14:30:00Z'},
+            {'time': '2021-06-01T14:30:00Z'},
+            {'time': 'not-a-date'},
+        ]
+
+        result = client._normalize_timezones(records, as_string=True)
+
+        assert result[0]['time'] == '2025-01-01T08:30:00-06:00'
+        # Before October 2022 Mexico City observed daylight saving time
+        assert result[1]['time'] == '2021-06-01T09:30:00-05:00'
+        assert result[2]['time'] == 'not-a-date'
+
+    @patch('async_api_client.fetch_all_data_async', new_callable=AsyncMock)
+    def test_fetch_all_data_sync_wrapper(self, mock_fetch_all):
+        """Test the synchronous wrapper runs the async fetch to completion."""
+        mock_fetch_all.return_value = ([{'id': 1}], [], [])
+
+        result = fetch_all_data('2024-01-01', '2024-01-31', '%test%')
+
+        assert result == ([{'id': 1}], [], [])
+        mock_fetch_all.assert_awaited_once_with('2024-01-01', '2024-01-31', '%test%', None, False)
+
+    @pytest.mark.asyncio
+    @patch('async_api_client.get_api_headers')
+    async def test_shared_client_is_reused_until_closed(self, mock_get_headers):
+        """Test that the shared client is reused on the same loop and rebuilt after close."""
+        mock_get_headers.return_value = {'Authorization': 'Bearer token'}
+
+        first = await get_shared_client()
+        second = await get_shared_client()
+        assert first is second
+        mock_get_headers.assert_called_once()
+
+        await close_shared_client()
+        assert first.session is None
+
+        third = await get_shared_client()
+        assert third is not first
+        await close_shared_client()
+
 
 class TestStructuredLogger:
     """Test structured logging functionality."""
@@ -5,7 +5,10 @@ Tests para validar la funcionalidad de multi-quincena
 import sys
 import os
 from datetime import datetime, timedelta
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
+
+import psycopg2
+from psycopg2 import errorcodes
 
 import db_postgres_connection as db_conn
 
@@ -100,23 +103,24 @@ def test_obtener_horarios_multi_quincena():
     con los parámetros correctos según las quincenas solicitadas
     """
     with patch("db_postgres_connection.obtener_tabla_horarios") as mock_obtener_tabla:
-        # Configurar el mock para devolver valores diferentes según los parámetros
+        # Configurar el mock para devolver valores diferentes según los parámetros;
+        # con es_primera=None devuelve las filas de ambas quincenas
+        fila_primera = {
+            "codigo_frappe": "EMP1",
+            "nombre_sucursal": "Sucursal1",
+            "nombre_completo": "Empleado 1",
+            "es_primera_quincena": True,
+        }
+        fila_segunda = {
+            "codigo_frappe": "EMP2",
+            "nombre_sucursal": "Sucursal1",
+            "nombre_completo": "Empleado 2",
+            "es_primera_quincena": False,
+        }
         mock_obtener_tabla.side_effect = lambda sucursal, es_primera, conn, codigos: (
-            [
-                {
-                    "codigo_frappe": "EMP1",
-                    "nombre_sucursal": sucursal,
-                    "nombre_completo": "Empleado 1",
-                }
-            ]
-            if es_primera
-            else [
-                {
-                    "codigo_frappe": "EMP2",
-                    "nombre_sucursal": sucursal,
-                    "nombre_completo": "Empleado 2",
-                }
-            ]
+            [fila_primera, fila_segunda]
+            if es_primera is None
+            else [fila_primera] if es_primera else [fila_segunda]
         )
 
         # Caso 1: Sólo primera quincena
@@ -157,17 +161,181 @@ def test_obtener_horarios_multi_quincena():
             incluye_primera=True,
             incluye_segunda=True,
         )
-        assert True in horarios
-        assert False in horarios
-        assert mock_obtener_tabla.call_count == 2
-        mock_obtener_tabla.assert_any_call(
-            "Sucursal1", True, "conn-mock", ["EMP1", "EMP2"]
-        )
-        mock_obtener_tabla.assert_any_call(
-            "Sucursal1", False, "conn-mock", ["EMP1", "EMP2"]
+        assert horarios[True] == [fila_primera]
+        assert horarios[False] == [fila_segunda]
+        # Ambas quincenas salen de una sola consulta
+        mock_obtener_tabla.assert_called_once_with(
+            "Sucursal1", None, "conn-mock", ["EMP1", "EMP2"]
         )
 
 
+def test_obtener_tabla_horarios_decodifica_dias_json():
+    """
+    Prueba que los horarios por día que llegan como texto JSON se decodifiquen
+    y los que ya llegan como dict se conserven
+    """
+    fila = {
+        "codigo_frappe": "EMP1",
+        "Lunes": '{"horario_entrada": "09:00", "horario_salida": "18:00"}',
+        "Martes": {"horario_entrada": "10:00", "horario_salida": "19:00"},
+        "Miércoles": None,
+        "Jueves": None,
+        "Viernes": None,
+        "Sábado": None,
+        "Domingo": None,
+    }
+    cursor = MagicMock()
+    cursor.__enter__.return_value = cursor
+    cursor.fetchone.return_value = None  # Sin versión de horarios: no se usa caché
+    cursor.__iter__.return_value = iter([fila])
+    conn = MagicMock()
+    conn.cursor.return_value = cursor
+
+    horarios = db_conn.obtener_tabla_horarios("Sucursal1", True, conn)
+
+    assert horarios[0]["Lunes"] == {"horario_entrada": "09:00", "horario_salida": "18:00"}
+    assert horarios[0]["Martes"] == {"horario_entrada": "10:00", "horario_salida": "19:00"}
+    assert horarios[0]["Miércoles"] is None
+
+
+def test_obtener_tabla_horarios_filtra_codigos_en_la_consulta():
+    """
+    Prueba que las filas se lean de un cursor del lado del servidor y que el
+    filtro por código frappe viaje como parámetro de la consulta
+    """
+    filas = [
+        {"codigo_frappe": codigo, "Lunes": None, "Martes": None, "Miércoles": None,
+         "Jueves": None, "Viernes": None, "Sábado": None, "Domingo": None}
+        for codigo in (101, 103)
+    ]
+    cursor = MagicMock()
+    cursor.__enter__.return_value = cursor
+    cursor.fetchone.return_value = None  # Sin versión de horarios: no se usa caché
+    cursor.__iter__.return_value = iter(filas)
+    conn = MagicMock()
+    conn.cursor.return_value = cursor
+
+    horarios = db_conn.obtener_tabla_horarios("Sucursal1", False, conn, ["101", 103])
+
+    assert [h["codigo_frappe"] for h in horarios] == [101, 103]
+    assert conn.cursor.call_args.kwargs["name"]
+    sql, params = cursor.execute.call_args.args
+    assert "ANY" in sql
+    assert params == ("Sucursal1", False, False, ["101", "103"], ["101", "103"])
+    cursor.fetchall.assert_not_called()
+
+    # Sin códigos no se filtra
+    cursor.__iter__.return_value = iter(filas)
+    db_conn.obtener_tabla_horarios("Sucursal1", True, conn)
+    assert cursor.execute.call_args.args[1] == ("Sucursal1", True, True, None, None)
+
+
+def _cursor_horarios(version, filas):
+    """Cursor simulado: fetchone devuelve la versión y la iteración las filas."""
+    cursor = MagicMock()
+    cursor.__enter__.return_value = cursor
+    cursor.fetchone.return_value = version
+    cursor.__iter__.side_effect = lambda: iter(filas)
+    return cursor
+
+
+def _consultas(cursor, texto):
+    return [c for c in cursor.execute.call_args_list if texto in c.args[0]]
+
+
+def test_obtener_tabla_horarios_cache_por_version():
+    """
+    Prueba que la tabla de horarios se reutilice mientras la versión de
+    meta_horarios no cambie, sin importar el orden de los códigos
+    """
+    fila = {"codigo_frappe": 101, "Lunes": None, "Martes": None, "Miércoles": None,
+            "Jueves": None, "Viernes": None, "Sábado": None, "Domingo": None}
+    cursor = _cursor_horarios((7,), [fila])
+    conn = MagicMock()
+    conn.cursor.return_value = cursor
+
+    db_conn.clear_horario_cache()
+    try:
+        primera = db_conn.obtener_tabla_horarios("Sucursal1", True, conn, ["101", "102"])
+        segunda = db_conn.obtener_tabla_horarios("Sucursal1", True, conn, ["102", "101"])
+        assert primera == segunda == [fila]
+        assert len(_consultas(cursor, "f_tabla_horarios")) == 1
+        assert len(_consultas(cursor, "meta_horarios")) == 2
+    finally:
+        db_conn.clear_horario_cache()
+
+
+def test_obtener_tabla_horarios_cambio_de_version_reconsulta():
+    """
+    Prueba que un cambio de horarios entre dos llamadas seguidas se vea en la
+    segunda, sin esperar a que venza ningún plazo
+    """
+    fila = {"codigo_frappe": 101, "Lunes": None, "Martes": None, "Miércoles": None,
+            "Jueves": None, "Viernes": None, "Sábado": None, "Domingo": None}
+    cursor = _cursor_horarios((7,), [fila])
+    conn = MagicMock()
+    conn.cursor.return_value = cursor
+
+    db_conn.clear_horario_cache()
+    try:
+        db_conn.obtener_tabla_horarios("Sucursal1", True, conn)
+        cursor.fetchone.return_value = (8,)
+        db_conn.obtener_tabla_horarios("Sucursal1", True, conn)
+
+        assert len(_consultas(cursor, "meta_horarios")) == 2
+        assert len(_consultas(cursor, "f_tabla_horarios")) == 2
+    finally:
+        db_conn.clear_horario_cache()
+
+
+def test_obtener_tabla_horarios_sin_meta_horarios(caplog):
+    """
+    Prueba que sin la tabla meta_horarios se avise una sola vez y no se vuelva
+    a consultar la versión
+    """
+    class TablaInexistente(psycopg2.Error):
+        pgcode = errorcodes.UNDEFINED_TABLE
+
+    def ejecutar(sql, *args):
+        if "meta_horarios" in sql:
+            raise TablaInexistente("relation meta_horarios does not exist")
+
+    cursor = _cursor_horarios(None, [])
+    cursor.execute.side_effect = ejecutar
+    conn = MagicMock()
+    conn.cursor.return_value = cursor
+
+    db_conn.clear_horario_cache()
+    try:
+        for _ in range(3):
+            assert db_conn.obtener_tabla_horarios("Sucursal1", True, conn) == []
+        assert len(_consultas(cursor, "meta_horarios")) == 1
+        assert len(_consultas(cursor, "f_tabla_horarios")) == 3
+        conn.rollback.assert_called_once()
+        assert sum("meta_horarios" in r.getMessage() for r in caplog.records) == 1
+    finally:
+        db_conn.clear_horario_cache()
+
+
+def test_obtener_tabla_horarios_cache_lru():
+    """Prueba que al llenarse el caché salga la entrada usada hace más tiempo"""
+    cursor = _cursor_horarios((1,), [])
+    conn = MagicMock()
+    conn.cursor.return_value = cursor
+
+    db_conn.clear_horario_cache()
+    try:
+        with patch.object(db_conn, "MAX_TABLA_HORARIOS_CACHE", 2):
+            db_conn.obtener_tabla_horarios("A", True, conn)
+            db_conn.obtener_tabla_horarios("B", True, conn)
+            db_conn.obtener_tabla_horarios("A", True, conn)  # A pasa a ser la más reciente
+            db_conn.obtener_tabla_horarios("C", True, conn)  # sale B
+
+            assert [clave[0] for clave in db_conn._tabla_horarios_cache] == ["A", "C"]
+    finally:
+        db_conn.clear_horario_cache()
+
+
 def test_mapear_horarios_empleado_multi():
     """
     Prueba que mapear_horarios_por_empleado_multi construya correctamente
@@ -259,6 +427,29 @@ def test_mapear_horarios_empleado_multi():
     assert cache["EMP1"][False][1]["hora_entrada"] == "10:00"
 
 
+def test_cache_multi_quincena_no_revisa_claves_por_empleado():
+    """
+    Prueba que el caché de mapear_horarios_por_empleado_multi quede marcado como
+    multi-quincena y que las consultas no deduzcan el formato por empleado
+    """
+    horario = {"horario_entrada": "08:00", "horario_salida": "17:00", "horas_totales": "9"}
+    fila = {"codigo_frappe": "EMP1", "Lunes": horario, "Martes": None, "Miércoles": None,
+            "Jueves": None, "Viernes": None, "Sábado": None, "Domingo": None}
+
+    cache = mapear_horarios_por_empleado_multi({True: [fila]})
+    assert isinstance(cache, db_conn.HorariosMultiQuincena)
+
+    db_conn.clear_horario_cache()
+    try:
+        with patch("db_postgres_connection._es_formato_multi") as mock_formato:
+            assert obtener_horario_empleado("EMP1", 1, True, cache)["hora_entrada"] == "08:00"
+            assert obtener_horario_empleado("EMP1", 1, False, cache) is None
+            assert db_conn.obtener_horario_empleado_base("EMP1", 1, True, cache)["hora_entrada"] == "08:00"
+        mock_formato.assert_not_called()
+    finally:
+        db_conn.clear_horario_cache()
+
+
 def test_deteccion_cruza_medianoche():
     """
     Prueba que se detecte correctamente cuando un turno cruza la medianoche
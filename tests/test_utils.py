@@ -14,7 +14,12 @@ from utils import (
     time_to_decimal,
     format_timedelta_with_sign,
     calculate_working_days,
-    safe_timedelta
+    safe_timedelta,
+    safe_timedelta_series,
+    classify_tardiness,
+    TIPOS_RETARDO,
+    seconds_of_day,
+    seconds_to_hms,
 )
 
 
@@ -229,6 +234,17 @@ class TestNormalizeLeaveType:
             result = normalize_leave_type(input_val)
             assert result == expected
 
+    def test_normalize_leave_type_is_memoized(self):
+        """Test that repeated leave types are served from the cache."""
+        normalize_leave_type.cache_clear()
+
+        normalize_leave_type('Permiso Médico')
+        normalize_leave_type('Permiso Médico')
+
+        info = normalize_leave_type.cache_info()
+        assert info.misses == 1
+        assert info.hits == 1
+
 
 class TestTimeToDecimal:
     """Tests for time_to_decimal function."""
@@ -464,6 +480,17 @@ class TestSafeTimedelta:
             result = safe_timedelta(pd_td)
             assert isinstance(result, timedelta)
 
+    def test_safe_timedelta_series_matches_apply(self):
+        """Converting unique values once gives the same Series as a per-row apply."""
+        values = pd.Series(
+            ['08:00:00', None, '---', 'invalid', '07:30:00', '08:00:00', pd.Timedelta(hours=2)],
+            index=[10, 11, 12, 13, 14, 15, 16],
+        )
+
+        pd.testing.assert_series_equal(
+            safe_timedelta_series(values), values.apply(safe_timedelta)
+        )
+
 
 class TestUtilsIntegration:
     """Integration tests for utility functions working together."""
@@ -570,4 +597,55 @@ class TestUtilsPerformance:
         # Should complete bulk conversion efficiently
         assert end_time - start_time < 2.0
         assert len(results) == len(time_strings)
-        assert all(isinstance(r, (int, float)) for r in results)
\ No newline at end of file
+        assert all(isinstance(r, (int, float)) for r in results)
+
+
+class TestClassifyTardiness:
+    """Tests for vectorized tardiness classification."""
+
+    def test_threshold_boundaries(self):
+        """Test that each threshold is inclusive for its class."""
+        import numpy as np
+        from config import TOLERANCIA_RETARDO_MINUTOS, UMBRAL_FALTA_INJUSTIFICADA_MINUTOS
+
+        minutos = np.array([
+            -30,
+            TOLERANCIA_RETARDO_MINUTOS,
+            TOLERANCIA_RETARDO_MINUTOS + 0.5,
+            UMBRAL_FALTA_INJUSTIFICADA_MINUTOS,
+            UMBRAL_FALTA_INJUSTIFICADA_MINUTOS + 1,
+        ])
+
+        codes = classify_tardiness(minutos)
+
+        assert codes.dtype == np.int8
+        assert list(TIPOS_RETARDO[codes]) == [
+            "A Tiempo", "A Tiempo", "Retardo", "Retardo", "Falta Injustificada"
+        ]
+
+    def test_empty_input(self):
+        """Test that an empty array yields an empty result."""
+        import numpy as np
+
+        assert classify_tardiness(np.array([])).size == 0
+
+
+class TestSecondsOfDay:
+    """Tests for seconds-of-day extraction and formatting."""
+
+    def test_matches_strftime_for_naive_and_aware(self):
+        """Test that the lookup formatting matches strftime, including local time for aware values."""
+        naive = pd.Series(pd.to_datetime([
+            "2025-01-01 00:00:00", "2025-01-01 08:05:09.750", "2025-01-01 23:59:59"
+        ], format="ISO8601"))
+        aware = naive.dt.tz_localize("America/Mexico_City")
+
+        for times in (naive, aware):
+            result = seconds_to_hms(seconds_of_day(times))
+            assert list(result) == list(times.dt.strftime("%H:%M:%S"))
+
+    def test_seconds_values(self):
+        """Test the raw seconds since midnight."""
+        times = pd.Series(pd.to_datetime(["2025-01-01 01:02:03"]))
+
+        assert list(seconds_of_day(times)) == [3723]
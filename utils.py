@@ -5,10 +5,22 @@ Contains helper functions for data manipulation, calculations, and formatting.
 
 import re
 import unicodedata
+from functools import lru_cache
+import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
 from typing import Union, Optional
 
+from config import TOLERANCIA_RETARDO_MINUTOS, UMBRAL_FALTA_INJUSTIFICADA_MINUTOS
+
+# Upper bounds (inclusive, in minutes) of the "A Tiempo" and "Retardo" classes
+_UMBRALES_RETARDO = np.array(
+    [TOLERANCIA_RETARDO_MINUTOS, UMBRAL_FALTA_INJUSTIFICADA_MINUTOS], dtype=np.float64
+)
+
+# Labels for the codes returned by classify_tardiness
+TIPOS_RETARDO = np.array(["A Tiempo", "Retardo", "Falta Injustificada"], dtype=object)
+
 
 def _strip_accents(text: str) -> str:
     """Helper function to remove accents from a string."""
@@ -22,24 +34,26 @@ def _strip_accents(text: str) -> str:
     return str(text)
 
 
+_WHITESPACE_RE = re.compile(r"\s+")
+# Every unpaid-leave alias in one pattern: any name containing "sin goce", or
+# the "permiso sgs" abbreviation
+_SIN_GOCE_RE = re.compile(r"sin goce|^permiso sgs$")
+
+
+@lru_cache(maxsize=256)
 def normalize_leave_type(leave_type: str) -> str:
     """
     Normalizes leave type for consistent comparison (lowercase, no accents, normalized spaces).
+    Results are memoized: the set of leave types in use is small and repeats often.
     """
     if not leave_type:
         return ""
     cleaned = _strip_accents(str(leave_type)).casefold().strip()
-    cleaned = re.sub(r"\s+", " ", cleaned)
+    cleaned = _WHITESPACE_RE.sub(" ", cleaned)
     # Canonicalize common aliases to the same type
-    if "sin goce" in cleaned:
+    if _SIN_GOCE_RE.search(cleaned):
         return "permiso sin goce de sueldo"
-    aliases = {
-        "permiso sin goce": "permiso sin goce de sueldo",
-        "sin goce de sueldo": "permiso sin goce de sueldo",
-        "sin goce": "permiso sin goce de sueldo",
-        "permiso sgs": "permiso sin goce de sueldo",
-    }
-    return aliases.get(cleaned, cleaned)
+    return cleaned
 
 
 def calcular_proximidad_horario(checada: str, hora_prog: str) -> float:
@@ -97,6 +111,62 @@ def calcular_proximidad_horario(checada: str, hora_prog: str) -> float:
         return float("inf")
 
 
+def classify_tardiness(minutos_tarde: np.ndarray) -> np.ndarray:
+    """
+    Classifies minutes late against the tardiness thresholds in one vectorized pass.
+
+    Args:
+        minutos_tarde: Array of minutes between scheduled and actual entry
+
+    Returns:
+        int8 array of codes indexing TIPOS_RETARDO: 0 for values up to
+        TOLERANCIA_RETARDO_MINUTOS, 1 up to UMBRAL_FALTA_INJUSTIFICADA_MINUTOS,
+        2 above it
+    """
+    return np.digitize(minutos_tarde, _UMBRALES_RETARDO, right=True).astype(np.int8)
+
+
+@lru_cache(maxsize=1)
+def _hms_table() -> np.ndarray:
+    """"HH:MM:SS" string for every second of the day, built on first use."""
+    return np.array(
+        [f"{h:02}:{m:02}:{s:02}" for h in range(24) for m in range(60) for s in range(60)],
+        dtype=object,
+    )
+
+
+def seconds_to_hms(seconds: np.ndarray) -> np.ndarray:
+    """
+    Formats seconds-of-day as "HH:MM:SS" strings with a table lookup.
+
+    Args:
+        seconds: Integer array of seconds since midnight (0-86399)
+
+    Returns:
+        Object array of "HH:MM:SS" strings
+    """
+    return _hms_table()[seconds]
+
+
+def seconds_of_day(times: pd.Series) -> np.ndarray:
+    """
+    Returns the wall-clock seconds since midnight of a datetime Series.
+
+    Timezone-aware values use their local time. Sub-second parts are truncated,
+    as strftime("%H:%M:%S") would.
+
+    Args:
+        times: datetime64 Series, naive or timezone-aware
+
+    Returns:
+        int64 array of seconds since midnight
+    """
+    if times.dt.tz is not None:
+        times = times.dt.tz_localize(None)
+    values = times.to_numpy()
+    return (values - values.astype("datetime64[D]")).astype("timedelta64[s]").astype(np.int64)
+
+
 def td_to_str(td: pd.Timedelta) -> str:
     """
     Converts a Timedelta to HH:MM:SS string without losing days (> 24 h) or microseconds.
@@ -132,6 +202,28 @@ def safe_timedelta(time_str: Union[str, None]) -> pd.Timedelta:
         return pd.Timedelta(0)
 
 
+def safe_timedelta_series(values: pd.Series) -> pd.Series:
+    """
+    Applies safe_timedelta to a Series, converting each distinct value once.
+
+    Shift lengths such as "08:00:00" repeat on most rows, so the values are
+    factorized and only the uniques go through safe_timedelta.
+
+    Args:
+        values: Series of time strings (or Timedelta values)
+
+    Returns:
+        timedelta64 Series aligned with values; missing values become 0
+    """
+    codes, uniques = pd.factorize(values)
+    # The extra trailing zero is picked by the -1 code of missing values
+    convertidos = np.array(
+        [safe_timedelta(value) for value in uniques] + [pd.Timedelta(0)],
+        dtype="timedelta64[ns]",
+    )
+    return pd.Series(convertidos[codes], index=values.index, name=values.name)
+
+
 def time_to_decimal(time_str: str) -> float:
     """
     Converts time string to decimal hours for calculations.
@@ -235,12 +327,10 @@ def determine_period_type(start_date: str, end_date: str) -> tuple:
     fecha_inicio_dt = datetime.strptime(start_date, "%Y-%m-%d")
     fecha_fin_dt = datetime.strptime(end_date, "%Y-%m-%d")
 
-    incluye_primera = any(
-        d.day <= 15 for d in pd.date_range(start=fecha_inicio_dt, end=fecha_fin_dt)
-    )
-    incluye_segunda = any(
-        d.day > 15 for d in pd.date_range(start=fecha_inicio_dt, end=fecha_fin_dt)
-    )
+    dias_del_mes = pd.date_range(start=fecha_inicio_dt, end=fecha_fin_dt).day
+
+    incluye_primera = bool((dias_del_mes <= 15).any())
+    incluye_segunda = bool((dias_del_mes > 15).any())
     
     return incluye_primera, incluye_segunda
 
@@ -258,6 +348,4 @@ def calculate_working_days(start_date: str, end_date: str) -> int:
     """
     start_dt = datetime.strptime(start_date, "%Y-%m-%d")
     end_dt = datetime.strptime(end_date, "%Y-%m-%d")
-    return sum(
-        1 for d in pd.date_range(start=start_dt, end=end_dt) if d.weekday() < 5
-    )
\ No newline at end of file
+    return int((pd.date_range(start=start_dt, end=end_dt).weekday < 5).sum())
\ No newline at end of file